@@ -0,0 +1 @@
+"""Offline benchmarks for the matching engine (run from apps/api: python -m benchmarks.bench_matching)"""
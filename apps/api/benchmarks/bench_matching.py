@@ -0,0 +1,262 @@
+"""
+Offline benchmarks for the matching engine.
+
+Runs against the in-memory FakeSupabase, so no network or Supabase project is
+needed. Covers:
+
+  * micro       - per-call cost of each calculate_* helper, compute_match_score
+                  and score_components
+  * memory      - bytes per cached catalog entry (records plus tag index)
+  * requests    - p50/p95/p99 latency of brand and event compute paths
+  * recompute   - full and no-op incremental recompute throughput per catalog size
+
+Results are written as JSON so runs can be compared across commits.
+
+Usage (from apps/api):
+    python -m benchmarks.bench_matching --output bench_results.json
+    python -m benchmarks.bench_matching --quick
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+from database import Database
+from matching import MatchingEngine
+from records import BrandRecord, EventRecord
+from benchmarks.fake_supabase import seed_catalog
+
+DEFAULT_RECOMPUTE_SIZES = ['100x1000', '200x2000', '400x4000']
+QUICK_RECOMPUTE_SIZES = ['50x200', '100x500']
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Summary of latency samples in milliseconds"""
+    ordered = sorted(samples)
+    if len(ordered) < 2:
+        ordered = ordered * 2
+    cuts = statistics.quantiles(ordered, n=100, method='inclusive')
+    return {
+        'n': len(samples),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 4),
+        'p50_ms': round(cuts[49] * 1000, 4),
+        'p95_ms': round(cuts[94] * 1000, 4),
+        'p99_ms': round(cuts[98] * 1000, 4),
+        'max_ms': round(ordered[-1] * 1000, 4),
+    }
+
+
+def parse_size(size: str) -> Tuple[int, int]:
+    """'500x5000' -> (500 brands, 5000 events)"""
+    n_brands, n_events = size.lower().split('x')
+    return int(n_brands), int(n_events)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+
+def time_per_call(fn: Callable[..., Any], calls: List[Tuple], repeats: int) -> Dict[str, float]:
+    """Best and median nanoseconds per call of fn over the argument tuples, repeated"""
+    per_call = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        for args in calls:
+            fn(*args)
+        per_call.append((time.perf_counter_ns() - start) / len(calls))
+    return {
+        'calls': len(calls) * repeats,
+        'best_ns': round(min(per_call), 1),
+        'median_ns': round(statistics.median(per_call), 1),
+    }
+
+
+def bench_micro(engine: MatchingEngine, brands: List[BrandRecord], events: List[EventRecord],
+                pairs: int, repeats: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    sample = [(rng.choice(brands), rng.choice(events)) for _ in range(pairs)]
+
+    # Arguments are extracted up front so the loops time the helpers, not attribute access
+    return {
+        'calculate_tag_overlap': time_per_call(
+            engine.calculate_tag_overlap,
+            [(b.preferred_event_types, e.tags) for b, e in sample], repeats),
+        'calculate_budget_alignment': time_per_call(
+            engine.calculate_budget_alignment,
+            [(b.budget_range_min, b.budget_range_max, e.sponsorship_min_amount, e.sponsorship_max_amount)
+             for b, e in sample], repeats),
+        'calculate_attendance_score': time_per_call(
+            engine.calculate_attendance_score,
+            [(e.expected_attendance, b.size_preferences) for b, e in sample], repeats),
+        'calculate_recency_score': time_per_call(
+            engine.calculate_recency_score, [(e.event_date,) for _, e in sample], repeats),
+        'calculate_demographic_match': time_per_call(
+            engine.calculate_demographic_match,
+            [(b.target_demographics, e.university, e.org_category) for b, e in sample], repeats),
+        'compute_match_score': time_per_call(engine.compute_match_score, sample, repeats),
+        'score_components': time_per_call(engine.score_components, sample, repeats),
+    }
+
+
+async def bench_memory(n_brands: int, n_events: int, seed: int) -> Dict[str, Any]:
+    """Bytes allocated per entry by loading each catalog snapshot"""
+    fake = seed_catalog(n_brands, n_events, seed=seed)
+    engine = MatchingEngine(Database(fake))
+    results = {'catalog': {'brands': n_brands, 'events': n_events}}
+    try:
+        for kind, size in (('events', n_events), ('brands', n_brands)):
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            snapshot = await engine.catalog.get(kind)
+            retained = tracemalloc.get_traced_memory()[0] - before
+            tracemalloc.stop()
+            results[kind] = {
+                'entries': len(snapshot.entities),
+                'bytes_per_entry': round(retained / size, 1) if size else None,
+            }
+    finally:
+        engine.close()
+        engine.db.close()
+    return results
+
+
+async def bench_requests(n_brands: int, n_events: int, requests: int, limit: int,
+                         seed: int) -> Dict[str, Any]:
+    fake = seed_catalog(n_brands, n_events, seed=seed)
+    engine = MatchingEngine(Database(fake))
+    rng = random.Random(seed)
+    brand_ids = [row['id'] for row in fake.tables['brands']]
+    event_ids = [row['id'] for row in fake.tables['events']]
+
+    async def measure(kwarg: str, ids: List[str]) -> Dict[str, Any]:
+        # The first call pays for loading the catalog snapshot; report it on its own
+        start = time.perf_counter()
+        await engine.compute_matches(limit=limit, **{kwarg: rng.choice(ids)})
+        cold = time.perf_counter() - start
+
+        samples = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            await engine.compute_matches(limit=limit, **{kwarg: rng.choice(ids)})
+            samples.append(time.perf_counter() - start)
+        return {'cold_ms': round(cold * 1000, 4), **percentiles(samples)}
+
+    try:
+        return {
+            'catalog': {'brands': n_brands, 'events': n_events},
+            'limit': limit,
+            'brand': await measure('brand_id', brand_ids),
+            'event': await measure('event_id', event_ids),
+        }
+    finally:
+        engine.close()
+        engine.db.close()
+
+
+async def bench_recompute(n_brands: int, n_events: int, seed: int, workers: int) -> Dict[str, Any]:
+    fake = seed_catalog(n_brands, n_events, seed=seed)
+    engine = MatchingEngine(Database(fake), recompute_workers=workers)
+    try:
+        start = time.perf_counter()
+        result = await engine.recompute_all_matches()
+        elapsed = time.perf_counter() - start
+
+        # Nothing changed since the first run, so this measures the fixed overhead
+        start = time.perf_counter()
+        await engine.recompute_all_matches(incremental=True)
+        noop_elapsed = time.perf_counter() - start
+    finally:
+        engine.close()
+        engine.db.close()
+
+    return {
+        'catalog': {'brands': n_brands, 'events': n_events},
+        'workers': workers,
+        'pairs': result['rescored'],
+        'rows_written': result['count'],
+        'seconds': round(elapsed, 4),
+        'pairs_per_sec': round(result['rescored'] / elapsed, 1) if elapsed else None,
+        'incremental_noop_seconds': round(noop_elapsed, 4),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+        }
+    }
+
+    n_brands, n_events = parse_size(args.request_size)
+    fake = seed_catalog(n_brands, n_events, seed=args.seed)
+    engine = MatchingEngine(Database(fake))
+    try:
+        brands = [BrandRecord.from_row(row, engine.tag_vocabulary) for row in fake.tables['brands']]
+        events = [EventRecord.from_row(row, engine.tag_vocabulary) for row in fake.tables['events']]
+        print(f"micro: {args.micro_pairs} pairs x {args.repeats} repeats", file=sys.stderr)
+        results['micro'] = bench_micro(engine, brands, events, args.micro_pairs, args.repeats, args.seed)
+    finally:
+        engine.close()
+        engine.db.close()
+
+    print(f"memory: catalog snapshots at {args.request_size}", file=sys.stderr)
+    results['memory'] = await bench_memory(n_brands, n_events, args.seed)
+
+    print(f"requests: {args.requests} per path at {args.request_size}", file=sys.stderr)
+    results['requests'] = await bench_requests(n_brands, n_events, args.requests, args.limit, args.seed)
+
+    results['recompute'] = []
+    for size in args.sizes:
+        print(f"recompute: {size} with {args.workers} worker(s)", file=sys.stderr)
+        results['recompute'].append(await bench_recompute(*parse_size(size), args.seed, args.workers))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the matching engine against an in-memory Supabase")
+    parser.add_argument('--output', default='bench_results.json', help="JSON file to write results to")
+    parser.add_argument('--quick', action='store_true', help="Small sizes for a fast smoke run")
+    parser.add_argument('--sizes', nargs='+', help="Recompute catalog sizes as BRANDSxEVENTS")
+    parser.add_argument('--request-size', help="Catalog size for request latency, BRANDSxEVENTS")
+    parser.add_argument('--requests', type=int, help="Requests per compute path")
+    parser.add_argument('--limit', type=int, default=50, help="Matches returned per request")
+    parser.add_argument('--micro-pairs', type=int, help="Pairs per microbenchmark loop")
+    parser.add_argument('--repeats', type=int, default=5, help="Microbenchmark repeats")
+    parser.add_argument('--workers', type=int, default=1, help="Recompute worker processes")
+    parser.add_argument('--seed', type=int, default=0, help="Catalog and sampling seed")
+    args = parser.parse_args()
+
+    args.sizes = args.sizes or (QUICK_RECOMPUTE_SIZES if args.quick else DEFAULT_RECOMPUTE_SIZES)
+    args.request_size = args.request_size or ('100x500' if args.quick else '500x5000')
+    args.requests = args.requests or (20 if args.quick else 200)
+    args.micro_pairs = args.micro_pairs or (1000 if args.quick else 10000)
+
+    results = asyncio.run(run(args))
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+"""
+In-memory stand-in for the supabase-py table API used by the matching engine.
+
+Supports the table(...).select(...).eq(...)...execute() chain (filters,
+order, limit, single, insert, upsert, delete) over plain lists of dicts, the
+Postgres functions from db/matching_schema.sql as rpc(...) calls, plus
+seeded catalog generation. Events carry their org embedded under 'orgs' the
+way PostgREST returns the join; matches rows get their event/brand embedded
+when the select asks for it.
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+# Embedded resources a select can ask for, keyed by the foreign key column
+EMBEDS = {'events': 'event_id', 'brands': 'brand_id'}
+
+TAGS = [
+    'tech', 'ai', 'startups', 'career', 'networking', 'hackathon', 'music', 'concert',
+    'sports', 'fitness', 'esports', 'gaming', 'food', 'culture', 'art', 'film',
+    'fashion', 'sustainability', 'health', 'wellness', 'finance', 'investing', 'debate',
+    'public speaking', 'leadership', 'entrepreneurship', 'social', 'greek life', 'charity',
+    'fundraiser', 'conference', 'workshop', 'competition', 'travel', 'outdoors', 'dance',
+    'theater', 'photography', 'design', 'marketing', 'consulting', 'law', 'medicine',
+    'engineering', 'robotics', 'science', 'environment', 'politics', 'volunteering', 'coffee',
+]
+DEMOGRAPHICS = [
+    'college students', 'students', 'gen z', '18-24', 'young adults', 'graduate students',
+    'engineers', 'athletes', 'greek life', 'young professionals', 'artists', 'gamers',
+]
+CATEGORIES = ['Academic', 'Cultural', 'Greek Life', 'Sports', 'Professional', 'Arts', None]
+UNIVERSITIES = [
+    'Columbia University', 'New York University', 'Boston College', 'MIT', 'Stanford University',
+    'Fordham', 'Cornell University', 'Barnard College', 'The New School', 'Student Union',
+]
+COMPANY_SIZES = ['startup', 'small', 'medium', 'large', 'enterprise', None]
+BUDGETS = [None, 250, 500, 1000, 2500, 5000, 10000, 25000]
+# Vocabulary descriptions are drawn from, so text similarity has something to find
+DESCRIPTION_WORDS = [
+    'students', 'campus', 'workshop', 'speakers', 'panel', 'networking', 'mixer', 'founders',
+    'coding', 'machine', 'learning', 'robots', 'tournament', 'league', 'training', 'yoga',
+    'nutrition', 'tasting', 'recipes', 'festival', 'gallery', 'exhibition', 'screening',
+    'documentary', 'runway', 'streetwear', 'recycling', 'climate', 'garden', 'investing',
+    'markets', 'budgeting', 'interviews', 'resumes', 'mentors', 'alumni', 'charity', 'auction',
+    'concert', 'band', 'dj', 'gaming', 'console', 'espresso', 'brunch', 'hiking', 'camping',
+    'photography', 'portraits', 'debate', 'policy', 'startup', 'pitch', 'demo', 'product',
+]
+
+
+class FakeResponse:
+    def __init__(self, data: Any):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, db: 'FakeSupabase', table: str):
+        self.db = db
+        self.table = table
+        self.columns = '*'
+        self.filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self.operation = 'select'
+        self.payload: Any = None
+        self.on_conflict = ''
+        self.is_single = False
+        self.limit_count: Optional[int] = None
+        self.order_by: List[tuple] = []
+
+    def select(self, columns: str = '*', **kwargs) -> 'FakeQuery':
+        self.columns = columns
+        return self
+
+    def eq(self, column: str, value: Any) -> 'FakeQuery':
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column: str, value: Any) -> 'FakeQuery':
+        self.filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def gt(self, column: str, value: Any) -> 'FakeQuery':
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) > value)
+        return self
+
+    def gte(self, column: str, value: Any) -> 'FakeQuery':
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) >= value)
+        return self
+
+    def lt(self, column: str, value: Any) -> 'FakeQuery':
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) < value)
+        return self
+
+    def lte(self, column: str, value: Any) -> 'FakeQuery':
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) <= value)
+        return self
+
+    def in_(self, column: str, values: List[Any]) -> 'FakeQuery':
+        allowed = set(values)
+        self.filters.append(lambda row: row.get(column) in allowed)
+        return self
+
+    def order(self, column: str, desc: bool = False) -> 'FakeQuery':
+        self.order_by.append((column, desc))
+        return self
+
+    def limit(self, count: int) -> 'FakeQuery':
+        self.limit_count = count
+        return self
+
+    def single(self) -> 'FakeQuery':
+        self.is_single = True
+        return self
+
+    def insert(self, rows: Any, **kwargs) -> 'FakeQuery':
+        self.operation, self.payload = 'insert', rows
+        return self
+
+    def upsert(self, rows: Any, on_conflict: str = '', **kwargs) -> 'FakeQuery':
+        self.operation, self.payload, self.on_conflict = 'upsert', rows, on_conflict
+        return self
+
+    def delete(self, **kwargs) -> 'FakeQuery':
+        self.operation = 'delete'
+        return self
+
+    def execute(self) -> FakeResponse:
+        if self.db.latency_seconds:
+            time.sleep(self.db.latency_seconds)
+        self.db.query_count += 1
+        with self.db.lock:
+            return getattr(self, f'_execute_{self.operation}')()
+
+    def _rows(self) -> List[Dict[str, Any]]:
+        return self.db.tables.setdefault(self.table, [])
+
+    def _matching(self) -> List[Dict[str, Any]]:
+        return [row for row in self._rows() if all(f(row) for f in self.filters)]
+
+    def _execute_select(self) -> FakeResponse:
+        rows = self._matching()
+        # Later order() calls break ties of earlier ones; stable sorts, last key first
+        for column, desc in reversed(self.order_by):
+            rows.sort(key=lambda row: row.get(column), reverse=desc)
+        if self.limit_count is not None:
+            rows = rows[:self.limit_count]
+        rows = [self._embed(row) for row in rows]
+        if self.is_single:
+            return FakeResponse(rows[0] if rows else None)
+        return FakeResponse(rows)
+
+    def _embed(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        embedded = None
+        for table, column in EMBEDS.items():
+            if f'{table}(' in self.columns and column in row:
+                embedded = embedded or dict(row)
+                embedded[table] = self.db.get(table, row[column])
+        return embedded or row
+
+    def _execute_insert(self) -> FakeResponse:
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        self._rows().extend(self.db.with_defaults(dict(row)) for row in rows)
+        return FakeResponse(rows)
+
+    def _execute_upsert(self) -> FakeResponse:
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        key_columns = [c.strip() for c in self.on_conflict.split(',') if c.strip()] or ['id']
+        existing = {tuple(row.get(c) for c in key_columns): row for row in self._rows()}
+        for row in rows:
+            key = tuple(row.get(c) for c in key_columns)
+            if key in existing:
+                existing[key].update(row)
+            else:
+                stored = self.db.with_defaults(dict(row))
+                self._rows().append(stored)
+                existing[key] = stored
+        return FakeResponse(rows)
+
+    def _execute_delete(self) -> FakeResponse:
+        deleted = self._matching()
+        deleted_ids = set(map(id, deleted))
+        self.db.tables[self.table] = [row for row in self._rows() if id(row) not in deleted_ids]
+        return FakeResponse(deleted)
+
+
+class FakeCall:
+    """rpc(...) call to one of FUNCTIONS, executed like a query"""
+
+    def __init__(self, db: 'FakeSupabase', function: Callable[..., Any], params: Dict[str, Any]):
+        self.db = db
+        self.function = function
+        self.params = params
+
+    def execute(self) -> FakeResponse:
+        if self.db.latency_seconds:
+            time.sleep(self.db.latency_seconds)
+        self.db.query_count += 1
+        with self.db.lock:
+            return FakeResponse(self.function(self.db, **self.params))
+
+
+def refresh_match_recency(db: 'FakeSupabase', p_event_ids: List[str], p_recency_scores: List[float],
+                          p_recency_weight: float) -> int:
+    """Same update as the SQL function: shift score by the recency change, skip rows without components"""
+    recency_by_event = dict(zip(p_event_ids, p_recency_scores))
+    updated = 0
+    for row in db.tables.get('matches', []):
+        recency = recency_by_event.get(row['event_id'])
+        if recency is None or row.get('recency_score') is None or row['recency_score'] == recency:
+            continue
+        row['score'] = min(1.0, max(0.0, row['score'] + p_recency_weight * (recency - row['recency_score'])))
+        row['recency_score'] = recency
+        if row.get('reasoning') is not None:
+            row['reasoning'] = {**row['reasoning'], 'recency_score': recency}
+        updated += 1
+    return updated
+
+
+FUNCTIONS: Dict[str, Callable[..., Any]] = {'refresh_match_recency': refresh_match_recency}
+
+
+class FakeSupabase:
+    """Thread-safe in-memory tables behind the supabase-py table(...) API"""
+
+    def __init__(self, tables: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                 latency_ms: float = 0.0):
+        self.tables = tables or {}
+        self.latency_seconds = latency_ms / 1000.0
+        self.lock = threading.Lock()
+        self.query_count = 0
+
+    def table(self, table_name: str) -> FakeQuery:
+        return FakeQuery(self, table_name)
+
+    def rpc(self, function_name: str, params: Dict[str, Any]) -> FakeCall:
+        return FakeCall(self, FUNCTIONS[function_name], params)
+
+    def upsert_serialized(self, table_name: str, body: str, on_conflict: str = '') -> FakeQuery:
+        return FakeQuery(self, table_name).upsert(json.loads(body), on_conflict=on_conflict)
+
+    def get(self, table: str, row_id: str) -> Optional[Dict[str, Any]]:
+        for row in self.tables.get(table, []):
+            if row.get('id') == row_id:
+                return row
+        return None
+
+    def with_defaults(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        row.setdefault('id', str(uuid.uuid4()))
+        row.setdefault('created_at', datetime.now(timezone.utc).isoformat())
+        return row
+
+
+def generate_description(rng: random.Random, prefix: str) -> str:
+    return f"{prefix} " + ' '.join(rng.sample(DESCRIPTION_WORDS, rng.randint(3, 12)))
+
+
+def generate_brand(rng: random.Random, index: int, updated_at: str) -> Dict[str, Any]:
+    budget_min = rng.choice(BUDGETS)
+    budget_max = budget_min * rng.choice([1, 2, 4]) if budget_min else rng.choice(BUDGETS)
+    brand = {
+        'id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'company_name': f"Brand {index}",
+        'description': f"Campus marketing partner #{index}",
+        'industry': rng.choice(['Beverage', 'Tech', 'Fashion', 'Finance', 'Food', 'Media']),
+        'company_size': rng.choice(COMPANY_SIZES),
+        'status': 'verified',
+        'target_demographics': rng.sample(DEMOGRAPHICS, rng.randint(0, 3)),
+        'budget_range_min': budget_min,
+        'budget_range_max': budget_max,
+        'preferred_event_types': rng.sample(TAGS, rng.randint(1, 5)),
+        'geographic_focus': [],
+        'updated_at': updated_at,
+    }
+    # Drawn last so the other fields stay as they were for a given seed
+    brand['description'] = generate_description(rng, f"Campus marketing partner #{index}:")
+    return brand
+
+
+def generate_event(rng: random.Random, index: int, updated_at: str) -> Dict[str, Any]:
+    event_date = None
+    if rng.random() < 0.9:
+        event_date = (datetime.now(timezone.utc) + timedelta(days=rng.randint(-30, 365))).isoformat()
+    sponsorship_min = rng.choice(BUDGETS)
+    sponsorship_max = sponsorship_min * rng.choice([1, 2, 5]) if sponsorship_min else rng.choice(BUDGETS)
+    event = {
+        'id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'title': f"Event {index}",
+        'description': f"Student organization event #{index}",
+        'event_date': event_date,
+        'expected_attendance': rng.choice([None, 25, 80, 150, 250, 400, 800, 2000]),
+        'event_type': rng.choice(['conference', 'social', 'fundraiser', 'competition']),
+        'sponsorship_min_amount': sponsorship_min,
+        'sponsorship_max_amount': sponsorship_max,
+        'sponsorship_benefits': ['logo placement'],
+        'tags': rng.sample(TAGS, rng.randint(1, 6)),
+        'status': 'published',
+        'updated_at': updated_at,
+        'orgs': {
+            'name': f"Org {index % 500}",
+            'university': rng.choice(UNIVERSITIES),
+            'category': rng.choice(CATEGORIES),
+            'updated_at': updated_at,
+        },
+    }
+    event['description'] = generate_description(rng, f"Student organization event #{index}:")
+    return event
+
+
+def seed_catalog(n_brands: int, n_events: int, seed: int = 0, latency_ms: float = 0.0) -> FakeSupabase:
+    """FakeSupabase with a deterministic catalog of verified brands and published events"""
+    rng = random.Random(seed)
+    updated_at = datetime(2024, 1, 1, tzinfo=timezone.utc).isoformat()
+    return FakeSupabase({
+        'brands': [generate_brand(rng, i, updated_at) for i in range(n_brands)],
+        'events': [generate_event(rng, i, updated_at) for i in range(n_events)],
+        'matches': [],
+        'match_recompute_state': [],
+    }, latency_ms=latency_ms)
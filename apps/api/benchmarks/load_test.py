@@ -0,0 +1,405 @@
+"""
+HTTP load test for the matching API.
+
+Drives the FastAPI app from main.py against the in-memory FakeSupabase,
+seeded at a chosen catalog size, so no Supabase project is needed. The
+database client the app creates at startup is swapped for the fake; the rest
+of the stack (middleware, routing, engine, caches) is the real one.
+
+Scenarios, mixed by weight (--mix):
+
+  * brand      - POST /api/v1/compute-matches for a random brand
+  * event      - POST /api/v1/compute-matches for a random event
+  * listing    - GET the stored matches of a random brand or event
+  * recompute  - POST /api/v1/recompute-all-matches every --recompute-interval
+                 seconds in the background (409 while one runs is expected)
+
+A closed-loop client runs at each --concurrency level in turn, so the results
+trace throughput against latency. Each level reports requests per second,
+p50/p95/p99 latency overall and per scenario, error rate and server CPU per
+request. The saturation point is the first level whose throughput gains less
+than --saturation-gain over the previous one.
+
+Modes:
+
+  * inprocess  - requests go through an ASGI transport in this process; CPU
+                 per request then includes the client's own work
+  * localhost  - the app runs under uvicorn in a child process and is called
+                 over TCP; CPU per request is the server process alone
+
+Stored matches are seeded with one full recompute before the first level.
+
+Usage (from apps/api):
+    python -m benchmarks.load_test --output load_results.json
+    python -m benchmarks.load_test --mode localhost --size 200x2000 --concurrency 1 8 32
+    python -m benchmarks.load_test --quick
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.bench_matching import git_commit, parse_size, percentiles
+from benchmarks.fake_supabase import seed_catalog
+
+SCENARIOS = ('brand', 'event', 'listing')
+DEFAULT_MIX = 'brand:4,event:4,listing:2'
+DEFAULT_CONCURRENCY = [1, 2, 4, 8, 16, 32]
+QUICK_CONCURRENCY = [1, 4]
+
+# Every route requires a bearer token; the API doesn't verify it yet
+HEADERS = {'Authorization': 'Bearer load-test'}
+
+# Seconds to wait for /ready and for the seeding recompute
+READY_TIMEOUT_SECONDS = 120.0
+RECOMPUTE_TIMEOUT_SECONDS = 1800.0
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """'brand:4,event:4,listing:2' -> scenario weights"""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition(':')
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}; expected one of: {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def use_fake_backend(n_brands: int, n_events: int, seed: int, latency_ms: float):
+    """Point main.py's startup at a seeded FakeSupabase; returns the fake"""
+    from database import Database
+    import main
+
+    fake = seed_catalog(n_brands, n_events, seed=seed, latency_ms=latency_ms)
+    os.environ.setdefault('SUPABASE_URL', 'http://fake-supabase')
+    os.environ.setdefault('SUPABASE_SERVICE_ROLE_KEY', 'load-test')
+    # Periodic jobs would land at random points in a run; the recompute scenario covers writes
+    os.environ.setdefault('RECENCY_REFRESH_INTERVAL_SECONDS', '0')
+    main.create_database = lambda url, key, max_connections: Database(fake, max_connections)
+    return fake
+
+
+def process_tree_cpu_seconds(pid: int) -> Optional[float]:
+    """User plus system CPU of a process and its live children, where /proc exposes it"""
+    try:
+        children: Dict[int, List[int]] = {}
+        times: Dict[int, float] = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+            except OSError:
+                continue
+            children.setdefault(int(fields[1]), []).append(int(entry))
+            times[int(entry)] = (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+    total, pending = 0.0, [pid]
+    while pending:
+        current = pending.pop()
+        total += times.get(current, 0.0)
+        pending.extend(children.get(current, []))
+    return total
+
+
+class Target:
+    """Where requests go: an httpx client plus a way to read the server's CPU time"""
+
+    def __init__(self, client: httpx.AsyncClient, cpu_seconds: Callable[[], Optional[float]]):
+        self.client = client
+        self.cpu_seconds = cpu_seconds
+
+
+class Recorder:
+    """(scenario, seconds, ok) of every request finished during a measured window"""
+
+    def __init__(self):
+        self.samples: List[Tuple[str, float, bool]] = []
+        self.recording = False
+
+    def add(self, scenario: str, seconds: float, ok: bool):
+        if self.recording:
+            self.samples.append((scenario, seconds, ok))
+
+
+async def request(target: Target, scenario: str, method: str, url: str, recorder: Recorder,
+                  ok_statuses: Tuple[int, ...] = (200,), **kwargs) -> Optional[httpx.Response]:
+    start = time.perf_counter()
+    try:
+        response = await target.client.request(method, url, headers=HEADERS, **kwargs)
+    except httpx.HTTPError:
+        recorder.add(scenario, time.perf_counter() - start, False)
+        return None
+    recorder.add(scenario, time.perf_counter() - start, response.status_code in ok_statuses)
+    return response
+
+
+async def run_scenario(target: Target, scenario: str, rng: random.Random, brand_ids: List[str],
+                       event_ids: List[str], limit: int, recorder: Recorder):
+    if scenario == 'brand':
+        body = {'brand_id': rng.choice(brand_ids), 'limit': limit}
+        await request(target, scenario, 'POST', '/api/v1/compute-matches', recorder, json=body)
+    elif scenario == 'event':
+        body = {'event_id': rng.choice(event_ids), 'limit': limit}
+        await request(target, scenario, 'POST', '/api/v1/compute-matches', recorder, json=body)
+    elif rng.random() < len(brand_ids) / (len(brand_ids) + len(event_ids)):
+        url = f'/api/v1/matches/{rng.choice(brand_ids)}'
+        await request(target, scenario, 'GET', url, recorder, params={'limit': limit})
+    else:
+        url = f'/api/v1/event-matches/{rng.choice(event_ids)}'
+        await request(target, scenario, 'GET', url, recorder, params={'limit': limit})
+
+
+async def recompute_periodically(target: Target, interval: float, full: bool, recorder: Recorder):
+    while True:
+        await asyncio.sleep(interval)
+        await request(
+            target, 'recompute', 'POST', '/api/v1/recompute-all-matches', recorder,
+            ok_statuses=(202, 409), params={'incremental': str(not full).lower()}
+        )
+
+
+async def wait_ready(target: Target):
+    deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        try:
+            if (await target.client.get('/ready')).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f"App not ready after {READY_TIMEOUT_SECONDS:.0f}s")
+
+
+async def seed_matches(target: Target) -> Dict[str, Any]:
+    """Run one full recompute and wait for it, so listings have stored matches"""
+    response = await target.client.post('/api/v1/recompute-all-matches', headers=HEADERS)
+    job = response.json()['job'] if response.status_code == 202 else response.json()['detail']['job']
+    deadline = time.monotonic() + RECOMPUTE_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        job = (await target.client.get(f"/api/v1/recompute-jobs/{job['id']}", headers=HEADERS)).json()
+        if job['state'] not in ('queued', 'running'):
+            if job['state'] != 'succeeded':
+                raise RuntimeError(f"Seeding recompute {job['state']}: {job['error']}")
+            return job
+        await asyncio.sleep(0.5)
+    raise TimeoutError(f"Seeding recompute still running after {RECOMPUTE_TIMEOUT_SECONDS:.0f}s")
+
+
+def summarize(samples: List[Tuple[str, float, bool]], seconds: float) -> Dict[str, Any]:
+    latencies = [latency for _, latency, _ in samples]
+    errors = sum(1 for _, _, ok in samples if not ok)
+    return {
+        'requests': len(samples),
+        'rps': round(len(samples) / seconds, 2),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else None,
+        'latency': percentiles(latencies) if latencies else None,
+    }
+
+
+async def run_level(target: Target, concurrency: int, args: argparse.Namespace, mix: Dict[str, float],
+                    brand_ids: List[str], event_ids: List[str]) -> Dict[str, Any]:
+    """Closed loop at one concurrency: warm up, then measure for args.duration seconds"""
+    recorder = Recorder()
+    names, weights = list(mix), list(mix.values())
+    stop = asyncio.Event()
+
+    async def client(index: int):
+        rng = random.Random(args.seed * 1000 + index)
+        while not stop.is_set():
+            scenario = rng.choices(names, weights)[0]
+            await run_scenario(target, scenario, rng, brand_ids, event_ids, args.limit, recorder)
+
+    clients = [asyncio.create_task(client(i)) for i in range(concurrency)]
+    background = []
+    if args.recompute_interval > 0:
+        background.append(asyncio.create_task(
+            recompute_periodically(target, args.recompute_interval, args.full_recompute, recorder)
+        ))
+    try:
+        await asyncio.sleep(args.warmup)
+        recorder.recording = True
+        cpu_before, start = target.cpu_seconds(), time.perf_counter()
+        await asyncio.sleep(args.duration)
+        recorder.recording = False
+        seconds, cpu_after = time.perf_counter() - start, target.cpu_seconds()
+    finally:
+        stop.set()
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*clients, *background, return_exceptions=True)
+
+    samples = recorder.samples
+    result = {'concurrency': concurrency, 'seconds': round(seconds, 3), **summarize(samples, seconds)}
+    result['server_cpu_ms_per_request'] = (
+        round((cpu_after - cpu_before) * 1000 / len(samples), 4)
+        if samples and cpu_before is not None and cpu_after is not None else None
+    )
+    result['by_scenario'] = {
+        scenario: summarize([sample for sample in samples if sample[0] == scenario], seconds)
+        for scenario in sorted(set(sample[0] for sample in samples))
+    }
+    return result
+
+
+def saturation(levels: List[Dict[str, Any]], min_gain: float) -> Optional[Dict[str, Any]]:
+    """First level whose throughput gains less than min_gain (a fraction) over the previous one"""
+    for previous, level in zip(levels, levels[1:]):
+        if level['rps'] < previous['rps'] * (1 + min_gain):
+            return {'concurrency': previous['concurrency'], 'rps': previous['rps'], 'latency': previous['latency']}
+    return None
+
+
+async def sweep(target: Target, args: argparse.Namespace, brand_ids: List[str],
+                event_ids: List[str]) -> Dict[str, Any]:
+    mix = parse_mix(args.mix)
+    await wait_ready(target)
+    print(f"seeding stored matches at {args.size}", file=sys.stderr)
+    seeded = await seed_matches(target)
+
+    levels = []
+    for concurrency in args.concurrency:
+        level = await run_level(target, concurrency, args, mix, brand_ids, event_ids)
+        latency = level['latency'] or {}
+        print(
+            f"concurrency {concurrency:>4}: {level['rps']:>9.1f} req/s  p50 {latency.get('p50_ms', 0):>8.2f} ms  "
+            f"p99 {latency.get('p99_ms', 0):>8.2f} ms  errors {level['errors']}  "
+            f"cpu/req {level['server_cpu_ms_per_request']} ms",
+            file=sys.stderr
+        )
+        levels.append(level)
+
+    return {
+        'seed_recompute': seeded['result'],
+        'levels': levels,
+        'saturation': saturation(levels, args.saturation_gain),
+    }
+
+
+async def run_inprocess(args: argparse.Namespace) -> Dict[str, Any]:
+    n_brands, n_events = parse_size(args.size)
+    fake = use_fake_backend(n_brands, n_events, args.seed, args.latency_ms)
+    import main
+
+    brand_ids = [row['id'] for row in fake.tables['brands']]
+    event_ids = [row['id'] for row in fake.tables['events']]
+    # The ASGI transport doesn't run the lifespan, so startup and shutdown are driven here
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://load-test', timeout=args.timeout) as client:
+            return await sweep(Target(client, time.process_time), args, brand_ids, event_ids)
+
+
+async def run_localhost(args: argparse.Namespace) -> Dict[str, Any]:
+    n_brands, n_events = parse_size(args.size)
+    # Same seed, so the client samples the ids the server's fake holds
+    fake = seed_catalog(n_brands, n_events, seed=args.seed)
+    brand_ids = [row['id'] for row in fake.tables['brands']]
+    event_ids = [row['id'] for row in fake.tables['events']]
+
+    server = subprocess.Popen([
+        sys.executable, '-m', 'benchmarks.load_test', 'serve', '--size', args.size,
+        '--seed', str(args.seed), '--latency-ms', str(args.latency_ms), '--port', str(args.port)
+    ])
+    try:
+        limits = httpx.Limits(max_connections=max(args.concurrency) + 2)
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{args.port}', limits=limits,
+                                     timeout=args.timeout) as client:
+            return await sweep(Target(client, lambda: process_tree_cpu_seconds(server.pid)), args,
+                               brand_ids, event_ids)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def serve(args: argparse.Namespace):
+    """Run the app under uvicorn against a seeded fake (the localhost mode's server)"""
+    import uvicorn
+
+    n_brands, n_events = parse_size(args.size)
+    use_fake_backend(n_brands, n_events, args.seed, args.latency_ms)
+    import main
+    uvicorn.run(main.app, host='127.0.0.1', port=args.port, log_level='warning', access_log=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the matching API against an in-memory Supabase")
+    parser.add_argument('command', nargs='?', default='run', choices=['run', 'serve'],
+                        help="run a load test, or serve the app for one (used by --mode localhost)")
+    parser.add_argument('--output', default='load_results.json', help="JSON file to write results to")
+    parser.add_argument('--quick', action='store_true', help="Small catalog and short levels for a smoke run")
+    parser.add_argument('--mode', choices=['inprocess', 'localhost'], default='inprocess',
+                        help="Call the app through an ASGI transport or over TCP")
+    parser.add_argument('--size', help="Catalog size as BRANDSxEVENTS")
+    parser.add_argument('--concurrency', type=int, nargs='+', help="Concurrent clients per level")
+    parser.add_argument('--duration', type=float, help="Measured seconds per level")
+    parser.add_argument('--warmup', type=float, default=1.0, help="Unmeasured seconds before each level")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Scenario weights as name:weight,...")
+    parser.add_argument('--limit', type=int, default=50, help="Matches requested per call")
+    parser.add_argument('--recompute-interval', type=float, default=0.0,
+                        help="Seconds between background recompute requests (0 disables)")
+    parser.add_argument('--full-recompute', action='store_true', help="Background recomputes are full, not incremental")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Simulated backend latency per query")
+    parser.add_argument('--saturation-gain', type=float, default=0.1,
+                        help="Throughput gain below which a level counts as saturated")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument('--port', type=int, default=8765, help="Server port in localhost mode")
+    parser.add_argument('--seed', type=int, default=0, help="Catalog and sampling seed")
+    args = parser.parse_args()
+    # The client logs every request at INFO, which would swamp the report
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    args.size = args.size or ('50x300' if args.quick else '100x1000')
+    if args.command == 'serve':
+        serve(args)
+        return
+
+    args.concurrency = args.concurrency or (QUICK_CONCURRENCY if args.quick else DEFAULT_CONCURRENCY)
+    args.duration = args.duration or (2.0 if args.quick else 10.0)
+
+    results: Dict[str, Any] = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+        },
+        'config': {
+            'mode': args.mode,
+            'catalog': dict(zip(('brands', 'events'), parse_size(args.size))),
+            'mix': parse_mix(args.mix),
+            'limit': args.limit,
+            'duration_seconds': args.duration,
+            'warmup_seconds': args.warmup,
+            'recompute_interval_seconds': args.recompute_interval,
+            'full_recompute': args.full_recompute,
+            'backend_latency_ms': args.latency_ms,
+        },
+    }
+    runner = run_localhost if args.mode == 'localhost' else run_inprocess
+    results.update(asyncio.run(runner(args)))
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import numpy as np
+from typing import List, NamedTuple, Optional, Tuple
+
+
+class BudgetColumns(NamedTuple):
+    """
+    A BudgetIndex's arrays: positions of incomplete ranges, and the complete
+    ones sorted by minimum and by maximum with the other end and position of each
+    """
+    incomplete: np.ndarray
+    mins: np.ndarray
+    maxs_by_min: np.ndarray
+    positions_by_min: np.ndarray
+    maxs: np.ndarray
+    mins_by_max: np.ndarray
+    positions_by_max: np.ndarray
+
+
+class BudgetIndex:
+    """
+    Sorted-endpoint index over budget ranges (sponsorship or brand budgets).
+
+    Complete ranges, where both ends are set and non-zero as
+    calculate_budget_alignment requires, are kept sorted by their minimum and
+    by their maximum. A range overlaps [low, high] iff min <= high and
+    max >= low, so the ranges that can't overlap are two slices found by
+    binary search: max < low and min > high. Incomplete ranges can't be ruled
+    in or out and are tracked separately. Everything is held in BudgetColumns,
+    so an index can be views over a shared catalog file.
+    """
+
+    def __init__(self, columns: BudgetColumns, size: int):
+        self.columns = columns
+        self.incomplete = columns.incomplete
+        self.size = size
+        self._mins = columns.mins
+        self._maxs_by_min = columns.maxs_by_min
+        self._positions_by_min = columns.positions_by_min
+        self._maxs = columns.maxs
+        self._mins_by_max = columns.mins_by_max
+        self._positions_by_max = columns.positions_by_max
+
+    @classmethod
+    def build(cls, ranges: List[Tuple[Optional[int], Optional[int]]]) -> 'BudgetIndex':
+        """Index over (min, max) ranges, by catalog position"""
+        complete = [p for p, (low, high) in enumerate(ranges) if low and high]
+        complete_set = set(complete)
+        incomplete = np.array([p for p in range(len(ranges)) if p not in complete_set], dtype=np.int64)
+
+        positions = np.array(complete, dtype=np.int64)
+        mins = np.array([ranges[p][0] for p in complete], dtype=np.float64)
+        maxs = np.array([ranges[p][1] for p in complete], dtype=np.float64)
+        by_min = np.argsort(mins, kind='stable')
+        by_max = np.argsort(maxs, kind='stable')
+        return cls(BudgetColumns(
+            incomplete, mins[by_min], maxs[by_min], positions[by_min], maxs[by_max], mins[by_max], positions[by_max]
+        ), len(ranges))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def disjoint(self, low: float, high: float) -> np.ndarray:
+        """Positions of complete ranges that don't overlap [low, high]"""
+        below = np.searchsorted(self._maxs, low, side='left')    # max < low
+        above = np.searchsorted(self._mins, high, side='right')  # min > high
+        # An inverted range (min > max) can fall in both slices; report it once
+        above_only = self._maxs_by_min[above:] >= low
+        return np.concatenate((self._positions_by_max[:below], self._positions_by_min[above:][above_only]))
+
+    def overlapping(self, low: float, high: float) -> np.ndarray:
+        """Positions of complete ranges that overlap [low, high], in position order"""
+        # Scan whichever candidate slice is shorter and check its other end
+        starts_before = np.searchsorted(self._mins, high, side='right')  # min <= high
+        ends_after = np.searchsorted(self._maxs, low, side='left')       # max >= low from here on
+        if starts_before <= len(self._maxs) - ends_after:
+            keep = self._maxs_by_min[:starts_before] >= low
+            positions = self._positions_by_min[:starts_before][keep]
+        else:
+            keep = self._mins_by_max[ends_after:] <= high
+            positions = self._positions_by_max[ends_after:][keep]
+        return np.sort(positions)
+
+    def candidates(self, low: float, high: float) -> np.ndarray:
+        """Positions that may fit [low, high]: overlapping ranges plus incomplete ones, in position order"""
+        return np.sort(np.concatenate((self.overlapping(low, high), self.incomplete)))
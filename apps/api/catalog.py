@@ -0,0 +1,147 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from tag_index import TagIndex
+from text_index import TextMatrix
+from budget_index import BudgetIndex
+from shared_catalog import SharedCatalogStore
+
+# Snapshots older than this are reloaded on next use
+DEFAULT_CATALOG_TTL_SECONDS = 300.0
+
+
+class CatalogParts(NamedTuple):
+    """What a loader returns: parsed entities and their indexes, and the shared file they came from if any"""
+    entities: List[Any]
+    index: TagIndex
+    text: TextMatrix
+    budgets: BudgetIndex
+    shared_version: Optional[int] = None
+    published_at: Optional[float] = None
+    identity: Optional[Tuple[int, int]] = None
+
+
+CatalogLoader = Callable[[], Awaitable[CatalogParts]]
+
+
+class CatalogSnapshot:
+    """
+    Parsed entities for one side of the catalog plus the tag, text and budget
+    indexes over them. A snapshot attached from a shared catalog file is as
+    old as the file, so every process using that file expires it together.
+    """
+
+    def __init__(self, kind: str, version: int, entities: List[Any], index: TagIndex, text: TextMatrix,
+                 budgets: BudgetIndex, shared_version: Optional[int] = None,
+                 published_at: Optional[float] = None, identity: Optional[Tuple[int, int]] = None):
+        self.kind = kind
+        self.version = version
+        self.entities = entities
+        self.index = index
+        self.text = text
+        self.budgets = budgets
+        self.shared_version = shared_version
+        self.identity = identity
+        self.loaded_at = datetime.now(timezone.utc)
+        self._loaded_monotonic = time.monotonic()
+        if published_at is not None:
+            self.loaded_at = datetime.fromtimestamp(published_at, timezone.utc)
+            self._loaded_monotonic -= max(0.0, time.time() - published_at)
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self._loaded_monotonic
+
+
+class CatalogCache:
+    """
+    In-process cache of catalog snapshots ('events', 'brands') with a TTL.
+
+    A kind is loaded through its loader on first use and again once its
+    snapshot outlives the TTL or is invalidated. Concurrent misses for the
+    same kind share a single load. Every load bumps that kind's version so
+    callers can tell snapshots apart.
+
+    With a shared store, loaders attach to catalog files other worker
+    processes may have published; a snapshot is also dropped as soon as its
+    file is replaced, so all workers serve the same catalog version.
+    """
+
+    def __init__(self, loaders: Dict[str, CatalogLoader], ttl_seconds: float = DEFAULT_CATALOG_TTL_SECONDS,
+                 shared: Optional[SharedCatalogStore] = None):
+        self.loaders = loaders
+        self.ttl_seconds = ttl_seconds
+        self.shared = shared
+        # Wall-clock time of each kind's last invalidation; shared files published before it are stale
+        self.invalidated_at = {kind: 0.0 for kind in loaders}
+        self._snapshots: Dict[str, CatalogSnapshot] = {}
+        self._locks = {kind: asyncio.Lock() for kind in loaders}
+        self._versions = {kind: 0 for kind in loaders}
+        self.hits = {kind: 0 for kind in loaders}
+        self.misses = {kind: 0 for kind in loaders}
+
+    def _fresh(self, kind: str) -> Optional[CatalogSnapshot]:
+        snapshot = self._snapshots.get(kind)
+        if snapshot is None:
+            return None
+        if snapshot.identity is not None and self.shared is not None and self.shared.replaced(kind, snapshot.identity):
+            return None
+        if snapshot.age_seconds < self.ttl_seconds:
+            return snapshot
+        return None
+
+    async def get(self, kind: str) -> CatalogSnapshot:
+        """Current snapshot for a kind, loading it if missing or expired"""
+        snapshot = self._fresh(kind)
+        if snapshot is not None:
+            self.hits[kind] += 1
+            return snapshot
+
+        async with self._locks[kind]:
+            # Another request may have loaded it while we waited
+            snapshot = self._fresh(kind)
+            if snapshot is not None:
+                self.hits[kind] += 1
+                return snapshot
+
+            self.misses[kind] += 1
+            parts = await self.loaders[kind]()
+            self._versions[kind] += 1
+            snapshot = CatalogSnapshot(kind, self._versions[kind], *parts)
+            self._snapshots[kind] = snapshot
+            return snapshot
+
+    def ever_loaded(self, kind: str) -> bool:
+        """Whether this process has loaded the kind at least once"""
+        return self._versions[kind] > 0
+
+    def invalidate(self, kind: Optional[str] = None) -> List[str]:
+        """Drop cached snapshots (one kind or all) so the next request reloads them"""
+        kinds = [kind] if kind else list(self.loaders)
+        for k in kinds:
+            if k not in self.loaders:
+                raise ValueError(f"Unknown catalog kind: {k}")
+            self._snapshots.pop(k, None)
+            self.invalidated_at[k] = time.time()
+        return kinds
+
+    def stats(self) -> Dict[str, Any]:
+        kinds = {}
+        for kind in self.loaders:
+            snapshot = self._snapshots.get(kind)
+            kinds[kind] = {
+                "hits": self.hits[kind],
+                "misses": self.misses[kind],
+                "version": snapshot.version if snapshot else None,
+                "shared_version": snapshot.shared_version if snapshot else None,
+                "size": len(snapshot.entities) if snapshot else 0,
+                "loaded_at": snapshot.loaded_at.isoformat() if snapshot else None,
+                "age_seconds": round(snapshot.age_seconds, 3) if snapshot else None,
+                "expired": snapshot is not None and snapshot.age_seconds >= self.ttl_seconds,
+            }
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "catalogs": kinds,
+            "shared": self.shared.stats() if self.shared else None,
+        }
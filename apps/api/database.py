@@ -0,0 +1,119 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from json import JSONDecodeError
+from typing import Any, Dict, Union
+import httpx
+from postgrest import APIError, APIResponse, SyncPostgrestClient
+from postgrest._sync.request_builder import SyncQueryRequestBuilder
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS, DEFAULT_POSTGREST_CLIENT_TIMEOUT
+from postgrest.types import ReturnMethod
+from postgrest.utils import SyncClient
+
+# Connections kept open to PostgREST; also the number of queries in flight at once
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+
+class SerializedQueryRequestBuilder(SyncQueryRequestBuilder):
+    """Query whose JSON body was encoded ahead of time and is sent as is"""
+
+    def execute(self) -> APIResponse:
+        response = self.session.request(
+            self.http_method,
+            self.path,
+            content=self.json,
+            params=self.params,
+            headers=self.headers,
+        )
+        if 200 <= response.status_code <= 299:
+            return APIResponse.from_http_request_response(response)
+        try:
+            raise APIError(response.json())
+        except JSONDecodeError:
+            raise APIError({'message': response.text, 'code': str(response.status_code)})
+
+
+class PooledPostgrestClient(SyncPostgrestClient):
+    """PostgREST client whose HTTP session keeps a bounded pool of keep-alive connections"""
+
+    def __init__(self, base_url: str, *, headers: Dict[str, str],
+                 timeout: Union[int, float, httpx.Timeout], limits: httpx.Limits):
+        self._limits = limits
+        super().__init__(base_url, headers=headers, timeout=timeout)
+
+    def create_session(self, base_url: str, headers: Dict[str, str],
+                       timeout: Union[int, float, httpx.Timeout]) -> SyncClient:
+        return SyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=self._limits,
+        )
+
+    def upsert_serialized(self, table_name: str, body: str, on_conflict: str = '') -> SerializedQueryRequestBuilder:
+        """Upsert of rows already encoded as a JSON array, returning nothing"""
+        query = self.from_(table_name).upsert([], on_conflict=on_conflict, returning=ReturnMethod.minimal)
+        return SerializedQueryRequestBuilder(
+            query.session, query.path, query.http_method, query.headers, query.params, body
+        )
+
+
+class Database:
+    """
+    Non-blocking access to Supabase/PostgREST for async handlers.
+
+    Queries are built with the usual table(...).select(...).eq(...) chain and
+    handed to execute(), which runs the blocking round-trip on a bounded pool
+    of worker threads so the event loop keeps serving other requests. The pool
+    size matches the HTTP connection pool, so every in-flight query has a
+    keep-alive connection available and excess queries wait their turn.
+    """
+
+    def __init__(self, client: Any, max_concurrency: int = DEFAULT_MAX_CONNECTIONS):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='db')
+
+    def table(self, table_name: str):
+        return self.client.table(table_name)
+
+    def rpc(self, function_name: str, params: Dict[str, Any]):
+        """Call to a Postgres function, executed like any other query"""
+        return self.client.rpc(function_name, params)
+
+    def upsert_serialized(self, table_name: str, body: str, on_conflict: str = ''):
+        """Upsert of rows already encoded as a JSON array (e.g. by a worker process), executed like any other query"""
+        return self.client.upsert_serialized(table_name, body, on_conflict)
+
+    async def execute(self, query):
+        """Execute a built query without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, query.execute)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        session = getattr(self.client, 'session', None)
+        if session is not None:
+            session.close()
+
+
+def create_database(supabase_url: str, supabase_key: str,
+                    max_connections: int = DEFAULT_MAX_CONNECTIONS) -> Database:
+    """Create a Database backed by a pooled PostgREST client for the Supabase project"""
+    headers = {
+        **DEFAULT_POSTGREST_CLIENT_HEADERS,
+        "apiKey": supabase_key,
+        "Authorization": f"Bearer {supabase_key}",
+    }
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+    )
+    client = PooledPostgrestClient(
+        f"{supabase_url}/rest/v1",
+        headers=headers,
+        timeout=DEFAULT_POSTGREST_CLIENT_TIMEOUT,
+        limits=limits,
+    )
+    return Database(client, max_concurrency=max_connections)
@@ -0,0 +1,69 @@
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+# Same substring lists used by MatchingEngine.calculate_demographic_match
+UNIVERSITY_TERMS = ['college', 'university', 'student']
+CATEGORY_TERMS = ['student', 'young adult', 'college']
+STUDENT_TERMS = ['student', 'college', 'university', 'young adult', '18-24', 'gen z']
+
+# Distinct (brand signature, university, category) results kept; a catalog
+# has far fewer distinct combinations than brand/event pairs
+DEMOGRAPHIC_CACHE_ENTRIES = 1 << 16
+
+
+def demographic_signature(demographics: Iterable[str]) -> Tuple[str, ...]:
+    """Hashable, lowercased form of a brand's target demographics; the brand-side memo key"""
+    return tuple(demo.lower() for demo in demographics)
+
+
+@lru_cache(maxsize=DEMOGRAPHIC_CACHE_ENTRIES)
+def targets_students(signature: Tuple[str, ...]) -> bool:
+    """Whether any target demographic names a student audience"""
+    return any(term in demo for demo in signature for term in STUDENT_TERMS)
+
+
+@lru_cache(maxsize=DEMOGRAPHIC_CACHE_ENTRIES)
+def university_match(university: str) -> bool:
+    """Whether the university name reads as a college audience"""
+    university_lower = university.lower()
+    return any(term in university_lower for term in UNIVERSITY_TERMS)
+
+
+@lru_cache(maxsize=DEMOGRAPHIC_CACHE_ENTRIES)
+def category_match(signature: Tuple[str, ...], category: str) -> bool:
+    """Whether any target demographic matches a (lowercased) org category"""
+    terms = [category] + CATEGORY_TERMS
+    return any(term in demo for demo in signature for term in terms)
+
+
+@lru_cache(maxsize=DEMOGRAPHIC_CACHE_ENTRIES)
+def demographic_match(signature: Tuple[str, ...], university: str, org_category: Optional[str]) -> float:
+    """
+    calculate_demographic_match for a brand signature and an org, memoized.
+
+    The score depends on nothing else, so each distinct combination is scanned
+    once; the terms are added in the same order as the original helper, so
+    the result is bit-for-bit the same.
+    """
+    if not signature:
+        return 0.5
+
+    score = 0.0
+    if university_match(university):
+        score += 0.3
+    if org_category and category_match(signature, org_category.lower()):
+        score += 0.4
+    if targets_students(signature):
+        score += 0.3
+    return min(1.0, score)
+
+
+def cache_stats() -> dict:
+    """Hit and miss counts of the pair-level memo"""
+    info = demographic_match.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "entries": info.currsize,
+        "max_entries": info.maxsize,
+    }
@@ -0,0 +1,92 @@
+"""
+Component score helpers that also produce the human-readable parts of a
+match's reasoning. Plain functions, so shard worker processes can build the
+rows recompute stores without a MatchingEngine.
+"""
+from typing import List, Optional, Tuple
+
+
+def budget_alignment(brand_min: Optional[int], brand_max: Optional[int],
+                     event_min: Optional[int], event_max: Optional[int]) -> Tuple[float, str]:
+    """Calculate how well brand budget aligns with event sponsorship needs"""
+    if not brand_min or not brand_max or not event_min or not event_max:
+        return 0.5, "Budget information incomplete"
+
+    # Check if there's any overlap between ranges
+    overlap_start = max(brand_min, event_min)
+    overlap_end = min(brand_max, event_max)
+
+    if overlap_start > overlap_end:
+        # No overlap
+        if brand_max < event_min:
+            return 0.1, f"Brand budget (${brand_max:,}) below event minimum (${event_min:,})"
+        else:
+            return 0.2, f"Brand budget (${brand_min:,}) above event maximum (${event_max:,})"
+
+    # Calculate alignment score based on overlap size
+    brand_range = brand_max - brand_min
+    event_range = event_max - event_min
+    overlap_size = overlap_end - overlap_start
+
+    if brand_range == 0 or event_range == 0:
+        return 0.8, "Perfect budget match"
+
+    alignment_score = min(overlap_size / brand_range, overlap_size / event_range)
+    alignment_score = max(0.3, min(1.0, alignment_score))  # Cap between 0.3 and 1.0
+
+    return alignment_score, f"Good budget alignment: ${overlap_start:,} - ${overlap_end:,}"
+
+
+def attendance_tier(expected_attendance: Optional[int],
+                    brand_preferences: List[str]) -> Tuple[float, str]:
+    """Score based on event attendance size vs brand preferences"""
+    if not expected_attendance:
+        return 0.5, "Attendance not specified"
+
+    # Simple scoring based on attendance tiers
+    if expected_attendance < 50:
+        score = 0.3
+        category = "Small intimate event"
+    elif expected_attendance < 200:
+        score = 0.7
+        category = "Medium-sized event"
+    elif expected_attendance < 500:
+        score = 0.9
+        category = "Large event"
+    else:
+        score = 1.0
+        category = "Major event"
+
+    # Adjust based on brand size preferences
+    if "startup" in brand_preferences or "small" in brand_preferences:
+        if expected_attendance < 200:
+            score += 0.2
+    elif "enterprise" in brand_preferences or "large" in brand_preferences:
+        if expected_attendance > 200:
+            score += 0.2
+
+    return min(1.0, score), category
+
+
+def describe_match(tag_score: float, matched_count: int, budget_score: float,
+                   text_score: float = 0.0) -> str:
+    """Human-readable explanation of a match from its tag, budget and text scores"""
+    explanation_parts = []
+    if tag_score > 0.6:
+        explanation_parts.append(f"Strong interest alignment ({matched_count} matching tags)")
+    elif tag_score > 0.3:
+        explanation_parts.append(f"Moderate interest alignment ({matched_count} matching tags)")
+    else:
+        explanation_parts.append("Limited interest overlap")
+
+    if text_score > 0.3:
+        explanation_parts.append("closely related descriptions")
+
+    if budget_score > 0.7:
+        explanation_parts.append("excellent budget fit")
+    elif budget_score > 0.4:
+        explanation_parts.append("good budget alignment")
+    else:
+        explanation_parts.append("budget mismatch")
+
+    return ", ".join(explanation_parts)
@@ -0,0 +1,350 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept around for status polling
+DEFAULT_JOB_HISTORY = 20
+
+# How often the worker running a job publishes its status and looks for cancel requests
+JOB_STATUS_INTERVAL_SECONDS = 1.0
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class RecomputeProgress:
+    """
+    Counters a recompute updates as it goes, read by status polling.
+
+    The engine sets pairs_total once it knows the grid size, adds each scored
+    chunk to pairs_scored and attaches its MatchWriter so rows_written is live.
+    """
+
+    def __init__(self):
+        self.stage = 'fetching'
+        self.pairs_total = 0
+        self.pairs_scored = 0
+        self.writer = None
+        self._scoring_started: Optional[float] = None
+
+    def start_scoring(self, pairs_total: int, writer: Any):
+        self.stage = 'scoring'
+        self.pairs_total = pairs_total
+        self.writer = writer
+        self._scoring_started = time.monotonic()
+
+    def add_scored(self, pairs: int):
+        self.pairs_scored += pairs
+
+    @property
+    def rows_written(self) -> int:
+        return self.writer.rows_written if self.writer else 0
+
+    @property
+    def pairs_per_second(self) -> Optional[float]:
+        if self._scoring_started is None:
+            return None
+        elapsed = time.monotonic() - self._scoring_started
+        return self.pairs_scored / elapsed if elapsed > 0 else None
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        rate = self.pairs_per_second
+        if self.stage != 'scoring' or not rate:
+            return None
+        return max(0, self.pairs_total - self.pairs_scored) / rate
+
+
+class RecomputeJob:
+    def __init__(self, incremental: bool):
+        self.id = str(uuid.uuid4())
+        self.incremental = incremental
+        self.state = QUEUED
+        self.progress = RecomputeProgress()
+        self.result: Optional[Dict[str, int]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in (SUCCEEDED, FAILED, CANCELLED)
+
+    def status(self) -> Dict[str, Any]:
+        progress = self.progress
+        rate = progress.pairs_per_second
+        eta = progress.eta_seconds
+        return {
+            "id": self.id,
+            "state": self.state,
+            "incremental": self.incremental,
+            "stage": None if self.done else progress.stage,
+            "pairs_total": progress.pairs_total,
+            "pairs_scored": progress.pairs_scored,
+            "rows_written": progress.rows_written,
+            "pairs_per_second": round(rate, 1) if rate is not None else None,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class StoredJob:
+    """A job another worker process runs or ran, as it last published its status"""
+
+    def __init__(self, status: Dict[str, Any]):
+        self._status = status
+        self.id: str = status['id']
+        self.state: str = status['state']
+        self.created_at = datetime.fromisoformat(status['created_at'])
+
+    @property
+    def done(self) -> bool:
+        return self.state in (SUCCEEDED, FAILED, CANCELLED)
+
+    def status(self) -> Dict[str, Any]:
+        return dict(self._status)
+
+
+class RecomputeInProgress(Exception):
+    """Raised when a recompute is requested while another is still running"""
+
+    def __init__(self, job: Optional[Any]):
+        if job is None:
+            super().__init__("A recompute is already running in another worker")
+        else:
+            super().__init__(f"Recompute job {job.id} is already {job.state}")
+        self.job = job
+
+
+class JobDirectory:
+    """
+    Recompute job state shared by the worker processes of a machine.
+
+    The worker running a recompute holds the directory's lock file for the
+    whole run, so another worker's start fails at once instead of running
+    the same recompute again. Each job's status is published as a JSON file
+    and refreshed every JOB_STATUS_INTERVAL_SECONDS while it runs, so any
+    worker can answer a poll. Cancelling from another worker leaves a marker
+    file that the running worker picks up on its next refresh. A job still
+    marked active while nobody holds the lock belonged to a worker that
+    exited, and reads as failed.
+    """
+
+    def __init__(self, directory: str, history: int = DEFAULT_JOB_HISTORY):
+        self.directory = directory
+        self.history = history
+        os.makedirs(directory, exist_ok=True)
+        self._lock_path = os.path.join(directory, 'recompute.lock')
+
+    def _path(self, job_id: str, suffix: str = 'json') -> str:
+        return os.path.join(self.directory, f'job-{job_id}.{suffix}')
+
+    def try_lock(self) -> Optional[int]:
+        """Take the recompute lock without waiting; the descriptor to unlock, None if another worker holds it"""
+        fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    def unlock(self, fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def locked(self) -> bool:
+        fd = self.try_lock()
+        if fd is None:
+            return True
+        self.unlock(fd)
+        return False
+
+    def publish(self, status: Dict[str, Any]):
+        path = self._path(status['id'])
+        temporary = f'{path}.tmp-{os.getpid()}'
+        with open(temporary, 'w') as f:
+            json.dump(status, f)
+        os.replace(temporary, path)
+
+    def load(self, job_id: str) -> Optional[StoredJob]:
+        try:
+            with open(self._path(job_id)) as f:
+                status = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        job = StoredJob(status)
+        if not job.done and not self.locked():
+            status.update(state=FAILED, stage=None, error="Worker exited before the recompute finished")
+            job = StoredJob(status)
+        return job
+
+    def jobs(self) -> List[StoredJob]:
+        """Every published job, newest first"""
+        jobs = []
+        for name in os.listdir(self.directory):
+            if name.startswith('job-') and name.endswith('.json'):
+                job = self.load(name[len('job-'):-len('.json')])
+                if job is not None:
+                    jobs.append(job)
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def running(self) -> Optional[StoredJob]:
+        return next((job for job in self.jobs() if not job.done), None)
+
+    def request_cancel(self, job_id: str):
+        open(self._path(job_id, 'cancel'), 'w').close()
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return os.path.exists(self._path(job_id, 'cancel'))
+
+    def prune(self):
+        """Forget finished jobs beyond the history"""
+        for job in self.jobs()[self.history:]:
+            if job.done:
+                for suffix in ('json', 'cancel'):
+                    try:
+                        os.remove(self._path(job.id, suffix))
+                    except FileNotFoundError:
+                        pass
+
+
+class RecomputeJobs:
+    """
+    Runs MatchingEngine.recompute_all_matches as background asyncio tasks.
+
+    At most one recompute runs at a time per process; starting another while
+    one is active raises RecomputeInProgress. Jobs can be polled for progress
+    and cancelled, and the most recent ones are kept for status lookups.
+
+    With a shared directory the same holds across every worker process using
+    it (see JobDirectory): one recompute per machine, and any worker can
+    report on or cancel it.
+    """
+
+    def __init__(self, engine: Any, history: int = DEFAULT_JOB_HISTORY,
+                 shared_dir: Optional[str] = None):
+        self.engine = engine
+        self.history = history
+        self.shared = JobDirectory(shared_dir, history) if shared_dir else None
+        self._jobs: 'OrderedDict[str, RecomputeJob]' = OrderedDict()
+        self._active: Optional[RecomputeJob] = None
+
+    def start(self, incremental: bool = False) -> RecomputeJob:
+        if self._active is not None and not self._active.done:
+            raise RecomputeInProgress(self._active)
+
+        lock = None
+        if self.shared is not None:
+            lock = self.shared.try_lock()
+            if lock is None:
+                raise RecomputeInProgress(self.shared.running())
+
+        job = RecomputeJob(incremental)
+        if self.shared is not None:
+            self.shared.publish(job.status())
+            self.shared.prune()
+        job.task = asyncio.create_task(self._run(job, lock))
+        job.task.add_done_callback(lambda task: self._cancelled_before_start(job, lock))
+        self._active = job
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.history:
+            oldest = next(iter(self._jobs.values()))
+            if not oldest.done:
+                break
+            self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> Optional[Any]:
+        job = self._jobs.get(job_id)
+        if job is None and self.shared is not None:
+            return self.shared.load(job_id)
+        return job
+
+    def recent(self) -> List[Any]:
+        """Known jobs, newest first"""
+        if self.shared is None:
+            return list(reversed(self._jobs.values()))
+        jobs = {job.id: job for job in self.shared.jobs()}
+        jobs.update(self._jobs)
+        return sorted(jobs.values(), key=lambda job: job.created_at, reverse=True)[:self.history]
+
+    def cancel(self, job_id: str) -> Optional[Any]:
+        """Request cancellation; the job turns cancelled once its task unwinds"""
+        job = self._jobs.get(job_id)
+        if job is None and self.shared is not None:
+            # Another worker runs it and cancels it on its next status refresh
+            job = self.shared.load(job_id)
+            if job is not None and not job.done:
+                self.shared.request_cancel(job_id)
+            return job
+        if job is not None and not job.done and job.task is not None:
+            job.task.cancel()
+        return job
+
+    async def shutdown(self):
+        """Cancel the running job, if any, and wait for it to unwind"""
+        job = self._active
+        if job is not None and not job.done and job.task is not None:
+            job.task.cancel()
+            await asyncio.gather(job.task, return_exceptions=True)
+
+    async def _run(self, job: RecomputeJob, lock: Optional[int] = None):
+        job.state = RUNNING
+        publisher = asyncio.create_task(self._publish_status(job)) if self.shared is not None else None
+        try:
+            job.result = await self.engine.recompute_all_matches(
+                incremental=job.incremental, progress=job.progress
+            )
+            job.state = SUCCEEDED
+        except asyncio.CancelledError:
+            job.state = CANCELLED
+            logger.info(f"Recompute job {job.id} cancelled")
+        except Exception as e:
+            job.state = FAILED
+            job.error = str(e)
+            logger.error(f"Recompute job {job.id} failed: {str(e)}")
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            if publisher is not None:
+                publisher.cancel()
+                try:
+                    # The final status is published before another worker may start a job
+                    self.shared.publish(job.status())
+                finally:
+                    self.shared.unlock(lock)
+
+    def _cancelled_before_start(self, job: RecomputeJob, lock: Optional[int]):
+        """A task cancelled before its first step never enters _run, so its cleanup happens here"""
+        if job.state != QUEUED:
+            return
+        job.state = CANCELLED
+        job.finished_at = datetime.now(timezone.utc)
+        if self.shared is not None:
+            try:
+                self.shared.publish(job.status())
+            finally:
+                self.shared.unlock(lock)
+
+    async def _publish_status(self, job: RecomputeJob):
+        while True:
+            self.shared.publish(job.status())
+            if self.shared.cancel_requested(job.id) and job.task is not None:
+                job.task.cancel()
+            await asyncio.sleep(JOB_STATUS_INTERVAL_SECONDS)
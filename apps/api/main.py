@@ -1,25 +1,160 @@
-from fastapi import FastAPI, HTTPException, Depends, Header
+# Started before the heavier imports below so they are part of the import phase
+from startup import StartupTimer, PREWARM_RETRY_SECONDS, PREWARM_MAX_RETRY_SECONDS
+startup_timer = StartupTimer()
+
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Callable, Tuple
+from contextlib import asynccontextmanager
+import asyncio
 import os
+import json
+import time
 from dotenv import load_dotenv
-from supabase import create_client, Client
 import logging
-from matching import MatchingEngine
-from models import MatchRequest, MatchResponse, BrandProfile, EventData
-
-load_dotenv()
+from pydantic import TypeAdapter
+from prometheus_client import REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+from database import Database, create_database, DEFAULT_MAX_CONNECTIONS
+from matching import MatchingEngine, DEFAULT_SCORING_WORKERS, DEFAULT_RECOMPUTE_CHUNK_PAIRS, DEFAULT_RECOMPUTE_WORKERS, DEFAULT_TEXT_WEIGHT, DEFAULT_RECENCY_REFRESH_INTERVAL_SECONDS
+from writer import DEFAULT_WRITE_BATCH_SIZE, DEFAULT_MAX_PENDING_BATCHES
+from catalog import DEFAULT_CATALOG_TTL_SECONDS
+from snapshot import DEFAULT_SNAPSHOT_TOP_K, DEFAULT_SNAPSHOT_REFRESH_INTERVAL_SECONDS
+from response_cache import (
+    CachedListing, DEFAULT_LISTING_CHECK_INTERVAL_SECONDS, DEFAULT_LISTING_MAX_ENTRIES, DEFAULT_LISTING_TTL_SECONDS
+)
+from metrics import phase, EngineCollector, REQUESTS_IN_FLIGHT, REQUEST_SECONDS, STARTUP_SECONDS
+from jobs import RecomputeJobs, RecomputeInProgress
+from pagination import InvalidCursor
+from weights import InvalidWeights, parse_weight_overrides
+from models import MatchRequest, MatchResponse, BatchMatchRequest, BatchMatchResponse
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Created by the lifespan, so importing this module stays cheap and free of I/O
+database: Optional[Database] = None
+matching_engine: Optional[MatchingEngine] = None
+recompute_jobs: Optional[RecomputeJobs] = None
+
+def record_startup_phase(name: str):
+    startup_timer.finish(name)
+    for phase_name, seconds in startup_timer.phases.items():
+        STARTUP_SECONDS.labels(phase_name).set(seconds)
+
+def create_engine() -> Tuple[Database, MatchingEngine]:
+    """Database client and matching engine, configured from the environment"""
+    load_dotenv()
+    supabase_url = os.getenv("SUPABASE_URL")
+    supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+    if not supabase_url or not supabase_key:
+        raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
+
+    # Pooled PostgREST access; bounds concurrent queries and keeps connections alive
+    database = create_database(
+        supabase_url,
+        supabase_key,
+        max_connections=int(os.getenv("SUPABASE_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+    )
+
+    engine = MatchingEngine(
+        database,
+        scoring_workers=int(os.getenv("SCORING_WORKERS", DEFAULT_SCORING_WORKERS)),
+        catalog_ttl_seconds=float(os.getenv("CATALOG_CACHE_TTL_SECONDS", DEFAULT_CATALOG_TTL_SECONDS)),
+        recompute_chunk_pairs=int(os.getenv("RECOMPUTE_CHUNK_PAIRS", DEFAULT_RECOMPUTE_CHUNK_PAIRS)),
+        write_batch_size=int(os.getenv("MATCH_WRITE_BATCH_SIZE", DEFAULT_WRITE_BATCH_SIZE)),
+        max_pending_batches=int(os.getenv("MATCH_WRITE_MAX_PENDING", DEFAULT_MAX_PENDING_BATCHES)),
+        recompute_workers=int(os.getenv("RECOMPUTE_WORKERS", DEFAULT_RECOMPUTE_WORKERS)),
+        listing_ttl_seconds=float(os.getenv("MATCH_CACHE_TTL_SECONDS", DEFAULT_LISTING_TTL_SECONDS)),
+        listing_max_entries=int(os.getenv("MATCH_CACHE_MAX_ENTRIES", DEFAULT_LISTING_MAX_ENTRIES)),
+        listing_check_interval_seconds=float(
+            os.getenv("MATCH_CACHE_CHECK_INTERVAL_SECONDS", DEFAULT_LISTING_CHECK_INTERVAL_SECONDS)
+        ),
+        text_weight=float(os.getenv("TEXT_SIMILARITY_WEIGHT", DEFAULT_TEXT_WEIGHT)),
+        snapshot_path=os.getenv("MATCH_SNAPSHOT_PATH"),
+        snapshot_top_k=int(os.getenv("MATCH_SNAPSHOT_TOP_K", DEFAULT_SNAPSHOT_TOP_K)),
+        shared_catalog_dir=os.getenv("CATALOG_SHARED_DIR")
+    )
+    return database, engine
+
+async def prewarm(engine: MatchingEngine):
+    """Load the catalogs and their indexes in the background, retrying until the backend answers"""
+    delay = PREWARM_RETRY_SECONDS
+    while True:
+        try:
+            await engine.prewarm()
+            break
+        except Exception as e:
+            startup_timer.error = str(e)
+            logger.error(f"Catalog prewarm failed, retrying in {delay:.0f}s: {str(e)}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, PREWARM_MAX_RETRY_SECONDS)
+    
+    record_startup_phase("prewarm")
+    startup_timer.ready = True
+    startup_timer.error = None
+    logger.info(f"Ready after {startup_timer.total_seconds:.2f}s: {startup_timer.phases}")
+
+async def refresh_recency_periodically(engine: MatchingEngine, interval_seconds: float):
+    """Refresh stored recency now and then every interval; runs with nothing to do are a single cheap query"""
+    while True:
+        try:
+            await engine.refresh_recency()
+        except Exception as e:
+            logger.error(f"Recency refresh failed: {str(e)}")
+        await asyncio.sleep(interval_seconds)
+
+async def refresh_snapshot_periodically(engine: MatchingEngine, interval_seconds: float):
+    """Rebuild the match snapshot after each recompute; checks with nothing new are a single cheap query"""
+    while True:
+        try:
+            await engine.refresh_snapshot()
+        except Exception as e:
+            logger.error(f"Match snapshot refresh failed: {str(e)}")
+        await asyncio.sleep(interval_seconds)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global database, matching_engine, recompute_jobs
+    record_startup_phase("server")
+    database, matching_engine = create_engine()
+    
+    # Catalog and cache gauges are read from the engine only when /metrics is scraped
+    collector = EngineCollector(matching_engine)
+    REGISTRY.register(collector)
+    
+    # Background recomputes; one at a time per process
+    recompute_jobs = RecomputeJobs(matching_engine, shared_dir=os.getenv("RECOMPUTE_JOBS_DIR"))
+    record_startup_phase("engine")
+    
+    # Serving starts now; /ready reports when the catalogs are warm
+    background = [asyncio.create_task(prewarm(matching_engine))]
+    
+    # Set to 0 when an external scheduler calls /api/v1/refresh-recency instead
+    recency_interval = float(os.getenv("RECENCY_REFRESH_INTERVAL_SECONDS", DEFAULT_RECENCY_REFRESH_INTERVAL_SECONDS))
+    if recency_interval > 0:
+        background.append(asyncio.create_task(refresh_recency_periodically(matching_engine, recency_interval)))
+    
+    # The snapshot is rebuilt off the recompute path; 0 stops rebuilding it
+    snapshot_interval = float(os.getenv("MATCH_SNAPSHOT_REFRESH_INTERVAL_SECONDS", DEFAULT_SNAPSHOT_REFRESH_INTERVAL_SECONDS))
+    if matching_engine.snapshots.path and snapshot_interval > 0:
+        background.append(asyncio.create_task(refresh_snapshot_periodically(matching_engine, snapshot_interval)))
+    yield
+    for task in background:
+        task.cancel()
+    await recompute_jobs.shutdown()
+    REGISTRY.unregister(collector)
+    matching_engine.close()
+    database.close()
+
 app = FastAPI(
     title="PlugCU Matching API",
     description="Matching engine for connecting brands with student organization events",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -31,14 +166,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Supabase client
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-
-if not supabase_url or not supabase_key:
-    raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
-
-supabase: Client = create_client(supabase_url, supabase_key)
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    """Count in-flight requests and time each one by its route template"""
+    REQUESTS_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        # Label by template (/api/v1/matches/{brand_id}) so ids don't explode cardinality
+        route = request.scope.get("route")
+        REQUEST_SECONDS.labels(
+            request.method, route.path if route else "unmatched", str(status)
+        ).observe(time.perf_counter() - start)
 
 # Security
 security = HTTPBearer()
@@ -52,8 +196,66 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid authentication token")
 
-# Initialize matching engine
-matching_engine = MatchingEngine(supabase)
+match_list_adapter = TypeAdapter(List[MatchResponse])
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def listing_response(listing: CachedListing, if_none_match: Optional[str]) -> Response:
+    """Serve a cached listing, or 304 Not Modified if the client already has it"""
+    # Clients must revalidate, which is cheap: a matching ETag costs no backend round-trip
+    headers = {"ETag": listing.etag, "Cache-Control": "private, no-cache"}
+    if listing.next_cursor:
+        headers["X-Next-Cursor"] = listing.next_cursor
+    if listing.matches_etag(if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(content=listing.body, media_type="application/json", headers=headers)
+
+def wants_ndjson(accept: Optional[str]) -> bool:
+    return bool(accept) and NDJSON_MEDIA_TYPE in accept
+
+async def ndjson_response(pages: AsyncIterator[List[Any]], dump: Callable[[Any], bytes]) -> Response:
+    """
+    Stream pages of rows as newline-delimited JSON, one page per write
+    
+    The first page is awaited here, so lookup errors (unknown id, bad cursor)
+    still get a proper status code. A later failure writes a final
+    {"error": ...} line and then aborts the connection, so the stream never
+    looks complete.
+    """
+    try:
+        first = await pages.__anext__()
+    except StopAsyncIteration:
+        first = []
+    
+    async def body():
+        try:
+            if first:
+                yield b"".join(dump(row) + b"\n" for row in first)
+            async for page in pages:
+                yield b"".join(dump(row) + b"\n" for row in page)
+        except Exception as e:
+            logger.error(f"Error streaming response: {str(e)}")
+            yield dump_row({"error": f"Stream failed: {str(e)}"}) + b"\n"
+            # Re-raised so the server drops the connection instead of ending the body cleanly
+            raise
+    
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
+
+async def single_page(rows: List[Any]) -> AsyncIterator[List[Any]]:
+    yield rows
+
+def listing_weights(weight_profile: Optional[str], weights: Optional[str]):
+    """Resolved weights from listing query parameters, 400 if they're invalid"""
+    try:
+        return matching_engine.weights_for(weight_profile, parse_weight_overrides(weights))
+    except InvalidWeights as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def dump_row(row: Dict[str, Any]) -> bytes:
+    return json.dumps(row, separators=(",", ":")).encode()
+
+def dump_match(match: MatchResponse) -> bytes:
+    return match.model_dump_json().encode()
 
 @app.get("/")
 async def root():
@@ -61,56 +263,309 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    """Liveness: the process is up, whether or not its catalogs are loaded yet"""
     return {"status": "healthy", "service": "matching-api"}
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness: 200 once the catalogs are warm, or while they load if a match
+    snapshot is mapped to answer compute-matches from; 503 otherwise
+    """
+    status = startup_timer.status()
+    ready = startup_timer.ready
+    if not ready and matching_engine is not None and matching_engine.snapshots.get() is not None:
+        ready = True
+        status["status"] = "snapshot"
+    return JSONResponse(status_code=200 if ready else 503, content=status)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for this process"""
+    return Response(content=generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
 @app.post("/api/v1/compute-matches", response_model=List[MatchResponse])
 async def compute_matches(
     request: MatchRequest,
+    accept: Optional[str] = Header(None),
     token: str = Depends(verify_token)
 ):
     """
     Compute matches for a specific event or brand
+    
+    With Accept: application/x-ndjson, matches are streamed one per line as
+    soon as their rank is settled; a null limit then streams the full ranking.
+    A cold process answers from the recompute snapshot until its catalog is loaded.
+    
+    weight_profile (see /api/v1/weight-profiles) and weights rank by other
+    component weights; these re-weight cached component scores rather than
+    going through the default ranking, and are never served from the snapshot.
     """
     try:
+        weights = matching_engine.weights_for(
+            request.weight_profile, request.weights.model_dump() if request.weights else None
+        )
+    except InvalidWeights as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        if weights is not None:
+            matches = await matching_engine.compute_weighted_matches(
+                weights,
+                event_id=request.event_id,
+                brand_id=request.brand_id,
+                limit=request.limit if wants_ndjson(accept) else request.limit or 50,
+                budget_overlap_only=request.budget_overlap_only
+            )
+            if wants_ndjson(accept):
+                return await ndjson_response(single_page(matches), dump_match)
+            with phase("compute_event" if request.event_id else "compute_brand", "serialize"):
+                body = match_list_adapter.dump_json(matches)
+            return Response(content=body, media_type="application/json")
+        
+        if not request.budget_overlap_only and not wants_ndjson(accept):
+            body = matching_engine.snapshot_matches(
+                event_id=request.event_id,
+                brand_id=request.brand_id,
+                limit=request.limit or 50
+            )
+            if body is not None:
+                return Response(content=body, media_type="application/json")
+        
+        if wants_ndjson(accept):
+            return await ndjson_response(
+                matching_engine.stream_matches(
+                    event_id=request.event_id,
+                    brand_id=request.brand_id,
+                    limit=request.limit,
+                    budget_overlap_only=request.budget_overlap_only
+                ),
+                dump_match
+            )
+        
         matches = await matching_engine.compute_matches(
             event_id=request.event_id,
             brand_id=request.brand_id,
-            limit=request.limit or 50
+            limit=request.limit or 50,
+            budget_overlap_only=request.budget_overlap_only
         )
-        return matches
+        with phase("compute_event" if request.event_id else "compute_brand", "serialize"):
+            body = match_list_adapter.dump_json(matches)
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         logger.error(f"Error computing matches: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to compute matches: {str(e)}")
 
-@app.post("/api/v1/recompute-all-matches")
-async def recompute_all_matches(token: str = Depends(verify_token)):
+@app.post("/api/v1/compute-matches/batch", response_model=BatchMatchResponse)
+async def compute_matches_batch(
+    request: BatchMatchRequest,
+    token: str = Depends(verify_token)
+):
     """
-    Recompute all matches in the system (admin only)
+    Compute matches for many brands and/or events at once
+    
+    The opposite catalog is loaded once for the whole batch, so this is much
+    cheaper than one compute-matches call per id (e.g. for digest emails).
     """
     try:
-        result = await matching_engine.recompute_all_matches()
-        return {"message": "All matches recomputed successfully", "count": result}
+        result = await matching_engine.compute_matches_batch(
+            brand_ids=request.brand_ids,
+            event_ids=request.event_ids,
+            limit=request.limit or 50
+        )
+        with phase("compute_batch", "serialize"):
+            body = result.model_dump_json()
+        return Response(content=body, media_type="application/json")
     except Exception as e:
-        logger.error(f"Error recomputing all matches: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to recompute matches: {str(e)}")
+        logger.error(f"Error computing batch matches: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to compute batch matches: {str(e)}")
+
+@app.get("/api/v1/similar-events/{brand_id}")
+async def get_similar_events(
+    brand_id: str,
+    limit: Optional[int] = 10,
+    token: str = Depends(verify_token)
+):
+    """
+    Published events whose descriptions read most like the brand's
+    """
+    try:
+        events = await matching_engine.similar_events(brand_id, limit or 10)
+        return {"brand_id": brand_id, "events": events}
+    except Exception as e:
+        logger.error(f"Error finding similar events: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to find similar events: {str(e)}")
+
+@app.post("/api/v1/recompute-all-matches", status_code=202)
+async def recompute_all_matches(
+    incremental: bool = False,
+    token: str = Depends(verify_token)
+):
+    """
+    Start recomputing all matches in the background (admin only)
+    
+    With incremental=true only pairs whose brand, event or org changed since
+    the last run are rescored. Returns the job to poll; if a recompute is
+    already running, responds 409 with that job instead of starting another.
+    """
+    try:
+        job = recompute_jobs.start(incremental=incremental)
+        return {
+            "message": "Recompute started",
+            "job": job.status()
+        }
+    except RecomputeInProgress as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "A recompute is already running", "job": e.job.status() if e.job else None}
+        )
+    except Exception as e:
+        logger.error(f"Error starting recompute: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to start recompute: {str(e)}")
+
+@app.post("/api/v1/refresh-recency")
+async def refresh_recency(token: str = Depends(verify_token)):
+    """
+    Update the recency component and score of stored matches (admin only)
+    
+    Only events that crossed a recency step (30/90/180 days, past) since the
+    last refresh are touched, so this is meant to be run daily from a scheduler.
+    """
+    try:
+        return await matching_engine.refresh_recency()
+    except Exception as e:
+        logger.error(f"Error refreshing recency: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to refresh recency: {str(e)}")
+
+@app.get("/api/v1/weight-profiles")
+async def get_weight_profiles(token: str = Depends(verify_token)):
+    """
+    Named weightings of the score components
+    
+    Pass a name as weight_profile to compute-matches or the listings. Weights
+    are relative: a profile with overridden components is rescaled to sum to 1.
+    """
+    return {"profiles": matching_engine.weight_profiles()}
+
+@app.get("/api/v1/recompute-jobs")
+async def list_recompute_jobs(token: str = Depends(verify_token)):
+    """Recent recompute jobs, newest first (admin only)"""
+    return {"jobs": [job.status() for job in recompute_jobs.recent()]}
+
+@app.get("/api/v1/recompute-jobs/{job_id}")
+async def get_recompute_job(job_id: str, token: str = Depends(verify_token)):
+    """Progress and outcome of a recompute job (admin only)"""
+    job = recompute_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Recompute job not found")
+    return job.status()
+
+@app.post("/api/v1/recompute-jobs/{job_id}/cancel")
+async def cancel_recompute_job(job_id: str, token: str = Depends(verify_token)):
+    """
+    Cancel a running recompute job (admin only)
+    
+    Rows already written stay; the watermark is not advanced, so the next
+    incremental run rescores everything the cancelled one would have.
+    """
+    job = recompute_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Recompute job not found")
+    return job.status()
+
+@app.get("/api/v1/admin/catalog-cache")
+async def get_catalog_cache_stats(token: str = Depends(verify_token)):
+    """
+    Catalog cache hit/miss counts, versions and snapshot ages (admin only)
+    """
+    return matching_engine.catalog.stats()
+
+@app.post("/api/v1/admin/catalog-cache/invalidate")
+async def invalidate_catalog_cache(
+    kind: Optional[str] = None,
+    token: str = Depends(verify_token)
+):
+    """
+    Drop cached catalog snapshots so the next request refetches them (admin only)
+    
+    kind may be "events" or "brands"; omit it to invalidate both.
+    """
+    try:
+        invalidated = matching_engine.catalog.invalidate(kind)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "Catalog cache invalidated", "invalidated": invalidated}
+
+@app.get("/api/v1/admin/match-snapshot")
+async def get_match_snapshot_stats(token: str = Depends(verify_token)):
+    """
+    Mapped recompute snapshot version, age and lookups (admin only)
+    """
+    matching_engine.snapshots.get()
+    return matching_engine.snapshots.stats()
+
+@app.get("/api/v1/admin/match-cache")
+async def get_match_cache_stats(token: str = Depends(verify_token)):
+    """
+    Stored-listing cache hit ratio, size and generation (admin only)
+    """
+    return matching_engine.listings.stats()
+
+@app.post("/api/v1/admin/match-cache/invalidate")
+async def invalidate_match_cache(token: str = Depends(verify_token)):
+    """
+    Drop cached match listings in every worker, e.g. after editing matches outside recompute (admin only)
+    """
+    await matching_engine.invalidate_listings()
+    return {"message": "Match cache invalidated", "generation": matching_engine.listings.generation}
 
 @app.get("/api/v1/matches/{brand_id}")
 async def get_brand_matches(
     brand_id: str,
-    limit: Optional[int] = 50,
+    limit: Optional[int] = None,
     min_score: Optional[float] = 0.1,
+    cursor: Optional[str] = None,
+    weight_profile: Optional[str] = None,
+    weights: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
     token: str = Depends(verify_token)
 ):
     """
     Get all matches for a specific brand
+    
+    Pages of `limit` (default 50) best first; when there may be more, the
+    X-Next-Cursor header holds the cursor for the next page. Served from the
+    listing cache with an ETag; send it back in If-None-Match to get 304 Not
+    Modified while the matches are unchanged.
+    
+    With Accept: application/x-ndjson, every match (or the first `limit`) is
+    streamed one per line instead, read from the database page by page.
+    
+    weight_profile and weights (e.g. `budget:0.5,tag:0.2`) re-rank the stored
+    matches by their stored component scores.
     """
+    score_weights = listing_weights(weight_profile, weights)
     try:
-        matches = await matching_engine.get_brand_matches(
-            brand_id=brand_id,
-            limit=limit,
-            min_score=min_score
+        if wants_ndjson(accept):
+            return await ndjson_response(
+                matching_engine.iter_match_listing(
+                    'brand', brand_id, min_score, limit=limit, cursor=cursor, weights=score_weights
+                ),
+                dump_row
+            )
+        
+        listing = await matching_engine.get_match_listing(
+            'brand',
+            brand_id,
+            limit=limit or 50,
+            min_score=min_score,
+            cursor=cursor,
+            weights=score_weights
         )
-        return matches
+        return listing_response(listing, if_none_match)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting brand matches: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get matches: {str(e)}")
@@ -118,24 +573,47 @@ async def get_brand_matches(
 @app.get("/api/v1/event-matches/{event_id}")
 async def get_event_matches(
     event_id: str,
-    limit: Optional[int] = 50,
+    limit: Optional[int] = None,
     min_score: Optional[float] = 0.1,
+    cursor: Optional[str] = None,
+    weight_profile: Optional[str] = None,
+    weights: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
     token: str = Depends(verify_token)
 ):
     """
     Get all matches for a specific event
+    
+    Paged, cached, conditional and streamable like the brand listing.
     """
+    score_weights = listing_weights(weight_profile, weights)
     try:
-        matches = await matching_engine.get_event_matches(
-            event_id=event_id,
-            limit=limit,
-            min_score=min_score
+        if wants_ndjson(accept):
+            return await ndjson_response(
+                matching_engine.iter_match_listing(
+                    'event', event_id, min_score, limit=limit, cursor=cursor, weights=score_weights
+                ),
+                dump_row
+            )
+        
+        listing = await matching_engine.get_match_listing(
+            'event',
+            event_id,
+            limit=limit or 50,
+            min_score=min_score,
+            cursor=cursor,
+            weights=score_weights
         )
-        return matches
+        return listing_response(listing, if_none_match)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting event matches: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get matches: {str(e)}")
 
+record_startup_phase("import")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,160 @@
+import json
+import numpy as np
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from explanations import attendance_tier, budget_alignment, describe_match
+from records import BrandRecord, EventRecord
+from scoring import ScoredPairs
+from vocabulary import TagVocabulary
+
+# One stored match row as json.dumps writes it. Tag, budget, attendance,
+# recency and demographic scores take a handful of values each, so their
+# reasoning and column parts are formatted once per combination
+ROW_JSON = (
+    '{"brand_id": %s, "event_id": %s, "score": %s, "reasoning": {%s"text_similarity_score": %s, '
+    '"explanation": %s, "matched_tags": %s, "budget_fit": %s, "attendance_category": %s}, %s"text_score": %s}'
+)
+REASONING_COMPONENTS_JSON = (
+    '"tag_overlap_score": %s, "budget_alignment_score": %s, "attendance_score": %s, '
+    '"recency_score": %s, "demographic_match_score": %s, '
+)
+COLUMN_COMPONENTS_JSON = (
+    '"tag_score": %s, "budget_score": %s, "attendance_score": %s, "recency_score": %s, "demographic_score": %s, '
+)
+
+
+class SerializedBatch(NamedTuple):
+    """An upsert batch of match rows already encoded as a JSON array, and how many rows it holds"""
+    body: str
+    rows: int
+
+
+def float_strings(values: np.ndarray) -> Tuple[List[str], np.ndarray]:
+    """repr() of each distinct value, as json.dumps writes floats, and each value's index into them"""
+    distinct, inverse = np.unique(values, return_inverse=True)
+    return [repr(value) for value in distinct.tolist()], inverse
+
+
+class MatchRowBuilder:
+    """
+    Builds the rows recompute stores from a chunk's ScoredPairs.
+
+    Keeps only what rows are made of: the ids, tag masks, budget bounds and
+    attendance of each brand and event, plus the tag vocabulary. That pickles
+    small enough to hand to every shard worker once, so workers can return
+    finished rows instead of positions the parent has to turn into rows.
+
+    Rows come out already encoded as upsert batches: building a dict per pair
+    and encoding it cost several times more than scoring the pair.
+    """
+
+    def __init__(self, brands: List[BrandRecord], events: List[EventRecord], vocabulary: TagVocabulary):
+        self.brand_ids = [brand.id for brand in brands]
+        self.brand_masks = [brand.tag_mask for brand in brands]
+        self.brand_budgets = [(brand.budget_range_min, brand.budget_range_max) for brand in brands]
+        self.event_ids = [event.id for event in events]
+        self.event_masks = [event.tag_mask for event in events]
+        self.event_budgets = [(event.sponsorship_min_amount, event.sponsorship_max_amount) for event in events]
+        self.event_attendance = [event.expected_attendance for event in events]
+        self.vocabulary = vocabulary
+        # JSON-encoded ids, made by the first serialized() call
+        self.brand_ids_json: Optional[List[str]] = None
+        self.event_ids_json: Optional[List[str]] = None
+
+    def below_threshold(self, pairs: ScoredPairs) -> List[Tuple[str, str]]:
+        """(brand_id, event_id) of a chunk's pairs below threshold"""
+        return [
+            (self.brand_ids[i], self.event_ids[j])
+            for i, j in zip(pairs.below_brand_positions.tolist(), pairs.below_event_positions.tolist())
+        ]
+
+    def serialized(self, pairs: ScoredPairs, batch_size: int) -> List[SerializedBatch]:
+        """
+        Rows to store for a chunk's pairs at or above threshold, in upsert
+        batches of batch_size, each encoded as the JSON array PostgREST
+        expects. A row holds explain_match(...).dict() for its pair plus the
+        components as columns, and each batch is byte for byte json.dumps of
+        those rows.
+
+        Scores are read straight off the pairs' columns. The reasoning strings
+        only depend on tag intersections, budget bounds, attendance and which
+        side of the explanation thresholds each score falls, so each distinct
+        value is built and encoded once per chunk and reused for every pair
+        that shares it.
+        """
+        if self.brand_ids_json is None:
+            self.brand_ids_json = [json.dumps(brand_id) for brand_id in self.brand_ids]
+            self.event_ids_json = [json.dumps(event_id) for event_id in self.event_ids]
+
+        # Which branch of describe_match each score takes
+        tag_level = ((pairs.tag > 0.6).astype(np.int8) + (pairs.tag > 0.3)).tolist()
+        budget_level = ((pairs.budget > 0.7).astype(np.int8) + (pairs.budget > 0.4)).tolist()
+        related = (pairs.text > 0.3).tolist()
+        tag, budget, text = pairs.tag.tolist(), pairs.budget.tolist(), pairs.text.tolist()
+
+        final_strings, final_index = float_strings(pairs.final)
+        text_strings, text_index = float_strings(pairs.text)
+        final_json = [final_strings[k] for k in final_index.tolist()]
+        text_json = [text_strings[k] for k in text_index.tolist()]
+
+        # One code per combination of the five low-cardinality components
+        component_strings = []
+        component_code = np.zeros(len(pairs.final), dtype=np.int64)
+        for values in (pairs.tag, pairs.budget, pairs.attendance, pairs.recency, pairs.demographic):
+            strings, index = float_strings(values)
+            component_strings.append(strings)
+            component_code = component_code * len(strings) + index
+        reasoning_components: Dict[int, str] = {}
+        column_components: Dict[int, str] = {}
+
+        matched_tags: Dict[int, Tuple[str, int]] = {}
+        budget_fits: Dict[Tuple, str] = {}
+        explanations: Dict[Tuple, str] = {}
+        attendance_categories: Dict[int, str] = {}
+
+        rows = []
+        positions = zip(pairs.brand_positions.tolist(), pairs.event_positions.tolist(), component_code.tolist())
+        for k, (i, j, code) in enumerate(positions):
+            shared = self.brand_masks[i] & self.event_masks[j]
+            tags = matched_tags.get(shared)
+            if tags is None:
+                decoded = self.vocabulary.decode(shared)
+                tags = matched_tags[shared] = (json.dumps(decoded), len(decoded))
+
+            bounds = self.brand_budgets[i] + self.event_budgets[j]
+            budget_fit = budget_fits.get(bounds)
+            if budget_fit is None:
+                budget_fit = budget_fits[bounds] = json.dumps(budget_alignment(*bounds)[1])
+
+            key = (tag_level[k], budget_level[k], related[k], tags[1])
+            explanation = explanations.get(key)
+            if explanation is None:
+                explanation = explanations[key] = json.dumps(describe_match(tag[k], tags[1], budget[k], text[k]))
+
+            attendance_category = attendance_categories.get(j)
+            if attendance_category is None:
+                attendance_category = attendance_categories[j] = json.dumps(
+                    attendance_tier(self.event_attendance[j], [])[1]
+                )
+
+            components = reasoning_components.get(code)
+            if components is None:
+                values = self._component_values(code, component_strings)
+                components = reasoning_components[code] = REASONING_COMPONENTS_JSON % values
+                column_components[code] = COLUMN_COMPONENTS_JSON % values
+
+            rows.append(ROW_JSON % (
+                self.brand_ids_json[i], self.event_ids_json[j], final_json[k], components, text_json[k],
+                explanation, tags[0], budget_fit, attendance_category, column_components[code], text_json[k]
+            ))
+
+        batches = (rows[start:start + batch_size] for start in range(0, len(rows), batch_size))
+        return [SerializedBatch('[' + ', '.join(batch) + ']', len(batch)) for batch in batches]
+
+    @staticmethod
+    def _component_values(code: int, component_strings: List[List[str]]) -> Tuple[str, ...]:
+        """Formatted tag, budget, attendance, recency and demographic scores of a combination code"""
+        values = []
+        for strings in reversed(component_strings):
+            code, index = divmod(code, len(strings))
+            values.append(strings[index])
+        return tuple(reversed(values))
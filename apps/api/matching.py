@@ -1,14 +1,184 @@
+import asyncio
+import heapq
+import itertools
+import json
 import logging
-from typing import List, Optional, Dict, Any, Tuple
-from datetime import datetime, timedelta
-from supabase import Client
-from models import MatchResponse, MatchReasoning, BrandProfile, EventData
+import time
+import numpy as np
+from typing import List, Optional, Dict, Any, Tuple, Type, Callable, Awaitable, Iterator, AsyncIterator, NamedTuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from database import Database
+from models import MatchResponse, MatchReasoning, BatchMatchResponse, BrandProfile, EventData
+from scoring import VectorizedScorer, ScoreBlock, DEFAULT_TAG_WEIGHT
+from demographics import demographic_match, demographic_signature, targets_students
+from explanations import attendance_tier, budget_alignment, describe_match
+from tag_index import TagIndex
+from text_index import TextCorpus, TextMatrix, TextModel, similarity_drift, text_similarity
+from budget_index import BudgetIndex
+from vocabulary import TagVocabulary, jaccard
+from records import BrandRecord, EventRecord, BRAND_RECORD_COLUMNS, EVENT_RECORD_COLUMNS, brand_document, event_document
+from catalog import CatalogCache, CatalogParts, CatalogSnapshot, DEFAULT_CATALOG_TTL_SECONDS
+from shared_catalog import MappedCatalog, RecordColumns, SharedCatalogStore
+from match_rows import MatchRowBuilder
+from writer import MatchWriter, DEFAULT_WRITE_BATCH_SIZE, DEFAULT_MAX_PENDING_BATCHES
+from parallel import ShardPool, ShardRows, process_context, score_shard
+from jobs import RecomputeProgress
+from metrics import phase, PAIRS_SCORED, RECOMPUTE_PAIRS_PER_SECOND
+from response_cache import (
+    CachedListing, ListingCache, DEFAULT_LISTING_CHECK_INTERVAL_SECONDS, DEFAULT_LISTING_MAX_ENTRIES,
+    DEFAULT_LISTING_TTL_SECONDS
+)
+from pagination import Keyset, decode_cursor, next_cursor, row_keyset, rows_after, DEFAULT_LISTING_PAGE_SIZE
+from snapshot import SnapshotSide, SnapshotStore, write_snapshot, DEFAULT_SNAPSHOT_TOP_K, SNAPSHOT_PAIRS_PER_BLOCK
+from weights import ComponentCache, ScoreWeights, WEIGHT_PROFILES, COMPONENT_COLUMNS, resolve_weights, stored_components, top_weighted
 
 logger = logging.getLogger(__name__)
 
+EVENT_COLUMNS = (
+    'id, title, description, event_date, expected_attendance, event_type, '
+    'sponsorship_min_amount, sponsorship_max_amount, sponsorship_benefits, tags, '
+    'orgs(name, university, category)'
+)
+
+# Recompute also needs eligibility and change tracking columns
+RECOMPUTE_EVENT_COLUMNS = (
+    'id, title, description, event_date, expected_attendance, event_type, '
+    'sponsorship_min_amount, sponsorship_max_amount, sponsorship_benefits, tags, '
+    'status, updated_at, orgs(name, university, category, updated_at)'
+)
+
+# Stored match listings, with what dashboards show about the other side
+BRAND_LISTING_COLUMNS = 'id, score, reasoning, events(title, event_date, orgs(name, university))'
+EVENT_LISTING_COLUMNS = 'id, score, reasoning, brands(company_name, industry)'
+
+# Row of match_recompute_state holding the incremental recompute watermark
+RECOMPUTE_STATE_ID = 'matches'
+
+# Row of match_recompute_state holding the time of the last recency refresh
+RECENCY_STATE_ID = 'recency'
+
+# Row of match_recompute_state holding the time listings were last invalidated,
+# so every process drops its cached listings (see listing_source)
+LISTINGS_STATE_ID = 'listings'
+
+# Weight of the recency component in the final score (see score_components)
+RECENCY_WEIGHT = 0.05
+
+# Events per refresh_match_recency call
+RECENCY_REFRESH_BATCH_SIZE = 500
+
+# Recency steps are whole days, so a daily refresh keeps stored scores current
+DEFAULT_RECENCY_REFRESH_INTERVAL_SECONDS = 86400.0
+
+# Max ids per delete filter, keeps PostgREST URLs short
+PRUNE_BATCH_SIZE = 200
+
+# Max ids per in() filter when fetching batch-requested rows
+FETCH_BATCH_SIZE = 200
+
+# Threads available for CPU-bound scoring passes
+DEFAULT_SCORING_WORKERS = 2
+
+# Pairs scored per recompute chunk; with the writer's pending batches this
+# bounds how many match rows a recompute holds in memory at once
+DEFAULT_RECOMPUTE_CHUNK_PAIRS = 50_000
+
+# Processes used to score recompute shards; 1 scores in-process
+DEFAULT_RECOMPUTE_WORKERS = 1
+
+# Every component score is capped at 1.0
+COMPONENT_MAX = 1.0
+
+# Budget ranges that don't overlap score at most 0.2, so their pairs' bounds
+# can drop by the budget weight times the rest of the component's range
+BUDGET_DISJOINT_SLACK = 0.25 * (COMPONENT_MAX - 0.2)
+
+# Slack for float rounding when comparing a score bound against real scores
+BOUND_EPSILON = 1e-9
+
+# Matches built per scoring-pool hop when streaming a ranking
+STREAM_CHUNK_MATCHES = 500
+
+# Share of the interest weight (tag overlap plus text similarity) given to
+# description similarity. 0 scores exactly as before descriptions counted;
+# any other value changes every score, so enable it with a full recompute
+DEFAULT_TEXT_WEIGHT = 0.0
+
+# Largest change in text similarity (0-1, before weighting) an incremental
+# recompute leaves in stored scores when event corpus IDF drifts; brands whose
+# similarities moved further are rescored
+TEXT_DRIFT_TOLERANCE = 0.01
+
+class Ranking(NamedTuple):
+    """A single-entity query's candidates in decreasing score-bound order, and how to score and build them"""
+    candidates: Iterator[Tuple[float, int]]
+    score_fn: Callable[[int], Tuple[float, ...]]
+    build_fn: Callable[[int, Tuple[float, ...]], MatchResponse]
+    operation: str
+
+
 class MatchingEngine:
-    def __init__(self, supabase_client: Client):
-        self.supabase = supabase_client
+    def __init__(self, db: Database, scoring_workers: int = DEFAULT_SCORING_WORKERS,
+                 catalog_ttl_seconds: float = DEFAULT_CATALOG_TTL_SECONDS,
+                 recompute_chunk_pairs: int = DEFAULT_RECOMPUTE_CHUNK_PAIRS,
+                 write_batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+                 max_pending_batches: int = DEFAULT_MAX_PENDING_BATCHES,
+                 recompute_workers: int = DEFAULT_RECOMPUTE_WORKERS,
+                 listing_ttl_seconds: float = DEFAULT_LISTING_TTL_SECONDS,
+                 listing_max_entries: int = DEFAULT_LISTING_MAX_ENTRIES,
+                 listing_check_interval_seconds: float = DEFAULT_LISTING_CHECK_INTERVAL_SECONDS,
+                 text_weight: float = DEFAULT_TEXT_WEIGHT,
+                 snapshot_path: Optional[str] = None,
+                 snapshot_top_k: int = DEFAULT_SNAPSHOT_TOP_K,
+                 shared_catalog_dir: Optional[str] = None):
+        if not 0.0 <= text_weight <= DEFAULT_TAG_WEIGHT:
+            raise ValueError(f"text_weight must be between 0 and {DEFAULT_TAG_WEIGHT}")
+        self.db = db
+        self.text_weight = text_weight
+        self.tag_weight = round(DEFAULT_TAG_WEIGHT - text_weight, 6)
+        # The weighting compute_match_score uses; requests may ask for another
+        self.default_weights = ScoreWeights(
+            tag=self.tag_weight, budget=0.25, attendance=0.15, recency=RECENCY_WEIGHT,
+            demographic=0.20, text=self.text_weight
+        )
+        self.recompute_chunk_pairs = recompute_chunk_pairs
+        self.recompute_workers = recompute_workers
+        if recompute_workers > 1 and process_context() is None:
+            logger.warning("Parallel recompute needs the forkserver or spawn start method; scoring recompute in-process")
+            self.recompute_workers = 1
+        self.write_batch_size = write_batch_size
+        self.max_pending_batches = max_pending_batches
+        # Scoring runs off the event loop so cheap requests aren't stuck behind it
+        self._scoring_executor = ThreadPoolExecutor(max_workers=scoring_workers, thread_name_prefix='scoring')
+        # Tag ids shared by every catalog load, so tag bitsets are comparable across snapshots
+        self.tag_vocabulary = TagVocabulary()
+        # Event descriptions, re-tokenized only when an event's text changes
+        self.text_corpus = TextCorpus()
+        self.text_model: Optional[TextModel] = None
+        # Catalog files published once per machine and mapped by every worker process
+        self.shared_catalogs = SharedCatalogStore(shared_catalog_dir) if shared_catalog_dir else None
+        # Published events and verified brands, shared across compute requests
+        self.catalog = CatalogCache(
+            {'events': self._load_event_catalog, 'brands': self._load_brand_catalog},
+            ttl_seconds=catalog_ttl_seconds,
+            shared=self.shared_catalogs
+        )
+        # Stored match listings served to dashboards; dropped whenever recompute writes
+        self.listings = ListingCache(
+            listing_ttl_seconds, listing_max_entries, self.listing_source, listing_check_interval_seconds
+        )
+        # Top matches written by recompute, mapped so a cold process can answer at once
+        self.snapshots = SnapshotStore(snapshot_path, snapshot_top_k)
+        self.snapshots.reload()
+        # Component scores of recently re-weighted entities against the catalog
+        self.components = ComponentCache()
+        self._warming: Dict[str, asyncio.Task] = {}
+    
+    def close(self):
+        for task in self._warming.values():
+            task.cancel()
+        self._scoring_executor.shutdown(wait=False)
     
     def calculate_tag_overlap(self, brand_tags: List[str], event_tags: List[str]) -> Tuple[float, List[str]]:
         """Calculate overlap between brand preferences and event tags"""
@@ -31,70 +201,25 @@ class MatchingEngine:
     
     def calculate_budget_alignment(self, brand_min: Optional[int], brand_max: Optional[int], 
                                  event_min: Optional[int], event_max: Optional[int]) -> Tuple[float, str]:
-        """Calculate how well brand budget aligns with event sponsorship needs"""
-        if not brand_min or not brand_max or not event_min or not event_max:
-            return 0.5, "Budget information incomplete"
-        
-        # Check if there's any overlap between ranges
-        overlap_start = max(brand_min, event_min)
-        overlap_end = min(brand_max, event_max)
-        
-        if overlap_start > overlap_end:
-            # No overlap
-            if brand_max < event_min:
-                return 0.1, f"Brand budget (${brand_max:,}) below event minimum (${event_min:,})"
-            else:
-                return 0.2, f"Brand budget (${brand_min:,}) above event maximum (${event_max:,})"
-        
-        # Calculate alignment score based on overlap size
-        brand_range = brand_max - brand_min
-        event_range = event_max - event_min
-        overlap_size = overlap_end - overlap_start
-        
-        if brand_range == 0 or event_range == 0:
-            return 0.8, "Perfect budget match"
-        
-        alignment_score = min(overlap_size / brand_range, overlap_size / event_range)
-        alignment_score = max(0.3, min(1.0, alignment_score))  # Cap between 0.3 and 1.0
-        
-        return alignment_score, f"Good budget alignment: ${overlap_start:,} - ${overlap_end:,}"
+        """Calculate how well brand budget aligns with event sponsorship needs; see explanations.budget_alignment"""
+        return budget_alignment(brand_min, brand_max, event_min, event_max)
     
     def calculate_attendance_score(self, expected_attendance: Optional[int], 
                                  brand_preferences: List[str]) -> Tuple[float, str]:
-        """Score based on event attendance size vs brand preferences"""
-        if not expected_attendance:
-            return 0.5, "Attendance not specified"
-        
-        # Simple scoring based on attendance tiers
-        if expected_attendance < 50:
-            score = 0.3
-            category = "Small intimate event"
-        elif expected_attendance < 200:
-            score = 0.7
-            category = "Medium-sized event"
-        elif expected_attendance < 500:
-            score = 0.9
-            category = "Large event"
-        else:
-            score = 1.0
-            category = "Major event"
-        
-        # Adjust based on brand size preferences
-        if "startup" in brand_preferences or "small" in brand_preferences:
-            if expected_attendance < 200:
-                score += 0.2
-        elif "enterprise" in brand_preferences or "large" in brand_preferences:
-            if expected_attendance > 200:
-                score += 0.2
-        
-        return min(1.0, score), category
+        """Score based on event attendance size vs brand preferences; see explanations.attendance_tier"""
+        return attendance_tier(expected_attendance, brand_preferences)
     
-    def calculate_recency_score(self, event_date: Optional[datetime]) -> float:
-        """Score based on how soon the event is (more recent = higher urgency/relevance)"""
+    def calculate_recency_score(self, event_date: Optional[datetime], now: Optional[datetime] = None) -> float:
+        """Score based on how soon the event is (more recent = higher urgency/relevance), as of now by default"""
         if not event_date:
             return 0.5
         
-        now = datetime.now(event_date.tzinfo) if event_date.tzinfo else datetime.now()
+        if now is None:
+            now = datetime.now(event_date.tzinfo) if event_date.tzinfo else datetime.now()
+        elif event_date.tzinfo:
+            now = now.astimezone(event_date.tzinfo)
+        else:
+            now = now.astimezone().replace(tzinfo=None)
         days_until_event = (event_date - now).days
         
         if days_until_event < 0:
@@ -111,34 +236,52 @@ class MatchingEngine:
     def calculate_demographic_match(self, brand_demographics: List[str], 
                                   university: str, org_category: Optional[str]) -> float:
         """Score demographic alignment between brand target and org/university"""
-        if not brand_demographics:
+        # University, category and student-audience terms are scanned once per
+        # distinct combination; see demographics.demographic_match
+        return demographic_match(demographic_signature(brand_demographics), university, org_category)
+    
+    def budget_alignment_score(self, brand_min: Optional[int], brand_max: Optional[int],
+                               event_min: Optional[int], event_max: Optional[int]) -> float:
+        """Score of calculate_budget_alignment without formatting the budget fit text"""
+        if not brand_min or not brand_max or not event_min or not event_max:
             return 0.5
         
-        score = 0.0
+        overlap_start = max(brand_min, event_min)
+        overlap_end = min(brand_max, event_max)
         
-        # University matching
-        university_lower = university.lower()
-        for demo in brand_demographics:
-            demo_lower = demo.lower()
-            if any(term in university_lower for term in ['college', 'university', 'student']):
-                score += 0.3
-                break
+        if overlap_start > overlap_end:
+            return 0.1 if brand_max < event_min else 0.2
         
-        # Organization category matching
-        if org_category:
-            org_lower = org_category.lower()
-            for demo in brand_demographics:
-                demo_lower = demo.lower()
-                if any(term in demo_lower for term in [org_lower, 'student', 'young adult', 'college']):
-                    score += 0.4
-                    break
+        brand_range = brand_max - brand_min
+        event_range = event_max - event_min
+        overlap_size = overlap_end - overlap_start
         
-        # General student demographic
-        student_terms = ['student', 'college', 'university', 'young adult', '18-24', 'gen z']
-        if any(term in demo.lower() for demo in brand_demographics for term in student_terms):
-            score += 0.3
+        if brand_range == 0 or event_range == 0:
+            return 0.8
         
-        return min(1.0, score)
+        return max(0.3, min(1.0, min(overlap_size / brand_range, overlap_size / event_range)))
+    
+    def build_reasoning(self, tag_score: float, budget_score: float, attendance_score: float,
+                        recency_score: float, demographic_score: float, matched_tags: List[str],
+                        budget_fit: str, attendance_category: str, text_score: float = 0.0) -> MatchReasoning:
+        """Assemble the match reasoning and human-readable explanation from component scores"""
+        return MatchReasoning(
+            tag_overlap_score=tag_score,
+            budget_alignment_score=budget_score,
+            attendance_score=attendance_score,
+            recency_score=recency_score,
+            demographic_match_score=demographic_score,
+            text_similarity_score=text_score,
+            explanation=self.describe_match(tag_score, len(matched_tags), budget_score, text_score),
+            matched_tags=matched_tags,
+            budget_fit=budget_fit,
+            attendance_category=attendance_category
+        )
+    
+    def describe_match(self, tag_score: float, matched_count: int, budget_score: float,
+                       text_score: float = 0.0) -> str:
+        """Human-readable explanation of a match from its tag, budget and text scores"""
+        return describe_match(tag_score, matched_count, budget_score, text_score)
     
     def compute_match_score(self, brand: BrandProfile, event: EventData) -> Tuple[float, MatchReasoning]:
         """Compute overall match score between a brand and event"""
@@ -167,57 +310,109 @@ class MatchingEngine:
             event.org_category
         )
         
+        text_score = self.calculate_text_similarity(
+            getattr(brand, 'description', None),
+            ' '.join([getattr(event, 'description', '')] + getattr(event, 'sponsorship_benefits', []))
+        )
+        
         # Weighted final score
         final_score = (
-            0.35 * tag_score +          # Most important: content/interest alignment
-            0.25 * budget_score +       # Very important: financial fit
-            0.20 * demographic_score +  # Important: target audience match
-            0.15 * attendance_score +   # Moderately important: event size
-            0.05 * recency_score        # Least important: timing urgency
-        )
-        
-        # Generate explanation
-        explanation_parts = []
-        if tag_score > 0.6:
-            explanation_parts.append(f"Strong interest alignment ({len(matched_tags)} matching tags)")
-        elif tag_score > 0.3:
-            explanation_parts.append(f"Moderate interest alignment ({len(matched_tags)} matching tags)")
-        else:
-            explanation_parts.append("Limited interest overlap")
+            self.tag_weight * tag_score +   # Most important: content/interest alignment
+            0.25 * budget_score +           # Very important: financial fit
+            0.20 * demographic_score +      # Important: target audience match
+            0.15 * attendance_score +       # Moderately important: event size
+            0.05 * recency_score +          # Least important: timing urgency
+            self.text_weight * text_score   # Interest alignment from descriptions
+        )
         
-        if budget_score > 0.7:
-            explanation_parts.append("excellent budget fit")
-        elif budget_score > 0.4:
-            explanation_parts.append("good budget alignment")
-        else:
-            explanation_parts.append("budget mismatch")
+        reasoning = self.build_reasoning(
+            tag_score, budget_score, attendance_score, recency_score, demographic_score,
+            matched_tags, budget_fit, attendance_category, text_score
+        )
+        
+        return final_score, reasoning
+    
+    def calculate_text_similarity(self, brand_text: Optional[str], event_text: Optional[str]) -> float:
+        """Description similarity under the latest event corpus; 0.0 before any events are indexed"""
+        if self.text_model is None:
+            return 0.0
+        return text_similarity(self.text_model.vectorize(brand_text), self.text_model.vectorize(event_text))
+    
+    def score_components(self, brand: BrandRecord, event: EventRecord,
+                         text_score: Optional[float] = None) -> Tuple[float, float, float, float, float, float, float]:
+        """
+        Final score and its components (tag, budget, attendance, recency,
+        demographic, text) for a pair of catalog records, same values as
+        compute_match_score but without building the reasoning. Pass the
+        components to explain_match for pairs that make it into the results.
+        text_score skips the similarity computation when it is already known
+        from a TextMatrix product.
+        """
+        tag_score = jaccard(brand.tag_mask, event.tag_mask)
+        budget_score = self.budget_alignment_score(
+            brand.budget_range_min, brand.budget_range_max,
+            event.sponsorship_min_amount, event.sponsorship_max_amount
+        )
+        attendance_score, _ = self.calculate_attendance_score(
+            event.expected_attendance,
+            brand.size_preferences
+        )
+        recency_score = self.calculate_recency_score(event.event_date)
+        demographic_score = demographic_match(brand.demographic_signature, event.university, event.org_category)
         
-        explanation = ", ".join(explanation_parts)
+        if text_score is None:
+            text_score = text_similarity(brand.text_vector, event.text_vector)
         
-        reasoning = MatchReasoning(
-            tag_overlap_score=tag_score,
-            budget_alignment_score=budget_score,
-            attendance_score=attendance_score,
-            recency_score=recency_score,
-            demographic_match_score=demographic_score,
-            explanation=explanation,
-            matched_tags=matched_tags,
-            budget_fit=budget_fit,
-            attendance_category=attendance_category
+        final_score = (
+            self.tag_weight * tag_score +
+            0.25 * budget_score +
+            0.20 * demographic_score +
+            0.15 * attendance_score +
+            0.05 * recency_score +
+            self.text_weight * text_score
         )
         
-        return final_score, reasoning
+        return final_score, tag_score, budget_score, attendance_score, recency_score, demographic_score, text_score
+    
+    def explain_match(self, brand: BrandRecord, event: EventRecord, tag_score: float,
+                      budget_score: float, attendance_score: float, recency_score: float,
+                      demographic_score: float, text_score: float = 0.0,
+                      matched_tags: Optional[List[str]] = None) -> MatchReasoning:
+        """Build reasoning for a pair whose component scores were computed elsewhere"""
+        if matched_tags is None:
+            _, matched_tags = self.calculate_tag_overlap(
+                brand.preferred_event_types + getattr(brand, 'tags', []),
+                event.tags
+            )
+        _, budget_fit = self.calculate_budget_alignment(
+            brand.budget_range_min, brand.budget_range_max,
+            event.sponsorship_min_amount, event.sponsorship_max_amount
+        )
+        _, attendance_category = self.calculate_attendance_score(
+            event.expected_attendance,
+            [brand.company_size] if brand.company_size else []
+        )
+        return self.build_reasoning(
+            tag_score, budget_score, attendance_score, recency_score, demographic_score,
+            matched_tags, budget_fit, attendance_category, text_score
+        )
     
     async def compute_matches(self, event_id: Optional[str] = None, 
                             brand_id: Optional[str] = None, 
-                            limit: int = 50) -> List[MatchResponse]:
-        """Compute matches for either a specific event or brand"""
+                            limit: int = 50, budget_overlap_only: bool = False) -> List[MatchResponse]:
+        """
+        Compute matches for either a specific event or brand
+        
+        With budget_overlap_only, only counterparts whose budget range overlaps
+        the requester's are returned; ranges missing an end can't be ruled out
+        and stay in, and a requester without a complete range isn't filtered.
+        """
         
         try:
             if event_id:
-                return await self._compute_matches_for_event(event_id, limit)
+                return await self._compute_matches_for_event(event_id, limit, budget_overlap_only)
             elif brand_id:
-                return await self._compute_matches_for_brand(brand_id, limit)
+                return await self._compute_matches_for_brand(brand_id, limit, budget_overlap_only)
             else:
                 raise ValueError("Either event_id or brand_id must be provided")
         
@@ -225,189 +420,1359 @@ class MatchingEngine:
             logger.error(f"Error computing matches: {str(e)}")
             raise
     
-    async def _compute_matches_for_event(self, event_id: str, limit: int) -> List[MatchResponse]:
+    def snapshot_matches(self, event_id: Optional[str] = None, brand_id: Optional[str] = None,
+                         limit: int = 50) -> Optional[bytes]:
+        """
+        compute_matches' JSON body from the mapped snapshot, or None to compute live.
+        
+        Only answers until this process has loaded the catalog the request
+        would be scored against; the first answer starts that load in the
+        background, so a cold machine responds at once and then goes live.
+        Must be called from the event loop.
+        """
+        snapshot = self.snapshots.get()
+        kind = 'brands' if event_id else 'events'
+        if snapshot is None or self.catalog.ever_loaded(kind):
+            return None
+        
+        body = snapshot.matches('event' if event_id else 'brand', event_id or brand_id, limit)
+        if body is None:
+            self.snapshots.misses += 1
+            return None
+        
+        self.snapshots.hits += 1
+        task = self._warming.get(kind)
+        if task is None or task.done():
+            self._warming[kind] = asyncio.get_running_loop().create_task(self._warm_catalog(kind))
+        return body
+    
+    async def prewarm(self):
+        """Load both catalogs and their tag, text and budget indexes ahead of the first request"""
+        await self.catalog.get('events')
+        await self.catalog.get('brands')
+    
+    async def _warm_catalog(self, kind: str):
+        try:
+            await self.catalog.get(kind)
+        except Exception as e:
+            logger.error(f"Error warming {kind} catalog: {str(e)}")
+    
+    async def _compute_matches_for_event(self, event_id: str, limit: int,
+                                         budget_overlap_only: bool = False) -> List[MatchResponse]:
         """Compute matches for a specific event against all brands"""
+        rank = await self._event_ranking(event_id, budget_overlap_only)
+        return await self._run_scoring(lambda: self._select_top_matches(*rank(), limit=limit))
+    
+    async def _compute_matches_for_brand(self, brand_id: str, limit: int,
+                                         budget_overlap_only: bool = False) -> List[MatchResponse]:
+        """Compute matches for a specific brand against all events"""
+        rank = await self._brand_ranking(brand_id, budget_overlap_only)
+        return await self._run_scoring(lambda: self._select_top_matches(*rank(), limit=limit))
+    
+    async def stream_matches(self, event_id: Optional[str] = None,
+                             brand_id: Optional[str] = None,
+                             limit: Optional[int] = None,
+                             budget_overlap_only: bool = False,
+                             chunk_size: int = STREAM_CHUNK_MATCHES) -> AsyncIterator[List[MatchResponse]]:
+        """
+        Matches for an event or brand in compute_matches order, a chunk at a time.
+        
+        A match is released as soon as nothing left to score can outrank it, so
+        the first rows arrive long before the ranking is complete, and only the
+        scored-but-unreleased matches are held. limit None streams every match.
+        """
+        if event_id:
+            rank = await self._event_ranking(event_id, budget_overlap_only)
+        elif brand_id:
+            rank = await self._brand_ranking(brand_id, budget_overlap_only)
+        else:
+            raise ValueError("Either event_id or brand_id must be provided")
+        
+        matches: Optional[Iterator[MatchResponse]] = None
+        
+        def next_chunk() -> List[MatchResponse]:
+            nonlocal matches
+            if matches is None:
+                matches = self._iter_ranked_matches(*rank(), limit=limit)
+            return list(itertools.islice(matches, chunk_size))
+        
+        while True:
+            chunk = await self._run_scoring(next_chunk)
+            if chunk:
+                yield chunk
+            if len(chunk) < chunk_size:
+                return
+    
+    async def _load_event(self, event_id: str) -> Tuple[EventRecord, Dict[str, Any], CatalogSnapshot]:
+        """Fetch a published event and the brands catalog, vectorizing the event against it"""
         
-        # Get event data
-        event_response = self.supabase.table('events').select(
-            'id, title, description, event_date, expected_attendance, event_type, '
-            'sponsorship_min_amount, sponsorship_max_amount, sponsorship_benefits, tags, '
-            'orgs(name, university, category)'
-        ).eq('id', event_id).eq('status', 'published').single().execute()
+        # Get event data and all verified brands
+        with phase('compute_event', 'fetch'):
+            event_response, brands = await asyncio.gather(
+                self.db.execute(
+                    self.db.table('events').select(EVENT_COLUMNS).eq('id', event_id).eq('status', 'published').single()
+                ),
+                self.catalog.get('brands')
+            )
         
         if not event_response.data:
             raise ValueError(f"Event {event_id} not found or not published")
         
-        event_data = event_response.data
-        event = EventData(
-            id=event_data['id'],
-            title=event_data['title'],
-            description=event_data['description'],
-            event_date=datetime.fromisoformat(event_data['event_date']) if event_data['event_date'] else None,
-            expected_attendance=event_data['expected_attendance'],
-            event_type=event_data['event_type'],
-            sponsorship_min_amount=event_data['sponsorship_min_amount'],
-            sponsorship_max_amount=event_data['sponsorship_max_amount'],
-            sponsorship_benefits=event_data['sponsorship_benefits'] or [],
-            tags=event_data['tags'] or [],
-            org_name=event_data['orgs']['name'],
-            university=event_data['orgs']['university'],
-            org_category=event_data['orgs']['category']
-        )
-        
-        # Get all verified brands
-        brands_response = self.supabase.table('brands').select('*').eq('status', 'verified').execute()
-        
-        matches = []
-        for brand_data in brands_response.data:
-            brand = BrandProfile(**brand_data)
-            score, reasoning = self.compute_match_score(brand, event)
+        with phase('compute_event', 'parse'):
+            event = EventRecord.from_row(event_response.data, self.tag_vocabulary)
+            event.text_vector = brands.text.model.vectorize(event_document(event_response.data))
+        return event, event_response.data, brands
+    
+    async def _load_brand(self, brand_id: str) -> Tuple[BrandRecord, Dict[str, Any], CatalogSnapshot]:
+        """Fetch a brand and the events catalog, vectorizing the brand against it"""
+        
+        # Get brand data and all published events
+        with phase('compute_brand', 'fetch'):
+            brand_response, events = await asyncio.gather(
+                self.db.execute(self.db.table('brands').select('*').eq('id', brand_id).single()),
+                self.catalog.get('events')
+            )
+        
+        if not brand_response.data:
+            raise ValueError(f"Brand {brand_id} not found")
+        
+        with phase('compute_brand', 'parse'):
+            brand = BrandRecord.from_row(brand_response.data, self.tag_vocabulary)
+            brand.text_vector = events.text.model.vectorize(brand_document(brand_response.data))
+        return brand, brand_response.data, events
+    
+    async def _event_ranking(self, event_id: str, budget_overlap_only: bool) -> Callable[[], Ranking]:
+        """
+        Fetch an event and the brands catalog; the returned function ranks them.
+        
+        Ranking is CPU-bound, so callers run it on the scoring executor.
+        """
+        event, event_data, brands = await self._load_event(event_id)
+        rest_bound = self._event_rest_bound(event_data)
+        
+        def rank_brands() -> Ranking:
+            similarities = brands.text.dot(event.text_vector)
+            text_scores = similarities.tolist()
             
-            # Only include matches above minimum threshold
-            if score >= 0.1:
-                match = MatchResponse(
-                    id=f"{brand.id}_{event.id}",
-                    brand_id=brand.id,
-                    event_id=event.id,
-                    score=score,
-                    reasoning=reasoning,
-                    event_title=event.title,
-                    event_date=event.event_date,
-                    org_name=event.org_name,
-                    university=event.university,
-                    company_name=brand.company_name,
-                    created_at=datetime.now()
-                )
-                matches.append(match)
+            def score_brand(position: int) -> Tuple[float, ...]:
+                return self.score_components(brands.entities[position], event, text_scores[position])
+            
+            def build_brand(position: int, scores: Tuple[float, ...]) -> MatchResponse:
+                return self._build_match(brands.entities[position], event, scores)
+            
+            extra, capped, allowed = self._candidate_bounds(
+                brands.budgets, similarities,
+                event.sponsorship_min_amount, event.sponsorship_max_amount, budget_overlap_only
+            )
+            return Ranking(
+                brands.index.ranked_candidates(
+                    event.tag_mask, rest_bound, extra, capped, BUDGET_DISJOINT_SLACK, allowed
+                ),
+                score_brand, build_brand, 'compute_event'
+            )
         
-        # Sort by score and limit results
-        matches.sort(key=lambda x: x.score, reverse=True)
-        return matches[:limit]
+        return rank_brands
     
-    async def _compute_matches_for_brand(self, brand_id: str, limit: int) -> List[MatchResponse]:
-        """Compute matches for a specific brand against all events"""
+    async def _brand_ranking(self, brand_id: str, budget_overlap_only: bool) -> Callable[[], Ranking]:
+        """Fetch a brand and the events catalog; the returned function ranks them"""
+        brand, brand_data, events = await self._load_brand(brand_id)
+        rest_bound = self._brand_rest_bound(brand_data)
         
-        # Get brand data
-        brand_response = self.supabase.table('brands').select('*').eq('id', brand_id).single().execute()
+        def rank_events() -> Ranking:
+            similarities = events.text.dot(brand.text_vector)
+            text_scores = similarities.tolist()
+            
+            def score_event(position: int) -> Tuple[float, ...]:
+                return self.score_components(brand, events.entities[position], text_scores[position])
+            
+            def build_event(position: int, scores: Tuple[float, ...]) -> MatchResponse:
+                return self._build_match(brand, events.entities[position], scores)
+            
+            extra, capped, allowed = self._candidate_bounds(
+                events.budgets, similarities,
+                brand.budget_range_min, brand.budget_range_max, budget_overlap_only
+            )
+            return Ranking(
+                events.index.ranked_candidates(
+                    brand.tag_mask, rest_bound, extra, capped, BUDGET_DISJOINT_SLACK, allowed
+                ),
+                score_event, build_event, 'compute_brand'
+            )
+        
+        return rank_events
+    
+    def weights_for(self, profile: Optional[str] = None,
+                    overrides: Optional[Dict[str, float]] = None) -> Optional[ScoreWeights]:
+        """A request's weights, or None for the default weighting; raises InvalidWeights"""
+        return resolve_weights(self.default_weights, profile, overrides)
+    
+    def weight_profiles(self) -> Dict[str, Dict[str, float]]:
+        profiles = {'default': self.default_weights, **WEIGHT_PROFILES}
+        return {name: weights._asdict() for name, weights in profiles.items()}
+    
+    async def compute_weighted_matches(self, weights: ScoreWeights, event_id: Optional[str] = None,
+                                       brand_id: Optional[str] = None, limit: Optional[int] = 50,
+                                       budget_overlap_only: bool = False) -> List[MatchResponse]:
+        """
+        compute_matches ranked under other weights, by re-weighting component scores.
+        
+        An entity's components against the whole catalog are scored once with
+        the vectorized kernel and kept in the component cache until the catalog
+        or the entity changes. Each weighting after that is one vectorized
+        weighted sum and a top-k partition. Order is score descending, earlier
+        catalog position first, as in compute_matches; limit None returns
+        every match.
+        """
+        if event_id:
+            event, row, brands = await self._load_event(event_id)
+            catalog, operation = brands, 'compute_event'
+            budget_min, budget_max = event.sponsorship_min_amount, event.sponsorship_max_amount
+            build = lambda position, scores: self._build_match(brands.entities[position], event, scores)
+            score_all = lambda: self._component_matrix(brands.entities, [event], by_brand=False)
+        elif brand_id:
+            brand, row, events = await self._load_brand(brand_id)
+            catalog, operation = events, 'compute_brand'
+            budget_min, budget_max = brand.budget_range_min, brand.budget_range_max
+            build = lambda position, scores: self._build_match(brand, events.entities[position], scores)
+            score_all = lambda: self._component_matrix([brand], events.entities, by_brand=True)
+        else:
+            raise ValueError("Either event_id or brand_id must be provided")
+        
+        # The row is part of the key, so an edited entity is scored afresh
+        key = (operation, row['id'], catalog.version, json.dumps(row, sort_keys=True, default=str))
+        components = self.components.get(key)
+        if components is None:
+            with phase(operation, 'score'):
+                components = await self._run_scoring(score_all)
+            PAIRS_SCORED.labels(operation).inc(len(components))
+            self.components.put(key, components)
+        
+        positions = None
+        if budget_overlap_only and budget_min and budget_max:
+            positions = catalog.budgets.candidates(budget_min, budget_max)
+        
+        def rank() -> List[MatchResponse]:
+            with phase(operation, 'select'):
+                top, scores = top_weighted(components, weights, limit, positions=positions)
+            with phase(operation, 'serialize'):
+                return [
+                    build(position, (score, *components[position].tolist()))
+                    for position, score in zip(top.tolist(), scores.tolist())
+                ]
+        
+        return await self._run_scoring(rank)
+    
+    def _component_matrix(self, brands: List[BrandRecord], events: List[EventRecord],
+                          by_brand: bool) -> np.ndarray:
+        """Components of one brand against every event (by_brand) or of every brand against one event, a row per pair"""
+        counterparts = len(events) if by_brand else len(brands)
+        if not counterparts:
+            return np.zeros((0, len(COMPONENT_COLUMNS)))
+        
+        scorer = VectorizedScorer(
+            brands, events, self.calculate_recency_score, self.tag_vocabulary, self.tag_weight, self.text_weight
+        )
+        block = scorer.score_block(0, len(brands))
+        columns = (block.tag, block.budget, block.attendance, block.recency, block.demographic, block.text)
+        return np.stack([column[0] if by_brand else column[:, 0] for column in columns], axis=-1)
+    
+    async def similar_events(self, brand_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Published events whose descriptions are closest to the brand's, most similar first"""
+        brand_response, events = await asyncio.gather(
+            self.db.execute(self.db.table('brands').select('id, description').eq('id', brand_id).single()),
+            self.catalog.get('events')
+        )
         
         if not brand_response.data:
             raise ValueError(f"Brand {brand_id} not found")
         
-        brand = BrandProfile(**brand_response.data)
-        
-        # Get all published events
-        events_response = self.supabase.table('events').select(
-            'id, title, description, event_date, expected_attendance, event_type, '
-            'sponsorship_min_amount, sponsorship_max_amount, sponsorship_benefits, tags, '
-            'orgs(name, university, category)'
-        ).eq('status', 'published').execute()
-        
-        matches = []
-        for event_data in events_response.data:
-            event = EventData(
-                id=event_data['id'],
-                title=event_data['title'],
-                description=event_data['description'],
-                event_date=datetime.fromisoformat(event_data['event_date']) if event_data['event_date'] else None,
-                expected_attendance=event_data['expected_attendance'],
-                event_type=event_data['event_type'],
-                sponsorship_min_amount=event_data['sponsorship_min_amount'],
-                sponsorship_max_amount=event_data['sponsorship_max_amount'],
-                sponsorship_benefits=event_data['sponsorship_benefits'] or [],
-                tags=event_data['tags'] or [],
-                org_name=event_data['orgs']['name'],
-                university=event_data['orgs']['university'],
-                org_category=event_data['orgs']['category']
+        vector = events.text.model.vectorize(brand_document(brand_response.data))
+        nearest = await self._run_scoring(events.text.nearest, vector, limit)
+        return [
+            {
+                "event_id": events.entities[position].id,
+                "event_title": events.entities[position].title,
+                "org_name": events.entities[position].org_name,
+                "similarity": similarity
+            }
+            for position, similarity in nearest
+        ]
+    
+    async def compute_matches_batch(self, brand_ids: List[str], event_ids: List[str],
+                                    limit: int = 50) -> BatchMatchResponse:
+        """
+        Compute top matches for many brands and/or events in one pass.
+        
+        Requested rows are fetched with a few in() queries and the opposite
+        catalog is loaded once, then every requested entity is scored against
+        it with the vectorized kernel. Results match compute_matches for each
+        entity; ids that aren't found are reported rather than failing the batch.
+        """
+        brand_ids = list(dict.fromkeys(brand_ids))
+        event_ids = list(dict.fromkeys(event_ids))
+        if not brand_ids and not event_ids:
+            raise ValueError("At least one brand_id or event_id must be provided")
+        
+        async def load_catalog(kind: str, needed: bool):
+            return await self.catalog.get(kind) if needed else None
+        
+        with phase('compute_batch', 'fetch'):
+            brand_rows, event_rows, event_catalog, brand_catalog = await asyncio.gather(
+                self._fetch_rows('brands', '*', brand_ids),
+                self._fetch_rows('events', EVENT_COLUMNS, event_ids, status='published'),
+                load_catalog('events', bool(brand_ids)),
+                load_catalog('brands', bool(event_ids))
+            )
+        
+        with phase('compute_batch', 'parse'):
+            brands_by_id = {row['id']: BrandRecord.from_row(row, self.tag_vocabulary) for row in brand_rows}
+            events_by_id = {row['id']: EventRecord.from_row(row, self.tag_vocabulary) for row in event_rows}
+            # Vectorize against the model of the catalog each side is scored with
+            for row in brand_rows:
+                brands_by_id[row['id']].text_vector = event_catalog.text.model.vectorize(brand_document(row))
+            for row in event_rows:
+                events_by_id[row['id']].text_vector = brand_catalog.text.model.vectorize(event_document(row))
+            brands = [brands_by_id[brand_id] for brand_id in brand_ids if brand_id in brands_by_id]
+            events = [events_by_id[event_id] for event_id in event_ids if event_id in events_by_id]
+        
+        def rank_batch() -> BatchMatchResponse:
+            result = BatchMatchResponse(
+                missing_brand_ids=[brand_id for brand_id in brand_ids if brand_id not in brands_by_id],
+                missing_event_ids=[event_id for event_id in event_ids if event_id not in events_by_id]
+            )
+            if brands:
+                result.brand_matches = self._rank_batch(brands, event_catalog.entities, limit, by_brand=True)
+            if events:
+                result.event_matches = self._rank_batch(brand_catalog.entities, events, limit, by_brand=False)
+            return result
+        
+        return await self._run_scoring(rank_batch)
+    
+    def _rank_batch(self, brands: List[BrandRecord], events: List[EventRecord], limit: int,
+                    by_brand: bool) -> Dict[str, List[MatchResponse]]:
+        """
+        Top `limit` matches for every brand (by_brand) or every event of a grid.
+        
+        Pairs are scored block by block with VectorizedScorer, which is
+        bit-for-bit identical to score_components, and ordered like
+        _select_top_matches: score descending, earlier catalog position first.
+        """
+        requested = brands if by_brand else events
+        top: List[List[Tuple[float, int, Tuple[float, ...]]]] = [[] for _ in requested]
+        if not brands or not events:
+            return {entity.id: [] for entity in requested}
+        
+        scorer = VectorizedScorer(
+            brands, events, self.calculate_recency_score, self.tag_vocabulary, self.tag_weight, self.text_weight
+        )
+        with phase('compute_batch', 'score'):
+            for start, stop in scorer.block_ranges():
+                block = scorer.score_block(start, stop)
+                if by_brand:
+                    for i in range(stop - start):
+                        top[start + i] = [
+                            (float(block.final[i, j]), j, self._block_scores(block, i, j))
+                            for j in self._top_positions(block.final[i], limit)
+                        ]
+                else:
+                    # An event's candidates span brand blocks, so keep each block's best and merge
+                    for j in range(len(events)):
+                        top[j].extend(
+                            (float(block.final[i, j]), start + i, self._block_scores(block, i, j))
+                            for i in self._top_positions(block.final[:, j], limit)
+                        )
+        PAIRS_SCORED.labels('compute_batch').inc(len(brands) * len(events))
+        
+        with phase('compute_batch', 'select'):
+            matches = {}
+            for entity, candidates in zip(requested, top):
+                candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+                if by_brand:
+                    matches[entity.id] = [
+                        self._build_match(entity, events[position], scores)
+                        for _, position, scores in candidates[:limit]
+                    ]
+                else:
+                    matches[entity.id] = [
+                        self._build_match(brands[position], entity, scores)
+                        for _, position, scores in candidates[:limit]
+                    ]
+            return matches
+    
+    def _top_positions(self, final: np.ndarray, limit: int) -> List[int]:
+        """Positions of the best `limit` scores at or above threshold, ties to the earlier position"""
+        eligible = np.flatnonzero(final >= 0.1)
+        order = np.argsort(-final[eligible], kind='stable')[:limit]
+        return eligible[order].tolist()
+    
+    def _block_scores(self, block: ScoreBlock, i: int, j: int) -> Tuple[float, ...]:
+        """One pair's scores from a block, in score_components order"""
+        return (
+            float(block.final[i, j]), float(block.tag[i, j]), float(block.budget[i, j]),
+            float(block.attendance[i, j]), float(block.recency[i, j]), float(block.demographic[i, j]),
+            float(block.text[i, j])
+        )
+    
+    async def _fetch_rows(self, table: str, columns: str, ids: List[str], **filters) -> List[Dict[str, Any]]:
+        """Rows of a table with the given ids, FETCH_BATCH_SIZE ids per query"""
+        queries = []
+        for start in range(0, len(ids), FETCH_BATCH_SIZE):
+            query = self.db.table(table).select(columns).in_('id', ids[start:start + FETCH_BATCH_SIZE])
+            for column, value in filters.items():
+                query = query.eq(column, value)
+            queries.append(self.db.execute(query))
+        responses = await asyncio.gather(*queries)
+        return [row for response in responses for row in response.data]
+    
+    async def _load_event_catalog(self) -> CatalogParts:
+        """Fetch, parse and index all published events"""
+        async def fetch() -> List[Dict[str, Any]]:
+            with phase('load_events', 'fetch'):
+                response = await self.db.execute(
+                    self.db.table('events').select(EVENT_COLUMNS).eq('status', 'published')
+                )
+            return response.data
+        
+        def index_text(rows: List[Dict[str, Any]]) -> TextMatrix:
+            # A publisher's corpus is dropped with its rows once the shared file is written
+            corpus = self.text_corpus if self.shared_catalogs is None else TextCorpus()
+            model, counts = corpus.sync((row['id'], event_document(row)) for row in rows)
+            return TextMatrix(model, [model.vectorize_counts(event_counts) for event_counts in counts])
+        
+        def parse(rows: List[Dict[str, Any]], text: TextMatrix) -> Tuple[List[EventRecord], TagIndex, BudgetIndex]:
+            events = [EventRecord.from_row(event_data, self.tag_vocabulary) for event_data in rows]
+            for event, vector in zip(events, text.vectors):
+                event.text_vector = vector
+            index = TagIndex.build(
+                self.tag_vocabulary,
+                [event.tag_mask for event in events],
+                [self._event_rest_bound(event_data) for event_data in rows],
+                self.tag_weight
+            )
+            budgets = BudgetIndex.build([(event.sponsorship_min_amount, event.sponsorship_max_amount) for event in events])
+            return events, index, budgets
+        
+        parts = await self._load_catalog(
+            'events', 'load_events', EventRecord, EVENT_RECORD_COLUMNS, fetch, index_text, parse
+        )
+        self.text_model = parts.text.model
+        return parts
+    
+    async def _load_brand_catalog(self) -> CatalogParts:
+        """Fetch, parse and index all verified brands"""
+        events: Optional[CatalogSnapshot] = None
+        
+        async def fetch() -> List[Dict[str, Any]]:
+            nonlocal events
+            # Brand descriptions are weighted by the event corpus, so it must be indexed first
+            with phase('load_brands', 'fetch'):
+                response, events = await asyncio.gather(
+                    self.db.execute(self.db.table('brands').select('*').eq('status', 'verified')),
+                    self.catalog.get('events')
+                )
+            return response.data
+        
+        def index_text(rows: List[Dict[str, Any]]) -> TextMatrix:
+            model = events.text.model
+            return TextMatrix(model, [model.vectorize(brand_document(brand_data)) for brand_data in rows])
+        
+        def parse(rows: List[Dict[str, Any]], text: TextMatrix) -> Tuple[List[BrandRecord], TagIndex, BudgetIndex]:
+            brands = [BrandRecord.from_row(brand_data, self.tag_vocabulary) for brand_data in rows]
+            for brand, vector in zip(brands, text.vectors):
+                brand.text_vector = vector
+            index = TagIndex.build(
+                self.tag_vocabulary,
+                [brand.tag_mask for brand in brands],
+                [self._brand_rest_bound(brand_data) for brand_data in rows],
+                self.tag_weight
+            )
+            budgets = BudgetIndex.build([(brand.budget_range_min, brand.budget_range_max) for brand in brands])
+            return brands, index, budgets
+        
+        return await self._load_catalog(
+            'brands', 'load_brands', BrandRecord, BRAND_RECORD_COLUMNS, fetch, index_text, parse
+        )
+    
+    async def _load_catalog(self, kind: str, operation: str, record_type: Type, columns: RecordColumns,
+                            fetch: Callable[[], Awaitable[List[Dict[str, Any]]]],
+                            index_text: Callable[[List[Dict[str, Any]]], TextMatrix],
+                            parse: Callable[[List[Dict[str, Any]], TextMatrix], Tuple[List[Any], TagIndex, BudgetIndex]]
+                            ) -> CatalogParts:
+        """
+        Rows of one catalog kind, parsed and indexed.
+        
+        With a shared catalog directory everything comes from the kind's
+        shared file: attached as is while it is fresh, otherwise republished
+        by whichever worker gets the lock first while the rest wait for it.
+        Records and the tag, budget and text indexes are all read off the
+        mapping, records made on access, so a worker holds little of its own
+        however large the catalog. The publishing worker builds the catalog
+        to write the file, then drops it and attaches like the others.
+        """
+        def build(rows: List[Dict[str, Any]]) -> CatalogParts:
+            text = index_text(rows)
+            entities, index, budgets = parse(rows, text)
+            return CatalogParts(entities, index, text, budgets)
+        
+        store = self.shared_catalogs
+        if store is None:
+            rows = await fetch()
+            with phase(operation, 'parse'):
+                return await self._run_scoring(build, rows)
+        
+        mapped = self._usable_shared(kind, store.current(kind))
+        if mapped is None:
+            lock = await store.acquire(kind)
+            try:
+                # Another worker may have published while we waited for the lock
+                mapped = self._usable_shared(kind, store.current(kind))
+                if mapped is None:
+                    rows = await fetch()
+                    
+                    def publish() -> MappedCatalog:
+                        parts = build(rows)
+                        return store.publish(
+                            kind, columns, parts.entities, parts.index, parts.budgets, parts.text, self.tag_vocabulary
+                        )
+                    
+                    with phase(operation, 'publish'):
+                        mapped = await self._run_scoring(publish)
+            finally:
+                store.unlock(lock)
+        
+        def attach() -> CatalogParts:
+            entities, index, text, budgets = mapped.attach(record_type, columns, self.tag_vocabulary, self.tag_weight)
+            return CatalogParts(entities, index, text, budgets, mapped.version, mapped.published_at, mapped.identity)
+        
+        with phase(operation, 'parse'):
+            return await self._run_scoring(attach)
+    
+    def _usable_shared(self, kind: str, mapped: Optional[MappedCatalog]) -> Optional[MappedCatalog]:
+        """mapped if it is within the catalog TTL and newer than the kind's last invalidation"""
+        if mapped is None or mapped.age_seconds >= self.catalog.ttl_seconds:
+            return None
+        if mapped.published_at <= self.catalog.invalidated_at[kind]:
+            return None
+        return mapped
+    
+    def _index_event_text(self, events: List[EventRecord], rows: List[Dict[str, Any]]) -> TextModel:
+        """Sync the text corpus to exactly these events and give each its text vector"""
+        model, counts = self.text_corpus.sync((row['id'], event_document(row)) for row in rows)
+        for event, event_counts in zip(events, counts):
+            event.text_vector = model.vectorize_counts(event_counts)
+        self.text_model = model
+        return model
+    
+    def _candidate_bounds(self, budgets: BudgetIndex, similarities: np.ndarray,
+                          budget_min: Optional[int], budget_max: Optional[int],
+                          overlap_only: bool) -> Tuple[Optional[Tuple[np.ndarray, np.ndarray]],
+                                                       Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        Score bound adjustments for a query and the positions it may match,
+        as (extra, capped, allowed) for TagIndex.ranked_candidates.
+        
+        Text similarity is added exactly, only for the positions that have
+        any, so the tag index still streams the rest lazily. Counterparts
+        whose budget range can't overlap the query's are capped, and their
+        bounds lose BUDGET_DISJOINT_SLACK so they sort behind pairs that can
+        still fit.
+        With overlap_only they are dropped instead.
+        """
+        extra = None
+        if self.text_weight:
+            positions = np.flatnonzero(similarities)
+            extra = (positions, self.text_weight * similarities[positions])
+        if not budget_min or not budget_max:
+            # Budget scores 0.5 against everything, nothing can be ruled out
+            return extra, None, None
+        
+        capped = np.zeros(len(budgets), dtype=bool)
+        capped[budgets.disjoint(budget_min, budget_max)] = True
+        allowed = None
+        if overlap_only:
+            allowed = np.zeros(len(budgets), dtype=bool)
+            allowed[budgets.candidates(budget_min, budget_max)] = True
+        return extra, capped, allowed
+    
+    async def _run_scoring(self, fn: Callable, *args):
+        """Run a CPU-bound scoring pass on the scoring executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._scoring_executor, fn, *args)
+    
+    def _build_match(self, brand: BrandRecord, event: EventRecord,
+                     scores: Tuple[float, ...]) -> MatchResponse:
+        """Full response for a selected pair from its score_components"""
+        matched_tags = self.tag_vocabulary.decode(brand.tag_mask & event.tag_mask)
+        return MatchResponse(
+            id=f"{brand.id}_{event.id}",
+            brand_id=brand.id,
+            event_id=event.id,
+            score=scores[0],
+            reasoning=self.explain_match(brand, event, *scores[1:], matched_tags=matched_tags),
+            event_title=event.title,
+            event_date=event.event_date,
+            org_name=event.org_name,
+            university=event.university,
+            company_name=brand.company_name,
+            created_at=datetime.now()
+        )
+    
+    def _brand_rest_bound(self, brand_data: Dict[str, Any]) -> float:
+        """Upper bound on the non-tag part of any score involving this brand row"""
+        budget_max = COMPONENT_MAX
+        if not brand_data.get('budget_range_min') or not brand_data.get('budget_range_max'):
+            budget_max = 0.5
+        
+        demographics = brand_data.get('target_demographics') or []
+        demographic_max = 0.5
+        if demographics:
+            # University and org category terms can always match; the student term is brand-only
+            demographic_max = 0.3 + 0.4
+            if targets_students(demographic_signature(demographics)):
+                demographic_max += 0.3
+        
+        return (
+            0.25 * budget_max +
+            0.20 * demographic_max +
+            0.15 * COMPONENT_MAX +
+            0.05 * COMPONENT_MAX
+        )
+    
+    def _event_rest_bound(self, event_data: Dict[str, Any]) -> float:
+        """Upper bound on the non-tag part of any score involving this event row"""
+        budget_max = COMPONENT_MAX
+        if not event_data.get('sponsorship_min_amount') or not event_data.get('sponsorship_max_amount'):
+            budget_max = 0.5
+        
+        attendance = event_data.get('expected_attendance')
+        attendance_max = max(
+            self.calculate_attendance_score(attendance, size)[0]
+            for size in ([], ['small'], ['large'])
+        )
+        
+        # Recency only moves towards the event date, so only the undated (0.5)
+        # and already past (0.0) cases are stable enough to bound tighter than 1.0
+        recency_max = COMPONENT_MAX
+        if not event_data.get('event_date'):
+            recency_max = 0.5
+        elif self.calculate_recency_score(datetime.fromisoformat(event_data['event_date'])) == 0.0:
+            recency_max = 0.0
+        
+        return (
+            0.25 * budget_max +
+            0.20 * COMPONENT_MAX +
+            0.15 * attendance_max +
+            0.05 * recency_max
+        )
+    
+    def _select_top_matches(self, candidates: Iterator[Tuple[float, int]],
+                            score_fn: Callable[[int], Tuple[float, ...]],
+                            build_fn: Callable[[int, Tuple[float, ...]], MatchResponse],
+                            operation: str, limit: int) -> List[MatchResponse]:
+        """
+        Score candidates in decreasing score-bound order and keep the best `limit`.
+        
+        Only a bounded min-heap of (score, position) is kept while scanning;
+        response objects are built for the winners alone. Once the next
+        candidate's bound drops below the current limit-th best score, no
+        remaining candidate can enter the results and scoring stops.
+        """
+        # Entries compare by score, then earlier catalog position wins ties
+        top = []  # min-heap of (score, -position, scores)
+        scored = 0
+        
+        with phase(operation, 'score'):
+            for score_bound, position in candidates:
+                if len(top) >= limit and score_bound + BOUND_EPSILON < top[0][0]:
+                    break
+                
+                scores = score_fn(position)
+                scored += 1
+                score = scores[0]
+                
+                # Only include matches above minimum threshold
+                if score < 0.1:
+                    continue
+                if len(top) < limit:
+                    heapq.heappush(top, (score, -position, scores))
+                elif (score, -position) > top[0][:2]:
+                    heapq.heapreplace(top, (score, -position, scores))
+        PAIRS_SCORED.labels(operation).inc(scored)
+        
+        with phase(operation, 'select'):
+            top.sort(reverse=True)
+            return [build_fn(-neg_position, scores) for _, neg_position, scores in top]
+    
+    def _iter_ranked_matches(self, candidates: Iterator[Tuple[float, int]],
+                             score_fn: Callable[[int], Tuple[float, ...]],
+                             build_fn: Callable[[int, Tuple[float, ...]], MatchResponse],
+                             operation: str, limit: Optional[int] = None) -> Iterator[MatchResponse]:
+        """
+        Yield matches best first, in _select_top_matches order, as soon as each is certain.
+        
+        Candidates arrive in decreasing score-bound order, so the best scored
+        match can be released once it beats the next candidate's bound: no
+        candidate still to come can reach it. Scanning stops once bounds fall
+        below the 0.1 floor.
+        """
+        # Entries compare by score, then earlier catalog position wins ties
+        pending = []  # min-heap of (-score, position, scores)
+        released = 0
+        scored = 0
+        
+        try:
+            for score_bound, position in candidates:
+                while pending and -pending[0][0] > score_bound + BOUND_EPSILON:
+                    _, best_position, scores = heapq.heappop(pending)
+                    yield build_fn(best_position, scores)
+                    released += 1
+                    if limit is not None and released >= limit:
+                        return
+                if score_bound + BOUND_EPSILON < 0.1:
+                    break
+                
+                scores = score_fn(position)
+                scored += 1
+                if scores[0] >= 0.1:
+                    heapq.heappush(pending, (-scores[0], position, scores))
+            
+            while pending and (limit is None or released < limit):
+                _, best_position, scores = heapq.heappop(pending)
+                yield build_fn(best_position, scores)
+                released += 1
+        finally:
+            PAIRS_SCORED.labels(operation).inc(scored)
+    
+    async def recompute_all_matches(self, incremental: bool = False,
+                                    progress: Optional[RecomputeProgress] = None) -> Dict[str, int]:
+        """
+        Recompute stored matches, upserting and pruning rows in place.
+        
+        In incremental mode only pairs where the brand, the event or the event's
+        org changed since the last run's watermark are rescored; otherwise every
+        pair is. Text vectors are weighted by the whole event corpus, so
+        publishing, withdrawing or editing an event also moves the text
+        similarity of unchanged pairs; brands whose similarities drifted past
+        TEXT_DRIFT_TOLERANCE are rescored too (see _text_drift_brands), and
+        a changed text weight rescores every pair.
+        Returns counts of rows stored and pairs rescored vs skipped.
+        Pass a RecomputeProgress to follow pairs scored and rows written while
+        it runs.
+        """
+        progress = progress or RecomputeProgress()
+        # Anything updated while this run is in flight is picked up by the next one
+        run_started_at = datetime.now(timezone.utc)
+        
+        # Get all brands and events, ineligible ones too so their rows can be pruned
+        with phase('recompute', 'fetch'):
+            state = await self._load_recompute_state() if incremental else None
+            watermark = state['watermark'] if state else None
+            brands_response, events_response = await asyncio.gather(
+                self.db.execute(self.db.table('brands').select('*')),
+                self.db.execute(self.db.table('events').select(RECOMPUTE_EVENT_COLUMNS))
             )
+        
+        brands, brand_rows, changed_brands, stale_brand_ids = [], [], [], []
+        events, event_rows, changed_events, stale_event_ids = [], [], [], []
+        text_model: Optional[TextModel] = None
+        
+        def parse():
+            nonlocal text_model
+            for brand_data in brands_response.data:
+                changed = self._changed_since(brand_data.get('updated_at'), watermark)
+                if brand_data.get('status') != 'verified':
+                    if changed:
+                        stale_brand_ids.append(brand_data['id'])
+                    continue
+                brand = BrandRecord.from_row(brand_data, self.tag_vocabulary)
+                brands.append(brand)
+                brand_rows.append(brand_data)
+                if changed:
+                    changed_brands.append(brand)
             
-            score, reasoning = self.compute_match_score(brand, event)
+            for event_data in events_response.data:
+                changed = (
+                    self._changed_since(event_data.get('updated_at'), watermark) or
+                    self._changed_since(event_data['orgs'].get('updated_at'), watermark)
+                )
+                if event_data.get('status') != 'published':
+                    if changed:
+                        stale_event_ids.append(event_data['id'])
+                    continue
+                event = EventRecord.from_row(event_data, self.tag_vocabulary)
+                events.append(event)
+                event_rows.append(event_data)
+                if changed:
+                    changed_events.append(event)
             
-            # Only include matches above minimum threshold
-            if score >= 0.1:
-                match = MatchResponse(
-                    id=f"{brand.id}_{event.id}",
-                    brand_id=brand.id,
-                    event_id=event.id,
-                    score=score,
-                    reasoning=reasoning,
-                    event_title=event.title,
-                    event_date=event.event_date,
-                    org_name=event.org_name,
-                    university=event.university,
-                    company_name=brand.company_name,
-                    created_at=datetime.now()
+            model = self._index_event_text(events, event_rows)
+            for brand, brand_data in zip(brands, brand_rows):
+                brand.text_vector = model.vectorize(brand_document(brand_data))
+            text_model = model
+        
+        # Parsing, tokenizing and vectorizing the whole catalog would stall every request on the loop
+        with phase('recompute', 'parse'):
+            await self._run_scoring(parse)
+        
+        text_drift = 0.0
+        if watermark is not None:
+            with phase('recompute', 'text_drift'):
+                changed_brands, text_drift = await self._run_scoring(
+                    self._text_drift_brands, state, text_model, brands, brand_rows,
+                    events, event_rows, changed_brands, changed_events
                 )
-                matches.append(match)
         
-        # Sort by score and limit results
-        matches.sort(key=lambda x: x.score, reverse=True)
-        return matches[:limit]
+        # Changed brands against every event, then unchanged brands against changed events
+        changed_brand_ids = set(brand.id for brand in changed_brands)
+        unchanged_brands = [brand for brand in brands if brand.id not in changed_brand_ids]
+        
+        rescored = len(changed_brands) * len(events) + len(unchanged_brands) * len(changed_events)
+        
+        # Upsert in place so readers never see an empty table; batches are
+        # written while the next chunk is being scored
+        try:
+            stream_started = time.perf_counter()
+            async with MatchWriter(
+                self.db, batch_size=self.write_batch_size, max_pending_batches=self.max_pending_batches
+            ) as writer:
+                progress.start_scoring(rescored, writer)
+                await self._stream_grid(changed_brands, events, writer, progress)
+                await self._stream_grid(unchanged_brands, changed_events, writer, progress)
+            stream_seconds = time.perf_counter() - stream_started
+            
+            progress.stage = 'pruning'
+            with phase('recompute', 'prune'):
+                await self._prune_matches(stale_brand_ids, stale_event_ids)
+        finally:
+            # Even a failed run may have written some batches
+            if rescored or stale_brand_ids or stale_event_ids:
+                await self.invalidate_listings()
+        
+        PAIRS_SCORED.labels('recompute').inc(rescored)
+        if rescored and stream_seconds > 0:
+            RECOMPUTE_PAIRS_PER_SECOND.set(rescored / stream_seconds)
+        
+        result = {
+            'count': writer.rows_written,
+            'rescored': rescored,
+            'skipped': len(brands) * len(events) - rescored
+        }
+        await self._save_watermark(run_started_at, result, text_model, text_drift)
+        
+        return result
+    
+    def _text_drift_brands(self, state: Dict[str, Any], model: TextModel,
+                           brands: List[BrandRecord], brand_rows: List[Dict[str, Any]],
+                           events: List[EventRecord], event_rows: List[Dict[str, Any]],
+                           changed_brands: List[BrandRecord],
+                           changed_events: List[EventRecord]) -> Tuple[List[BrandRecord], float]:
+        """
+        Brands an incremental recompute rescores against every event, and the
+        text similarity drift its stored scores are left with.
+        
+        Unchanged brands and events are vectorized again under the last
+        run's IDF, and each brand's largest similarity change against the
+        unchanged events is compared with what the stored scores already
+        drifted since every pair was last rescored. Brands that would end up
+        past TEXT_DRIFT_TOLERANCE are rescored; if that is all of them the
+        drift starts again from 0. A changed text weight, or a last run that
+        didn't record its IDF, rescores every brand.
+        """
+        if state['text_weight'] != self.text_weight or not state['text_idf']:
+            logger.info("Text similarity weight or model of the last recompute unknown or changed; rescoring every pair")
+            return list(brands), 0.0
+        if state['text_model'] == model.fingerprint():
+            return changed_brands, state['text_drift']
+        
+        changed_brand_ids = set(brand.id for brand in changed_brands)
+        changed_event_ids = set(event.id for event in changed_events)
+        kept = [i for i, brand in enumerate(brands) if brand.id not in changed_brand_ids]
+        unchanged = [j for j, event in enumerate(events) if event.id not in changed_event_ids]
+        
+        previous = TextModel.from_weights(state['text_idf'])
+        drift = similarity_drift(
+            [previous.vectorize(brand_document(brand_rows[i])) for i in kept],
+            [brands[i].text_vector for i in kept],
+            TextMatrix(previous, [previous.vectorize(event_document(event_rows[j])) for j in unchanged]),
+            TextMatrix(model, [events[j].text_vector for j in unchanged])
+        )
+        within = state['text_drift'] + drift <= TEXT_DRIFT_TOLERANCE
+        if not within.any():
+            logger.info("Event text model drifted past tolerance for every brand; rescoring every pair")
+            return list(brands), 0.0
+        
+        drifted = [brands[i] for i, ok in zip(kept, within.tolist()) if not ok]
+        if drifted:
+            logger.info(f"Event text model drifted past tolerance for {len(drifted)} brands; rescoring them")
+        return changed_brands + drifted, state['text_drift'] + float(drift[within].max())
     
-    async def recompute_all_matches(self) -> int:
-        """Recompute all matches and store in database"""
+    async def refresh_recency(self) -> Dict[str, int]:
+        """
+        Bring the recency component of stored matches up to date without rescoring.
+        
+        Recency is a step function of days until the event (30/90/180 days,
+        then past), so it only changes for events that crossed a step since
+        the last refresh. Those events are sent to refresh_match_recency,
+        which shifts each stored row's score by the recency difference in
+        one bulk update; rows already at the current value are left alone.
+        Rows without stored components are skipped until a full recompute
+        fills them in. Returns counts of events checked, events that crossed
+        a step and rows updated.
+        """
+        refreshed_at = datetime.now(timezone.utc)
+        with phase('recency', 'fetch'):
+            last_refresh = await self._load_watermark(RECENCY_STATE_ID)
+            events = (await self.catalog.get('events')).entities
         
-        # Clear existing matches
-        self.supabase.table('matches').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
+        crossed = []
+        for event in events:
+            current = self.calculate_recency_score(event.event_date, refreshed_at)
+            # Without a previous refresh every event is checked against its stored rows
+            if last_refresh is None or current != self.calculate_recency_score(event.event_date, last_refresh):
+                crossed.append((event.id, current))
         
-        # Get all brands and events
-        brands_response = self.supabase.table('brands').select('*').eq('status', 'verified').execute()
-        events_response = self.supabase.table('events').select(
-            'id, title, description, event_date, expected_attendance, event_type, '
-            'sponsorship_min_amount, sponsorship_max_amount, sponsorship_benefits, tags, '
-            'orgs(name, university, category)'
-        ).eq('status', 'published').execute()
+        updated = 0
+        try:
+            with phase('recency', 'write'):
+                for start in range(0, len(crossed), RECENCY_REFRESH_BATCH_SIZE):
+                    batch = crossed[start:start + RECENCY_REFRESH_BATCH_SIZE]
+                    response = await self.db.execute(self.db.rpc('refresh_match_recency', {
+                        'p_event_ids': [event_id for event_id, _ in batch],
+                        'p_recency_scores': [recency for _, recency in batch],
+                        'p_recency_weight': RECENCY_WEIGHT
+                    }))
+                    updated += response.data or 0
+        finally:
+            if updated:
+                await self.invalidate_listings()
+        
+        result = {'events': len(events), 'crossed': len(crossed), 'updated': updated}
+        await self.db.execute(
+            self.db.table('match_recompute_state').upsert({
+                'id': RECENCY_STATE_ID,
+                'watermark': refreshed_at.isoformat(),
+                'match_count': updated
+            })
+        )
+        logger.info(f"Refreshed recency: {result}")
+        
+        return result
+    
+    async def refresh_snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        Rebuild the match snapshot if a recompute finished since it was written.
         
-        matches_to_insert = []
+        Runs on its own schedule, so recomputes (incremental ones especially)
+        don't pay for rescoring and reserializing the whole grid. Each check
+        is one query for the recompute watermark; only a newer watermark
+        triggers a build, from the same catalogs live requests rank. One
+        process per machine builds at a time and the others map its file.
+        Returns the new snapshot's stats, or None if there was nothing to do.
+        """
+        if not self.snapshots.path:
+            return None
+        state = await self._load_recompute_state()
+        if state is None:
+            return None
+        source = state['watermark'].isoformat()
+        current = self.snapshots.reload()
+        if current is not None and current.source == source:
+            return None
         
-        for brand_data in brands_response.data:
-            brand = BrandProfile(**brand_data)
+        lock = self.snapshots.try_lock()
+        if lock is None:
+            return None
+        try:
+            # Another process may have finished this version while we checked
+            current = self.snapshots.reload()
+            if current is not None and current.source == source:
+                return None
+            with phase('snapshot', 'fetch'):
+                brands, events = await asyncio.gather(self.catalog.get('brands'), self.catalog.get('events'))
+                if min(brands.loaded_at, events.loaded_at) < state['watermark']:
+                    # Cached from before the recompute started, so it may predate what it scored
+                    self.catalog.invalidate()
+                    brands, events = await asyncio.gather(self.catalog.get('brands'), self.catalog.get('events'))
+            with phase('snapshot', 'build'):
+                await self._write_snapshot(brands.entities, events.entities, source)
+        finally:
+            self.snapshots.unlock(lock)
+        return self.snapshots.current.stats()
+    
+    async def _write_snapshot(self, brands: List[BrandRecord], events: List[EventRecord], source: str):
+        """Write every brand's and event's top matches to a new snapshot version and switch to it"""
+        def build(brands: List[BrandRecord], events: List[EventRecord]) -> int:
+            top_k = self.snapshots.top_k
+            # A shared catalog's records are made on access; make each once for the whole build
+            brands, events = list(brands), list(events)
+            brand_top, brand_scores, event_top, event_scores = self._top_k_grid(brands, events, top_k)
             
-            for event_data in events_response.data:
-                event = EventData(
-                    id=event_data['id'],
-                    title=event_data['title'],
-                    description=event_data['description'],
-                    event_date=datetime.fromisoformat(event_data['event_date']) if event_data['event_date'] else None,
-                    expected_attendance=event_data['expected_attendance'],
-                    event_type=event_data['event_type'],
-                    sponsorship_min_amount=event_data['sponsorship_min_amount'],
-                    sponsorship_max_amount=event_data['sponsorship_max_amount'],
-                    sponsorship_benefits=event_data['sponsorship_benefits'] or [],
-                    tags=event_data['tags'] or [],
-                    org_name=event_data['orgs']['name'],
-                    university=event_data['orgs']['university'],
-                    org_category=event_data['orgs']['category']
+            def serialize(entity_order: List[int], top: np.ndarray, scores: np.ndarray,
+                          by_brand: bool) -> Iterator[List[bytes]]:
+                # One entity's matches are built and serialized at a time
+                for position in entity_order:
+                    bodies = []
+                    for rank in range(top_k):
+                        other = int(top[position, rank])
+                        if other < 0:
+                            break
+                        pair_scores = tuple(scores[position, rank].tolist())
+                        brand, event = (brands[position], events[other]) if by_brand else (brands[other], events[position])
+                        bodies.append(self._build_match(brand, event, pair_scores).model_dump_json().encode())
+                    yield bodies
+            
+            brand_order = sorted(range(len(brands)), key=lambda position: brands[position].id)
+            event_order = sorted(range(len(events)), key=lambda position: events[position].id)
+            return write_snapshot(self.snapshots.path, self.snapshots.next_version(), top_k, {
+                'brand': SnapshotSide(
+                    [brands[position].id for position in brand_order],
+                    serialize(brand_order, brand_top, brand_scores, by_brand=True)
+                ),
+                'event': SnapshotSide(
+                    [events[position].id for position in event_order],
+                    serialize(event_order, event_top, event_scores, by_brand=False)
+                ),
+            }, source)
+        
+        size = await self._run_scoring(build, brands, events)
+        snapshot = self.snapshots.reload()
+        logger.info(f"Wrote match snapshot version {snapshot.version} ({size} bytes)")
+    
+    def _top_k_grid(self, brands: List[BrandRecord], events: List[EventRecord],
+                    top_k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Best top_k counterparts of every brand and of every event, in one pass over the grid.
+        
+        Returns (brand_top, brand_scores, event_top, event_scores): counterpart
+        positions per entity and rank, -1 past the last match at or above
+        threshold, and their score_components values. Order is
+        _select_top_matches': score descending, earlier position first.
+        
+        Memory is the results, 64 bytes per entity and rank, plus one block of
+        SNAPSHOT_PAIRS_PER_BLOCK pairs at a time.
+        """
+        brand_top = np.full((len(brands), top_k), -1, dtype=np.int64)
+        brand_scores = np.zeros((len(brands), top_k, 7))
+        # Running per-event best, merged with each block of brands as it is scored
+        event_top = np.full((len(events), top_k), -1, dtype=np.int64)
+        event_scores = np.zeros((len(events), top_k, 7))
+        if not brands or not events:
+            return brand_top, brand_scores, event_top, event_scores
+        
+        scorer = VectorizedScorer(
+            brands, events, self.calculate_recency_score, self.tag_vocabulary, self.tag_weight, self.text_weight
+        )
+        with phase('snapshot', 'score'):
+            for start, stop in scorer.block_ranges(SNAPSHOT_PAIRS_PER_BLOCK):
+                block = scorer.score_block(start, stop)
+                columns = (
+                    block.final, block.tag, block.budget, block.attendance,
+                    block.recency, block.demographic, block.text
                 )
+                # Below-threshold pairs sort after every eligible one and are then masked out
+                ranked = np.where(block.final >= 0.1, block.final, -np.inf)
                 
-                score, reasoning = self.compute_match_score(brand, event)
+                # Components are gathered for the top_k positions only, never stacked for the whole block
+                order = np.argsort(-ranked, axis=1, kind='stable')[:, :top_k]
+                keep = np.take_along_axis(ranked, order, axis=1) > -np.inf
+                width = order.shape[1]
+                brand_top[start:stop, :width] = np.where(keep, order, -1)
+                for c, column in enumerate(columns):
+                    brand_scores[start:stop, :width, c] = np.take_along_axis(column, order, axis=1)
                 
+                # Each event's best in the block, merged with its running best.
+                # Earlier brands are already in the running best, so a stable
+                # sort of [running; block best] gives ties to the earlier position
+                order = np.argsort(-ranked.T, axis=1, kind='stable')[:, :top_k]
+                block_scores = np.stack([np.take_along_axis(column.T, order, axis=1) for column in columns], axis=-1)
+                running_final = np.where(event_top >= 0, event_scores[:, :, 0], -np.inf)
+                merged_final = np.concatenate([running_final, np.take_along_axis(ranked.T, order, axis=1)], axis=1)
+                merged_top = np.concatenate([event_top, order + start], axis=1)
+                merged_scores = np.concatenate([event_scores, block_scores], axis=1)
+                order = np.argsort(-merged_final, axis=1, kind='stable')[:, :top_k]
+                keep = np.take_along_axis(merged_final, order, axis=1) > -np.inf
+                event_top = np.where(keep, np.take_along_axis(merged_top, order, axis=1), -1)
+                event_scores = np.take_along_axis(merged_scores, order[:, :, None], axis=1)
+        PAIRS_SCORED.labels('snapshot').inc(len(brands) * len(events))
+        
+        return brand_top, brand_scores, event_top, event_scores
+    
+    async def _stream_grid(self, brands: List[BrandRecord], events: List[EventRecord],
+                           writer: MatchWriter, progress: RecomputeProgress):
+        """
+        Score every brand against every event chunk by chunk, handing each
+        chunk's rows to the writer and deleting its pairs that fell below
+        threshold before the next chunk, so memory stays bounded by the chunk
+        size rather than the grid.
+        """
+        if not brands or not events:
+            return
+        
+        # Load the brand x event grid into the columnar kernel once
+        scorer = await self._run_scoring(
+            VectorizedScorer, brands, events, self.calculate_recency_score, self.tag_vocabulary,
+            self.tag_weight, self.text_weight
+        )
+        ranges = scorer.block_ranges(self.recompute_chunk_pairs)
+        builder = MatchRowBuilder(brands, events, self.tag_vocabulary)
+        
+        if self.recompute_workers > 1 and len(brands) > 1:
+            # Shard brands across worker processes, which also build and encode the rows;
+            # batches merge into the writer as shards finish. Shards are timed in the
+            # workers' own processes, so only the whole sharded pass is observed here
+            with phase('recompute', 'score'):
+                async with ShardPool(
+                    scorer, builder, 0.1, writer.batch_size, self.recompute_workers
+                ) as pool:
+                    async for shard in pool.score(ranges):
+                        await self._write_shard(shard, writer, progress)
+            return
+        
+        for start, stop in ranges:
+            with phase('recompute', 'score'):
                 # Only store matches above minimum threshold
-                if score >= 0.1:
-                    matches_to_insert.append({
-                        'brand_id': brand.id,
-                        'event_id': event.id,
-                        'score': score,
-                        'reasoning': reasoning.dict()
-                    })
-        
-        # Batch insert matches
-        if matches_to_insert:
-            self.supabase.table('matches').insert(matches_to_insert).execute()
-        
-        return len(matches_to_insert)
-    
-    async def get_brand_matches(self, brand_id: str, limit: int = 50, min_score: float = 0.1) -> List[Dict]:
-        """Get stored matches for a brand"""
-        response = self.supabase.table('matches').select(
-            'id, score, reasoning, events(title, event_date, orgs(name, university))'
-        ).eq('brand_id', brand_id).gte('score', min_score).order('score', desc=True).limit(limit).execute()
-        
-        return response.data
-    
-    async def get_event_matches(self, event_id: str, limit: int = 50, min_score: float = 0.1) -> List[Dict]:
-        """Get stored matches for an event"""
-        response = self.supabase.table('matches').select(
-            'id, score, reasoning, brands(company_name, industry)'
-        ).eq('event_id', event_id).gte('score', min_score).order('score', desc=True).limit(limit).execute()
-        
-        return response.data
\ No newline at end of file
+                shard = await self._run_scoring(score_shard, scorer, builder, start, stop, 0.1, writer.batch_size)
+            await self._write_shard(shard, writer, progress)
+    
+    async def _write_shard(self, shard: ShardRows, writer: MatchWriter, progress: RecomputeProgress):
+        """Queue a scored chunk's rows for upsert and delete its pairs that fell below threshold"""
+        progress.add_scored(sum(batch.rows for batch in shard.batches) + len(shard.below))
+        await writer.write(shard.batches)
+        await self._delete_pairs(shard.below)
+    
+    async def _delete_pairs(self, below_threshold: List[Tuple[str, str]]):
+        """Delete rescored (brand_id, event_id) pairs that fell below threshold"""
+        events_by_brand: Dict[str, List[str]] = {}
+        for brand_id, event_id in below_threshold:
+            events_by_brand.setdefault(brand_id, []).append(event_id)
+        
+        with phase('recompute', 'prune'):
+            for brand_id, event_ids in events_by_brand.items():
+                for start in range(0, len(event_ids), PRUNE_BATCH_SIZE):
+                    await self.db.execute(
+                        self.db.table('matches').delete().eq('brand_id', brand_id).in_(
+                            'event_id', event_ids[start:start + PRUNE_BATCH_SIZE]
+                        )
+                    )
+    
+    async def _prune_matches(self, stale_brand_ids: List[str], stale_event_ids: List[str]):
+        """Delete rows of brands and events no longer eligible"""
+        for column, ids in (('brand_id', stale_brand_ids), ('event_id', stale_event_ids)):
+            for start in range(0, len(ids), PRUNE_BATCH_SIZE):
+                await self.db.execute(
+                    self.db.table('matches').delete().in_(
+                        column, ids[start:start + PRUNE_BATCH_SIZE]
+                    )
+                )
+    
+    def _changed_since(self, updated_at: Optional[str], watermark: Optional[datetime]) -> bool:
+        if watermark is None or not updated_at:
+            return True
+        return datetime.fromisoformat(updated_at) > watermark
+    
+    async def _load_watermark(self, state_id: str = RECOMPUTE_STATE_ID) -> Optional[datetime]:
+        """Watermark of the last successful run, None if there hasn't been one"""
+        response = await self.db.execute(
+            self.db.table('match_recompute_state').select('watermark').eq(
+                'id', state_id
+            )
+        )
+        
+        if not response.data or not response.data[0]['watermark']:
+            return None
+        return datetime.fromisoformat(response.data[0]['watermark'])
+    
+    async def _load_recompute_state(self) -> Optional[Dict[str, Any]]:
+        """
+        Watermark, text model (fingerprint and IDF), text weight and text
+        similarity drift of the last successful recompute, None if there
+        hasn't been one
+        """
+        response = await self.db.execute(
+            self.db.table('match_recompute_state').select(
+                'watermark, text_model, text_idf, text_weight, text_drift'
+            ).eq('id', RECOMPUTE_STATE_ID)
+        )
+        
+        if not response.data or not response.data[0]['watermark']:
+            return None
+        state = response.data[0]
+        return {
+            'watermark': datetime.fromisoformat(state['watermark']),
+            'text_model': state.get('text_model'),
+            'text_idf': state.get('text_idf'),
+            'text_weight': state.get('text_weight'),
+            'text_drift': state.get('text_drift') or 0.0
+        }
+    
+    async def _save_watermark(self, watermark: datetime, result: Dict[str, int], text_model: TextModel,
+                              text_drift: float):
+        await self.db.execute(
+            self.db.table('match_recompute_state').upsert({
+                'id': RECOMPUTE_STATE_ID,
+                'watermark': watermark.isoformat(),
+                'match_count': result['count'],
+                'rescored': result['rescored'],
+                'skipped': result['skipped'],
+                'text_model': text_model.fingerprint(),
+                'text_idf': text_model.weights(),
+                'text_weight': self.text_weight,
+                'text_drift': text_drift
+            })
+        )
+    
+    async def listing_source(self) -> str:
+        """
+        Token the listing caches of every process derive their generation from.
+        
+        Changes whenever a recompute or recency refresh finishes or listings
+        are invalidated anywhere, since each of those moves a watermark in
+        match_recompute_state. One small query, made every few seconds at most.
+        """
+        response = await self.db.execute(self.db.table('match_recompute_state').select('id, watermark'))
+        return ';'.join(sorted(f"{row['id']}={row['watermark']}" for row in response.data or []))
+    
+    async def invalidate_listings(self):
+        """Drop cached listings here at once, and in every other process at its next source check"""
+        self.listings.invalidate()
+        await self.db.execute(
+            self.db.table('match_recompute_state').upsert({
+                'id': LISTINGS_STATE_ID,
+                'watermark': datetime.now(timezone.utc).isoformat()
+            })
+        )
+    
+    async def get_brand_matches(self, brand_id: str, limit: int = 50, min_score: float = 0.1,
+                                after: Optional[Keyset] = None) -> List[Dict]:
+        """Get stored matches for a brand, best first, resuming after a (score, id) keyset"""
+        return await self._match_page(BRAND_LISTING_COLUMNS, 'brand_id', brand_id, limit, min_score, after)
+    
+    async def get_event_matches(self, event_id: str, limit: int = 50, min_score: float = 0.1,
+                                after: Optional[Keyset] = None) -> List[Dict]:
+        """Get stored matches for an event, best first, resuming after a (score, id) keyset"""
+        return await self._match_page(EVENT_LISTING_COLUMNS, 'event_id', event_id, limit, min_score, after)
+    
+    async def _match_page(self, columns: str, column: str, entity_id: str, limit: int,
+                          min_score: float, after: Optional[Keyset]) -> List[Dict]:
+        """
+        One page of stored matches in (score desc, id) order.
+        
+        After a keyset, the page is the rest of the ties at its score followed
+        by the rows scoring lower: two index range reads, where an offset would
+        make the database walk every row before the page.
+        """
+        def listing():
+            return self.db.table('matches').select(columns).eq(column, entity_id).gte('score', min_score)
+        
+        if after is None:
+            response = await self.db.execute(listing().order('score', desc=True).order('id').limit(limit))
+            return response.data
+        
+        score, match_id = after
+        response = await self.db.execute(listing().eq('score', score).gt('id', match_id).order('id').limit(limit))
+        rows = response.data
+        if len(rows) < limit:
+            response = await self.db.execute(
+                listing().lt('score', score).order('score', desc=True).order('id').limit(limit - len(rows))
+            )
+            rows = rows + response.data
+        return rows
+    
+    async def get_match_listing(self, kind: str, entity_id: str, limit: int = 50,
+                                min_score: float = 0.1, cursor: Optional[str] = None,
+                                weights: Optional[ScoreWeights] = None) -> CachedListing:
+        """
+        A page of stored matches for a brand or event ('brand' / 'event'), served from the listing cache
+        
+        cursor is the previous page's next_cursor; an invalid one raises InvalidCursor.
+        With weights, stored matches are re-ranked by their stored components.
+        """
+        fetch_page = self._listing_fetcher(kind)
+        after = decode_cursor(cursor) if cursor else None
+        
+        async def loader():
+            if weights is None:
+                rows = await fetch_page(entity_id, limit, min_score, after)
+            else:
+                ranked = await self._weighted_listing(kind, entity_id, weights, min_score)
+                rows = rows_after(ranked, after)[:limit]
+            return rows, next_cursor(rows, limit)
+        
+        return await self.listings.get((kind, entity_id, limit, min_score, cursor, weights), loader)
+    
+    async def iter_match_listing(self, kind: str, entity_id: str, min_score: float = 0.1,
+                                 limit: Optional[int] = None, cursor: Optional[str] = None,
+                                 page_size: int = DEFAULT_LISTING_PAGE_SIZE,
+                                 weights: Optional[ScoreWeights] = None) -> AsyncIterator[List[Dict]]:
+        """
+        Stored matches for a brand or event, page by page, bypassing the listing cache.
+        
+        Each page resumes from the last row of the one before, so only one page
+        is held at a time however long the listing; limit None reads all of it.
+        A re-weighted listing has to be ranked whole before its first page.
+        """
+        fetch_page = self._listing_fetcher(kind)
+        after = decode_cursor(cursor) if cursor else None
+        if weights is not None:
+            ranked = rows_after(await self._weighted_listing(kind, entity_id, weights, min_score), after)[:limit]
+            for start in range(0, len(ranked), page_size):
+                yield ranked[start:start + page_size]
+            return
+        
+        remaining = limit
+        
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            rows = await fetch_page(entity_id, size, min_score, after)
+            if rows:
+                yield rows
+            if len(rows) < size:
+                return
+            after = row_keyset(rows[-1])
+            if remaining is not None:
+                remaining -= len(rows)
+    
+    async def _weighted_listing(self, kind: str, entity_id: str, weights: ScoreWeights,
+                                min_score: float) -> List[Dict]:
+        """
+        Every stored match of a brand or event, re-scored under weights, in (score desc, id) order.
+        
+        Rows are read with their component columns a page at a time and
+        re-weighted in one vectorized pass. Only stored pairs can appear, so
+        a pair pruned under the default weights stays out of the listing.
+        """
+        if kind == 'brand':
+            listing_columns, column = BRAND_LISTING_COLUMNS, 'brand_id'
+        elif kind == 'event':
+            listing_columns, column = EVENT_LISTING_COLUMNS, 'event_id'
+        else:
+            raise ValueError(f"Unknown listing kind: {kind}")
+        columns = f"{listing_columns}, {', '.join(COMPONENT_COLUMNS)}"
+        
+        rows: List[Dict] = []
+        after = None
+        while True:
+            page = await self._match_page(columns, column, entity_id, DEFAULT_LISTING_PAGE_SIZE, 0.0, after)
+            rows.extend(page)
+            if len(page) < DEFAULT_LISTING_PAGE_SIZE:
+                break
+            after = row_keyset(page[-1])
+        
+        with phase('listing', 'rerank'):
+            # In id order, ties on score come out by id like the stored listing
+            rows.sort(key=lambda row: row['id'])
+            components = np.array([stored_components(row) for row in rows], dtype=np.float64).reshape(-1, len(COMPONENT_COLUMNS))
+            top, scores = top_weighted(components, weights, None, min_score)
+            ranked = []
+            for position, score in zip(top.tolist(), scores.tolist()):
+                row = {name: value for name, value in rows[position].items() if name not in COMPONENT_COLUMNS}
+                row['score'] = score
+                ranked.append(row)
+        return ranked
+    
+    def _listing_fetcher(self, kind: str) -> Callable[..., Any]:
+        if kind == 'brand':
+            return self.get_brand_matches
+        if kind == 'event':
+            return self.get_event_matches
+        raise ValueError(f"Unknown listing kind: {kind}")
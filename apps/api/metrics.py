@@ -0,0 +1,116 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from demographics import cache_stats as demographic_cache_stats
+
+# From sub-millisecond request phases up to multi-minute full recomputes
+PHASE_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+PHASE_SECONDS = Histogram(
+    'plugcu_match_phase_seconds',
+    'Time spent in each phase (fetch, parse, score, select, serialize, write, prune) of a matching operation',
+    ['operation', 'phase'],
+    buckets=PHASE_BUCKETS,
+)
+PAIRS_SCORED = Counter(
+    'plugcu_match_pairs_scored',
+    'Brand/event pairs scored; rate() gives pairs per second',
+    ['operation'],
+)
+RECOMPUTE_PAIRS_PER_SECOND = Gauge(
+    'plugcu_recompute_pairs_per_second',
+    'Scoring and write throughput of the last completed recompute',
+)
+STARTUP_SECONDS = Gauge(
+    'plugcu_startup_seconds',
+    'Time this process spent in each startup phase before it was ready',
+    ['phase'],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'plugcu_http_requests_in_flight',
+    'HTTP requests currently being handled',
+)
+REQUEST_SECONDS = Histogram(
+    'plugcu_http_request_seconds',
+    'HTTP request latency by route template',
+    ['method', 'route', 'status'],
+    buckets=PHASE_BUCKETS,
+)
+
+
+@contextmanager
+def phase(operation: str, name: str) -> Iterator[None]:
+    """Observe the wall time of the block under (operation, phase)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASE_SECONDS.labels(operation, name).observe(time.perf_counter() - start)
+
+
+class EngineCollector(Collector):
+    """
+    Catalog, listing cache, demographic memo and snapshot figures read at
+    scrape time, so they cost nothing between scrapes.
+    """
+
+    def __init__(self, engine: Any):
+        self.engine = engine
+
+    def collect(self):
+        entries = GaugeMetricFamily(
+            'plugcu_catalog_entries', 'Entries in the cached catalog snapshot', labels=['kind']
+        )
+        age = GaugeMetricFamily(
+            'plugcu_catalog_age_seconds', 'Age of the cached catalog snapshot', labels=['kind']
+        )
+        lookups = CounterMetricFamily(
+            'plugcu_catalog_lookups', 'Catalog snapshot lookups by result', labels=['kind', 'result']
+        )
+        for kind, stats in self.engine.catalog.stats()['catalogs'].items():
+            entries.add_metric([kind], stats['size'])
+            if stats['age_seconds'] is not None:
+                age.add_metric([kind], stats['age_seconds'])
+            lookups.add_metric([kind, 'hit'], stats['hits'])
+            lookups.add_metric([kind, 'miss'], stats['misses'])
+
+        listing_stats = self.engine.listings.stats()
+        listing_entries = GaugeMetricFamily(
+            'plugcu_listing_cache_entries', 'Stored match listings held in the response cache'
+        )
+        listing_entries.add_metric([], listing_stats['entries'])
+        listing_lookups = CounterMetricFamily(
+            'plugcu_listing_cache_lookups', 'Listing cache lookups by result', labels=['result']
+        )
+        listing_lookups.add_metric(['hit'], listing_stats['hits'])
+        listing_lookups.add_metric(['miss'], listing_stats['misses'])
+
+        demographic_stats = demographic_cache_stats()
+        demographic_lookups = CounterMetricFamily(
+            'plugcu_demographic_cache_lookups', 'Memoized demographic match lookups by result', labels=['result']
+        )
+        demographic_lookups.add_metric(['hit'], demographic_stats['hits'])
+        demographic_lookups.add_metric(['miss'], demographic_stats['misses'])
+
+        snapshot_stats = self.engine.snapshots.stats()
+        snapshot_age = GaugeMetricFamily(
+            'plugcu_match_snapshot_age_seconds', 'Age of the mapped recompute snapshot'
+        )
+        if snapshot_stats['snapshot']:
+            snapshot_age.add_metric([], snapshot_stats['snapshot']['age_seconds'])
+        snapshot_lookups = CounterMetricFamily(
+            'plugcu_match_snapshot_lookups', 'compute-matches requests answered from the snapshot', labels=['result']
+        )
+        snapshot_lookups.add_metric(['hit'], snapshot_stats['hits'])
+        snapshot_lookups.add_metric(['miss'], snapshot_stats['misses'])
+
+        yield from (
+            entries, age, lookups, listing_entries, listing_lookups, demographic_lookups,
+            snapshot_age, snapshot_lookups
+        )
@@ -42,10 +42,29 @@ class EventData(BaseModel):
     university: str
     org_category: Optional[str] = None
 
+class WeightOverrides(BaseModel):
+    """Relative weights for individual score components; unset ones come from the profile"""
+    tag: Optional[float] = Field(default=None, ge=0)
+    budget: Optional[float] = Field(default=None, ge=0)
+    attendance: Optional[float] = Field(default=None, ge=0)
+    recency: Optional[float] = Field(default=None, ge=0)
+    demographic: Optional[float] = Field(default=None, ge=0)
+    text: Optional[float] = Field(default=None, ge=0)
+
 class MatchRequest(BaseModel):
     event_id: Optional[str] = None
     brand_id: Optional[str] = None
     limit: Optional[int] = Field(default=50, ge=1, le=100)
+    # Only return counterparts whose budget range overlaps the requester's
+    budget_overlap_only: bool = False
+    # Rank under a named weight profile and/or per-component weights instead of the default
+    weight_profile: Optional[str] = None
+    weights: Optional[WeightOverrides] = None
+
+class BatchMatchRequest(BaseModel):
+    brand_ids: List[str] = Field(default=[], max_length=500)
+    event_ids: List[str] = Field(default=[], max_length=500)
+    limit: Optional[int] = Field(default=50, ge=1, le=100)
 
 class MatchReasoning(BaseModel):
     tag_overlap_score: float = Field(ge=0, le=1)
@@ -53,6 +72,8 @@ class MatchReasoning(BaseModel):
     attendance_score: float = Field(ge=0, le=1)
     recency_score: float = Field(ge=0, le=1)
     demographic_match_score: float = Field(ge=0, le=1)
+    # Absent from matches stored before descriptions were scored
+    text_similarity_score: float = Field(default=0.0, ge=0, le=1)
     
     explanation: str
     matched_tags: List[str] = []
@@ -77,6 +98,15 @@ class MatchResponse(BaseModel):
     
     created_at: datetime
 
+class BatchMatchResponse(BaseModel):
+    # Top matches keyed by requested id, in request order
+    brand_matches: Dict[str, List[MatchResponse]] = {}
+    event_matches: Dict[str, List[MatchResponse]] = {}
+    
+    # Requested ids that don't exist (or, for events, aren't published)
+    missing_brand_ids: List[str] = []
+    missing_event_ids: List[str] = []
+
 class CreateMatchRequest(BaseModel):
     brand_id: str
     event_id: str
@@ -0,0 +1,55 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Rows fetched per backend round-trip when streaming a listing
+DEFAULT_LISTING_PAGE_SIZE = 1000
+
+# Stored match listings are ordered by score, highest first, then by match id
+Keyset = Tuple[float, str]
+
+
+class InvalidCursor(ValueError):
+    """A pagination cursor that wasn't issued by this API"""
+
+
+def encode_cursor(keyset: Keyset) -> str:
+    """Opaque cursor for the position just after a (score, id) keyset"""
+    payload = json.dumps(list(keyset), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Keyset:
+    """(score, id) keyset a cursor points after"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        score, match_id = json.loads(payload)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not isinstance(match_id, str):
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+    return float(score), match_id
+
+
+def row_keyset(row: Dict[str, Any]) -> Keyset:
+    """Keyset of a stored match row"""
+    return float(row['score']), row['id']
+
+
+def next_cursor(rows: list, limit: Optional[int]) -> Optional[str]:
+    """Cursor for the page after rows, or None if rows didn't fill the page and so were the last"""
+    if not rows or limit is None or len(rows) < limit:
+        return None
+    return encode_cursor(row_keyset(rows[-1]))
+
+
+def rows_after(rows: List[Dict[str, Any]], after: Optional[Keyset]) -> List[Dict[str, Any]]:
+    """The rows of a (score desc, id) ordered listing that come after a keyset"""
+    if after is None:
+        return rows
+    score, match_id = after
+    for position, row in enumerate(rows):
+        if row['score'] < score or (row['score'] == score and row['id'] > match_id):
+            return rows[position:]
+    return []
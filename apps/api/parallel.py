@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Iterable, List, NamedTuple, Optional, Tuple
+from match_rows import MatchRowBuilder, SerializedBatch
+from scoring import VectorizedScorer
+
+# Set in each worker process by _init_worker
+_worker_scorer: Optional[VectorizedScorer] = None
+_worker_rows: Optional[MatchRowBuilder] = None
+_worker_threshold = 0.0
+_worker_batch_size = 0
+
+
+class ShardRows(NamedTuple):
+    """A scored shard: its rows to store as serialized upsert batches, and its (brand_id, event_id) pairs below threshold"""
+    batches: List[SerializedBatch]
+    below: List[Tuple[str, str]]
+
+
+def _init_worker(scorer: VectorizedScorer, rows: MatchRowBuilder, threshold: float, batch_size: int):
+    global _worker_scorer, _worker_rows, _worker_threshold, _worker_batch_size
+    _worker_scorer = scorer
+    _worker_rows = rows
+    _worker_threshold = threshold
+    _worker_batch_size = batch_size
+
+
+def score_shard(scorer: VectorizedScorer, rows: MatchRowBuilder, start: int, stop: int,
+                threshold: float, batch_size: int) -> ShardRows:
+    """Score brands[start:stop] against every event and build the shard's rows, in a worker or in-process"""
+    pairs = scorer.threshold_pairs(start, stop, threshold)
+    return ShardRows(rows.serialized(pairs, batch_size), rows.below_threshold(pairs))
+
+
+def _score_shard(start: int, stop: int) -> ShardRows:
+    return score_shard(_worker_scorer, _worker_rows, start, stop, _worker_threshold, _worker_batch_size)
+
+
+def process_context():
+    """
+    Start method for shard workers, None where there is none to use.
+
+    Workers start from a fresh forkserver (or spawned) process rather than
+    a fork of the API process, which already runs thread pools whose locks
+    a fork could copy mid-operation.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    if 'forkserver' in methods:
+        context = multiprocessing.get_context('forkserver')
+        # Imported once in the server instead of in every worker
+        context.set_forkserver_preload(['parallel'])
+        return context
+    if 'spawn' in methods:
+        return multiprocessing.get_context('spawn')
+    return None
+
+
+class ShardPool:
+    """
+    Process pool that scores brand shards of one VectorizedScorer in parallel.
+
+    The scorer (only the arrays score_block reads) and a MatchRowBuilder are
+    pickled to each worker once through the pool initializer, and each task
+    ships a (start, stop) brand range. Workers build the shard's rows and
+    send them back as JSON upsert batches of batch_size, ready to write, so
+    the parent only forwards strings: building the rows costs far more than
+    scoring, and done in the parent it would cap the speedup at little more
+    than one worker's worth.
+
+    Use as an async context manager. Leaving normally waits for the workers
+    to exit off the event loop; leaving on an error or cancellation cancels
+    queued shards and returns at once, and shards already running finish in
+    the background.
+    """
+
+    def __init__(self, scorer: VectorizedScorer, rows: MatchRowBuilder, threshold: float,
+                 batch_size: int, workers: int):
+        self.workers = workers
+        # Keep a couple of shards queued per worker without holding the whole run
+        self.max_in_flight = workers * 2
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=process_context(),
+            initializer=_init_worker,
+            initargs=(scorer, rows, threshold, batch_size),
+        )
+
+    async def __aenter__(self) -> 'ShardPool':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            return False
+        await asyncio.get_running_loop().run_in_executor(None, self._pool.shutdown)
+        return False
+
+    async def score(self, ranges: Iterable[Tuple[int, int]]) -> AsyncIterator[ShardRows]:
+        """Yield each shard's pairs as it completes, in no particular order"""
+        loop = asyncio.get_running_loop()
+        pending = set()
+
+        try:
+            for start, stop in ranges:
+                pending.add(loop.run_in_executor(self._pool, _score_shard, start, stop))
+                if len(pending) >= self.max_in_flight:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            # Shards not started yet are dropped rather than left for shutdown
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,127 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from vocabulary import TagVocabulary
+from text_index import TextVector, EMPTY_TEXT_VECTOR
+from demographics import demographic_signature
+
+# Record attributes a shared catalog file stores as columns, in constructor
+# order, and how: 'str', 'int' and 'datetime' (kept as ISO text) may be None;
+# 'category' is a string or None from a small set, stored as codes into a
+# table of the distinct values; 'strs' is a list of such strings. tag_mask
+# and text_vector are stored apart
+BRAND_RECORD_COLUMNS = (
+    ('id', 'str'), ('company_name', 'str'), ('company_size', 'category'), ('target_demographics', 'strs'),
+    ('budget_range_min', 'int'), ('budget_range_max', 'int'), ('preferred_event_types', 'strs'),
+)
+EVENT_RECORD_COLUMNS = (
+    ('id', 'str'), ('title', 'str'), ('event_date', 'datetime'), ('expected_attendance', 'int'),
+    ('sponsorship_min_amount', 'int'), ('sponsorship_max_amount', 'int'), ('tags', 'strs'),
+    ('org_name', 'category'), ('university', 'category'), ('org_category', 'category'),
+)
+
+
+def brand_document(row: Dict[str, Any]) -> str:
+    """Free text of a brands row that feeds text similarity"""
+    return row.get('description') or ''
+
+
+def event_document(row: Dict[str, Any]) -> str:
+    """Free text of an events row that feeds text similarity"""
+    return ' '.join([row.get('description') or ''] + list(row.get('sponsorship_benefits') or []))
+
+
+class BrandRecord:
+    """
+    A brand as the scoring loops see it, parsed once from a brands row.
+
+    Attribute names match BrandProfile so the scalar helpers accept either,
+    but there is no validation and no per-instance dict. tag_mask is the
+    brand's tags in the engine's vocabulary; size_preferences is the list
+    calculate_attendance_score expects and demographic_signature the memo key
+    for demographic matching. text_vector is empty until a catalog
+    or recompute vectorizes the description with its TextModel.
+    """
+
+    __slots__ = (
+        'id', 'company_name', 'company_size', 'target_demographics', 'demographic_signature',
+        'budget_range_min', 'budget_range_max', 'preferred_event_types', 'size_preferences', 'tag_mask',
+        'text_vector',
+    )
+
+    def __init__(self, id: str, company_name: str, company_size: Optional[str],
+                 target_demographics: List[str], budget_range_min: Optional[int],
+                 budget_range_max: Optional[int], preferred_event_types: List[str], tag_mask: int):
+        self.id = id
+        self.company_name = company_name
+        self.company_size = company_size
+        self.target_demographics = target_demographics
+        self.demographic_signature = demographic_signature(target_demographics)
+        self.budget_range_min = budget_range_min
+        self.budget_range_max = budget_range_max
+        self.preferred_event_types = preferred_event_types
+        self.size_preferences = [company_size] if company_size else []
+        self.tag_mask = tag_mask
+        self.text_vector: TextVector = EMPTY_TEXT_VECTOR
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any], vocabulary: TagVocabulary) -> 'BrandRecord':
+        preferred_event_types = row.get('preferred_event_types') or []
+        return cls(
+            id=row['id'],
+            company_name=row['company_name'],
+            company_size=row.get('company_size'),
+            target_demographics=row.get('target_demographics') or [],
+            budget_range_min=row.get('budget_range_min'),
+            budget_range_max=row.get('budget_range_max'),
+            preferred_event_types=preferred_event_types,
+            tag_mask=vocabulary.mask(preferred_event_types),
+        )
+
+
+class EventRecord:
+    """
+    An event joined with its org as the scoring loops see it, parsed once
+    from an events row (event_date already a datetime). Attribute names match
+    EventData; text_vector is filled in the same way as BrandRecord's.
+    """
+
+    __slots__ = (
+        'id', 'title', 'event_date', 'expected_attendance', 'sponsorship_min_amount',
+        'sponsorship_max_amount', 'tags', 'org_name', 'university', 'org_category', 'tag_mask',
+        'text_vector',
+    )
+
+    def __init__(self, id: str, title: str, event_date: Optional[datetime],
+                 expected_attendance: Optional[int], sponsorship_min_amount: Optional[int],
+                 sponsorship_max_amount: Optional[int], tags: List[str], org_name: str,
+                 university: str, org_category: Optional[str], tag_mask: int):
+        self.id = id
+        self.title = title
+        self.event_date = event_date
+        self.expected_attendance = expected_attendance
+        self.sponsorship_min_amount = sponsorship_min_amount
+        self.sponsorship_max_amount = sponsorship_max_amount
+        self.tags = tags
+        self.org_name = org_name
+        self.university = university
+        self.org_category = org_category
+        self.tag_mask = tag_mask
+        self.text_vector: TextVector = EMPTY_TEXT_VECTOR
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any], vocabulary: TagVocabulary) -> 'EventRecord':
+        tags = row.get('tags') or []
+        org = row['orgs']
+        return cls(
+            id=row['id'],
+            title=row['title'],
+            event_date=datetime.fromisoformat(row['event_date']) if row.get('event_date') else None,
+            expected_attendance=row.get('expected_attendance'),
+            sponsorship_min_amount=row.get('sponsorship_min_amount'),
+            sponsorship_max_amount=row.get('sponsorship_max_amount'),
+            tags=tags,
+            org_name=org['name'],
+            university=org['university'],
+            org_category=org.get('category'),
+            tag_mask=vocabulary.mask(tags),
+        )
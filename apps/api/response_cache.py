@@ -0,0 +1,143 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from metrics import phase
+
+# Backstop for writes that bypass recompute (e.g. matches created from the web app)
+DEFAULT_LISTING_TTL_SECONDS = 60.0
+DEFAULT_LISTING_MAX_ENTRIES = 10_000
+
+# How often a cache asks whether stored matches changed in another process
+DEFAULT_LISTING_CHECK_INTERVAL_SECONDS = 2.0
+
+
+class CachedListing:
+    """
+    A serialized match listing page, the ETag derived from its bytes and the
+    source it was read under, and the next page's cursor
+    """
+
+    def __init__(self, body: bytes, generation: int, next_cursor: Optional[str] = None, source: str = ''):
+        self.body = body
+        self.next_cursor = next_cursor
+        self.etag = f'"{hashlib.blake2b(source.encode() + b"|" + body, digest_size=16).hexdigest()}"'
+        self.generation = generation
+        self.source = source
+        self._stored_monotonic = time.monotonic()
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self._stored_monotonic
+
+    def matches_etag(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header value names this listing"""
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        # Weak comparison, as RFC 9110 requires for If-None-Match
+        return '*' in tags or any(tag.removeprefix('W/') == self.etag for tag in tags)
+
+
+class ListingCache:
+    """
+    Read-through LRU cache of stored match listings, serialized once per fill.
+
+    Entries are keyed by whatever identifies a listing page (entity, limit,
+    min_score, cursor) and expire after a TTL. invalidate() starts a new
+    generation: every cached entry is dropped, and a load that began before
+    the invalidation is returned to its caller but not stored, so a listing
+    read mid-recompute never outlives the recompute.
+
+    invalidate() only reaches this process. Writes made by other processes
+    are seen through source, which returns a token that changes whenever
+    stored matches may have (e.g. the recompute watermark). It is checked
+    at most every check_interval_seconds, and a new token drops the cache
+    like invalidate(). The token is part of every key and ETag, so a
+    listing read under one source is never served, or revalidated, under
+    another.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_LISTING_TTL_SECONDS,
+                 max_entries: int = DEFAULT_LISTING_MAX_ENTRIES,
+                 source: Optional[Callable[[], Awaitable[str]]] = None,
+                 check_interval_seconds: float = DEFAULT_LISTING_CHECK_INTERVAL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.check_interval_seconds = check_interval_seconds
+        self.generation = 0
+        self.source = ''
+        self._source_loader = source
+        self._source_checked_monotonic: Optional[float] = None
+        self._entries: 'OrderedDict[Hashable, CachedListing]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, key: Hashable,
+                  loader: Callable[[], Awaitable[Tuple[Any, Optional[str]]]]) -> CachedListing:
+        """Cached listing for key; on a miss loader returns the rows and the next page's cursor"""
+        source = await self._check_source()
+        key = (source, key)
+        entry = self._entries.get(key)
+        if entry is not None and entry.age_seconds < self.ttl_seconds:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        generation = self.generation
+        with phase('listing', 'fetch'):
+            data, next_cursor = await loader()
+        with phase('listing', 'serialize'):
+            entry = CachedListing(json.dumps(data, separators=(',', ':')).encode(), generation, next_cursor, source)
+
+        if generation == self.generation:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    async def _check_source(self) -> str:
+        """The current source token, asking for it if the last check is older than the interval"""
+        if self._source_loader is None:
+            return self.source
+        now = time.monotonic()
+        checked = self._source_checked_monotonic
+        if checked is not None and now - checked < self.check_interval_seconds:
+            return self.source
+        # Marked before the query, so concurrent requests don't all ask
+        self._source_checked_monotonic = now
+        try:
+            source = await self._source_loader()
+        except BaseException:
+            self._source_checked_monotonic = checked
+            raise
+        if source != self.source:
+            self.source = source
+            # Nothing is cached before the first check
+            if checked is not None:
+                self.invalidate()
+        return source
+
+    def invalidate(self):
+        """Drop every cached listing, including loads still in flight"""
+        self.generation += 1
+        self._entries.clear()
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries": self.max_entries,
+            "entries": len(self._entries),
+            "generation": self.generation,
+            "source": self.source,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+        }
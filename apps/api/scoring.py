@@ -0,0 +1,274 @@
+import numpy as np
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+from datetime import datetime
+from records import BrandRecord, EventRecord
+from vocabulary import TagVocabulary
+from text_index import TextMatrix
+from demographics import category_match, targets_students, university_match
+
+# Upper bound on pairs scored per block, keeps block memory bounded
+DEFAULT_PAIRS_PER_BLOCK = 1 << 20
+
+# Weight of tag overlap when text similarity is switched off
+DEFAULT_TAG_WEIGHT = 0.35
+
+
+class ScoreBlock(NamedTuple):
+    """Component and final scores for a block of brands against every event"""
+    brand_start: int
+    tag: np.ndarray
+    budget: np.ndarray
+    demographic: np.ndarray
+    attendance: np.ndarray
+    recency: np.ndarray
+    final: np.ndarray
+    text: np.ndarray
+
+
+class ScoredPairs(NamedTuple):
+    """
+    Pairs of a score block split at a threshold: positions and component
+    scores of the pairs at or above it, positions of those below. Compact
+    enough to send back from a worker process.
+    """
+    brand_positions: np.ndarray
+    event_positions: np.ndarray
+    final: np.ndarray
+    tag: np.ndarray
+    budget: np.ndarray
+    attendance: np.ndarray
+    recency: np.ndarray
+    demographic: np.ndarray
+    text: np.ndarray
+    below_brand_positions: np.ndarray
+    below_event_positions: np.ndarray
+
+
+class VectorizedScorer:
+    """
+    Columnar scoring kernel for full brand x event recomputes.
+
+    The catalog is loaded into NumPy arrays once (tag matrices, budget bounds,
+    attendance, recency and demographic flags) and whole blocks of pairs are
+    scored with batched array operations. Every component mirrors the scalar
+    MatchingEngine.calculate_* helpers operation for operation, so the scores
+    are bit-for-bit identical to compute_match_score.
+
+    Tag columns come from the records' masks, so vocabulary must be the one
+    the records were built with. Text similarity comes from the records' text
+    vectors, which must share a TextModel.
+
+    Pickling keeps only what score_block reads, so a scorer can be handed to
+    worker processes without the records or the vocabulary.
+    """
+
+    def __init__(self, brands: List[BrandRecord], events: List[EventRecord],
+                 recency_fn: Callable[[Optional[datetime]], float], vocabulary: TagVocabulary,
+                 tag_weight: float = DEFAULT_TAG_WEIGHT, text_weight: float = 0.0):
+        # A shared catalog's records are made on access, so each one is made once here
+        self.brands = list(brands)
+        self.events = list(events)
+        self.vocabulary = vocabulary
+        self.tag_weight = tag_weight
+        self.text_weight = text_weight
+        self.event_text = TextMatrix(None, [event.text_vector for event in self.events])
+        self.brand_text = [brand.text_vector for brand in self.brands]
+        self._load_tags()
+        self._load_budgets()
+        self._load_attendance()
+        self._load_demographics()
+        self.recency = np.array([recency_fn(e.event_date) for e in self.events], dtype=np.float64)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['brands'] = state['events'] = state['vocabulary'] = None
+        return state
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.brand_text), len(self.event_text)
+
+    def _load_tags(self):
+        self.brand_masks = [brand.tag_mask for brand in self.brands]
+        self.event_masks = [event.tag_mask for event in self.events]
+
+        # Only tags that occur on both sides can intersect, so only they get columns
+        brand_union = event_union = 0
+        for mask in self.brand_masks:
+            brand_union |= mask
+        for mask in self.event_masks:
+            event_union |= mask
+        shared = self.vocabulary.ids(brand_union & event_union)
+        column = {tag_id: c for c, tag_id in enumerate(shared)}
+
+        # float32 holds the small integer intersection counts exactly and lets
+        # the intersection run through BLAS
+        def matrix(masks: List[int]) -> np.ndarray:
+            tags = np.zeros((len(masks), len(shared)), dtype=np.float32)
+            for i, mask in enumerate(masks):
+                tags[i, [column[t] for t in self.vocabulary.ids(mask) if t in column]] = 1.0
+            return tags
+
+        self.brand_tags = matrix(self.brand_masks)
+        self.event_tags = matrix(self.event_masks)
+        self.brand_tag_counts = np.array([m.bit_count() for m in self.brand_masks], dtype=np.float64)
+        self.event_tag_counts = np.array([m.bit_count() for m in self.event_masks], dtype=np.float64)
+
+    def _load_budgets(self):
+        def bounds(pairs):
+            lo = np.array([p[0] or 0 for p in pairs], dtype=np.float64)
+            hi = np.array([p[1] or 0 for p in pairs], dtype=np.float64)
+            # Zero counts as missing, same as the truthiness check in the scalar helper
+            complete = np.array([bool(p[0]) and bool(p[1]) for p in pairs], dtype=bool)
+            return lo, hi, complete
+
+        self.brand_budget_min, self.brand_budget_max, self.brand_budget_ok = bounds(
+            [(b.budget_range_min, b.budget_range_max) for b in self.brands]
+        )
+        self.event_budget_min, self.event_budget_max, self.event_budget_ok = bounds(
+            [(e.sponsorship_min_amount, e.sponsorship_max_amount) for e in self.events]
+        )
+
+    def _load_attendance(self):
+        base = np.empty(len(self.events), dtype=np.float64)
+        small_bonus = np.zeros(len(self.events), dtype=np.float64)
+        large_bonus = np.zeros(len(self.events), dtype=np.float64)
+
+        for j, event in enumerate(self.events):
+            attendance = event.expected_attendance
+            if not attendance:
+                base[j] = 0.5
+                continue
+            if attendance < 50:
+                base[j] = 0.3
+            elif attendance < 200:
+                base[j] = 0.7
+            elif attendance < 500:
+                base[j] = 0.9
+            else:
+                base[j] = 1.0
+            if attendance < 200:
+                small_bonus[j] = 0.2
+            if attendance > 200:
+                large_bonus[j] = 0.2
+
+        self.attendance_base = base
+        self.attendance_small_bonus = small_bonus
+        self.attendance_large_bonus = large_bonus
+        self.brand_prefers_small = np.array(
+            [b.company_size in ('startup', 'small') for b in self.brands], dtype=bool
+        )
+        self.brand_prefers_large = np.array(
+            [b.company_size in ('enterprise', 'large') for b in self.brands], dtype=bool
+        )
+
+    def _load_demographics(self):
+        signatures = [b.demographic_signature for b in self.brands]
+
+        # Side features come from the shared demographic memos, so brands with
+        # the same targets and events at the same university are scanned once
+        self.brand_has_demographics = np.array([bool(sig) for sig in signatures], dtype=bool)
+        self.brand_student = np.array([targets_students(sig) for sig in signatures], dtype=bool)
+        self.event_university = np.array([university_match(e.university) for e in self.events], dtype=bool)
+
+        # The category term depends on the pair, so score it once per distinct
+        # org category rather than once per event
+        categories = {}
+        event_category = np.full(len(self.events), -1, dtype=np.int64)
+        for j, event in enumerate(self.events):
+            if event.org_category:
+                event_category[j] = categories.setdefault(event.org_category.lower(), len(categories))
+
+        category_matches = np.zeros((len(self.brands), len(categories) + 1), dtype=bool)
+        for category, c in categories.items():
+            for i, sig in enumerate(signatures):
+                category_matches[i, c] = category_match(sig, category)
+
+        # Events without a category point at the trailing all-False column
+        event_category[event_category < 0] = len(categories)
+        self.event_category = event_category
+        self.brand_category_match = category_matches
+
+    def score_block(self, start: int, stop: int) -> ScoreBlock:
+        """Score brands[start:stop] against every event"""
+        rows = slice(start, stop)
+
+        # Tag overlap (Jaccard)
+        intersection = (self.brand_tags[rows] @ self.event_tags.T).astype(np.float64)
+        brand_counts = self.brand_tag_counts[rows, None]
+        event_counts = self.event_tag_counts[None, :]
+        union = brand_counts + event_counts - intersection
+        has_tags = (brand_counts > 0) & (event_counts > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tag = np.where(has_tags, intersection / union, 0.0)
+
+        # Budget alignment
+        b_min = self.brand_budget_min[rows, None]
+        b_max = self.brand_budget_max[rows, None]
+        e_min = self.event_budget_min[None, :]
+        e_max = self.event_budget_max[None, :]
+        overlap_start = np.maximum(b_min, e_min)
+        overlap_end = np.minimum(b_max, e_max)
+        overlap_size = overlap_end - overlap_start
+        brand_range = b_max - b_min
+        event_range = e_max - e_min
+        with np.errstate(divide='ignore', invalid='ignore'):
+            alignment = np.minimum(overlap_size / brand_range, overlap_size / event_range)
+        alignment = np.maximum(0.3, np.minimum(1.0, alignment))
+        alignment = np.where((brand_range == 0) | (event_range == 0), 0.8, alignment)
+        no_overlap = np.where(b_max < e_min, 0.1, 0.2)
+        budget = np.where(overlap_start > overlap_end, no_overlap, alignment)
+        complete = self.brand_budget_ok[rows, None] & self.event_budget_ok[None, :]
+        budget = np.where(complete, budget, 0.5)
+
+        # Attendance
+        bonus = np.where(self.brand_prefers_small[rows, None], self.attendance_small_bonus[None, :], 0.0)
+        bonus = np.where(self.brand_prefers_large[rows, None], self.attendance_large_bonus[None, :], bonus)
+        attendance = np.minimum(1.0, self.attendance_base[None, :] + bonus)
+
+        # Demographics, accumulated in the same order as the scalar helper
+        demographic = np.where(self.event_university[None, :], 0.3, 0.0)
+        category = self.brand_category_match[rows][:, self.event_category]
+        demographic = demographic + np.where(category, 0.4, 0.0)
+        demographic = demographic + np.where(self.brand_student[rows, None], 0.3, 0.0)
+        demographic = np.minimum(1.0, demographic)
+        demographic = np.where(self.brand_has_demographics[rows, None], demographic, 0.5)
+
+        recency = np.broadcast_to(self.recency, tag.shape)
+
+        # Text similarity, a sparse product over the shared description terms
+        text = self.event_text.dot_many(self.brand_text[rows])
+
+        final = (
+            self.tag_weight * tag +
+            0.25 * budget +
+            0.20 * demographic +
+            0.15 * attendance +
+            0.05 * recency +
+            self.text_weight * text
+        )
+
+        return ScoreBlock(start, tag, budget, demographic, attendance, recency, final, text)
+
+    def threshold_pairs(self, start: int, stop: int, threshold: float) -> ScoredPairs:
+        """Score brands[start:stop] against every event and split the pairs at threshold"""
+        block = self.score_block(start, stop)
+        keep = block.final >= threshold
+        rows, cols = np.nonzero(keep)
+        below_rows, below_cols = np.nonzero(~keep)
+        return ScoredPairs(
+            rows + start, cols,
+            block.final[rows, cols], block.tag[rows, cols], block.budget[rows, cols],
+            block.attendance[rows, cols], block.recency[rows, cols],
+            block.demographic[rows, cols], block.text[rows, cols],
+            below_rows + start, below_cols
+        )
+
+    def block_ranges(self, pairs_per_block: int = DEFAULT_PAIRS_PER_BLOCK) -> Iterator[Tuple[int, int]]:
+        """Yield (start, stop) brand ranges covering every brand, each roughly pairs_per_block pairs"""
+        n_brands, n_events = self.shape
+        if not n_brands or not n_events:
+            return
+        rows_per_block = max(1, pairs_per_block // n_events)
+        for start in range(0, n_brands, rows_per_block):
+            yield start, min(start + rows_per_block, n_brands)
@@ -0,0 +1,421 @@
+import asyncio
+import fcntl
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+import numpy as np
+from budget_index import BudgetColumns, BudgetIndex
+from snapshot import append_array, finish_mapped_file, map_columns, map_file
+from tag_index import TagColumns, TagIndex
+from text_index import EMPTY_TEXT_VECTOR, TextMatrix, TextModel, TextPostings, TextVector
+from vocabulary import TagVocabulary
+
+logger = logging.getLogger(__name__)
+
+CATALOG_MAGIC = b'PLUGCATL'
+# Bump when the layout or the record columns change, so older files are republished
+CATALOG_FORMAT = 2
+
+# How often a process checks whether another one published a newer catalog
+CATALOG_CHECK_INTERVAL_SECONDS = 5.0
+
+# What a catalog file holds per record: (attribute, kind) pairs in constructor order; see records.py
+RecordColumns = Tuple[Tuple[str, str], ...]
+
+
+class MappedTerms:
+    """
+    Term to id lookup over a catalog file's term column, sorted for binary
+    search. Stands in for the TextCorpus vocabulary in a mapped TextModel, so
+    vectorizing queries needs no per-process dict of terms.
+    """
+
+    def __init__(self, terms: np.ndarray, ids: np.ndarray):
+        self.terms = terms
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def get(self, term: str) -> Optional[int]:
+        key = term.encode()
+        position = int(np.searchsorted(self.terms, key))
+        if position == len(self.terms) or self.terms[position] != key:
+            return None
+        return int(self.ids[position])
+
+
+class MappedVectors:
+    """
+    Each row's TextVector over a catalog file's CSR vector columns, made on
+    access. Stands in for the list of vectors in a mapped TextMatrix.
+    """
+
+    def __init__(self, indptr: np.ndarray, ids: np.ndarray, weights: np.ndarray):
+        self.indptr = indptr
+        self.ids = ids
+        self.weights = weights
+        self._bounds = memoryview(indptr)
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def __getitem__(self, position: int) -> TextVector:
+        start, end = self._bounds[position], self._bounds[position + 1]
+        if end == start:
+            return EMPTY_TEXT_VECTOR
+        return TextVector(self.ids[start:end], self.weights[start:end])
+
+
+class MappedRecords:
+    """
+    A catalog's records over a catalog file's columns, made on access.
+
+    Stands in for the list of records: indexing or iterating makes each
+    record afresh from readers, one per constructor argument, and nothing is
+    kept, so a process attached to the file holds no per-record objects of
+    its own.
+    """
+
+    def __init__(self, record_type: Type, readers: List[Callable[[int], Any]], mask: Callable[[int], int],
+                 vectors: MappedVectors):
+        self.record_type = record_type
+        self.vectors = vectors
+        self._readers = readers
+        self._mask = mask
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def __getitem__(self, position: int) -> Any:
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        record = self.record_type(*[read(position) for read in self._readers], self._mask(position))
+        record.text_vector = self.vectors[position]
+        return record
+
+    def __iter__(self) -> Iterator[Any]:
+        return map(self.__getitem__, range(len(self)))
+
+
+def _indptr(lengths: Iterable[int], count: int) -> np.ndarray:
+    indptr = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(lengths, dtype=np.int64, count=count), out=indptr[1:])
+    return indptr
+
+
+def _append_strings(f, layout: Dict[str, Dict[str, Any]], name: str, values: List[str]):
+    """Strings as their UTF-8 bytes back to back, plus offsets"""
+    encoded = [value.encode() for value in values]
+    append_array(f, layout, f'{name}.bytes', np.frombuffer(b''.join(encoded), dtype=np.uint8))
+    append_array(f, layout, f'{name}.offsets', _indptr(map(len, encoded), len(encoded)))
+
+
+def _append_codes(f, layout: Dict[str, Dict[str, Any]], name: str, values: List[Optional[str]]):
+    """Strings as codes into a table of the distinct ones, -1 for None"""
+    table: Dict[str, int] = {}
+    codes = [-1 if value is None else table.setdefault(value, len(table)) for value in values]
+    append_array(f, layout, f'{name}.codes', np.array(codes, dtype=np.int32))
+    _append_strings(f, layout, f'{name}.values', list(table))
+
+
+def _append_column(f, layout: Dict[str, Dict[str, Any]], name: str, kind: str, values: List[Any]):
+    """One record attribute as arrays, laid out for MappedCatalog._reader"""
+    if kind == 'strs':
+        append_array(f, layout, f'{name}.indptr', _indptr(map(len, values), len(values)))
+        _append_codes(f, layout, name, list(chain.from_iterable(values)))
+    elif kind == 'category':
+        _append_codes(f, layout, name, values)
+    elif kind == 'int':
+        append_array(f, layout, f'{name}.null', np.array([value is None for value in values], dtype=bool))
+        append_array(f, layout, name, np.array([0 if value is None else value for value in values], dtype=np.int64))
+    else:
+        if kind == 'datetime':
+            values = [None if value is None else value.isoformat() for value in values]
+        append_array(f, layout, f'{name}.null', np.array([value is None for value in values], dtype=bool))
+        _append_strings(f, layout, name, ['' if value is None else value for value in values])
+
+
+def _term_columns(model: TextModel) -> Tuple[np.ndarray, np.ndarray]:
+    """Terms the model weights, sorted, and each one's id"""
+    if isinstance(model.terms, MappedTerms):
+        return model.terms.terms, model.terms.ids
+    terms = model.terms.tags()[:len(model.idf)]
+    order = sorted(range(len(terms)), key=terms.__getitem__)
+    width = max((len(term) for term in terms), default=1)
+    return (
+        np.array([terms[term_id].encode() for term_id in order], dtype=f'S{width}'),
+        np.array(order, dtype=np.int64)
+    )
+
+
+def write_catalog(path: str, kind: str, version: int, columns: RecordColumns, records: List[Any],
+                  index: TagIndex, budgets: BudgetIndex, text: TextMatrix, vocabulary: TagVocabulary) -> int:
+    """
+    Write a catalog file and atomically move it into place; returns its size.
+
+    Holds everything a process needs to serve the catalog without the
+    backend, the text corpus or records of its own: the records' columns
+    and tags, the tag vocabulary they were interned in and the tag index
+    over them, the budget index, each record's text vector, the term-major
+    postings over them and the TextModel they were built with. index must
+    have been built in vocabulary. Same layout and
+    rename-over-the-old-file scheme as write_snapshot.
+    """
+    layout: Dict[str, Dict[str, Any]] = {}
+    temporary = f'{path}.tmp-{os.getpid()}'
+    with open(temporary, 'wb') as f:
+        f.write(CATALOG_MAGIC)
+        for name, column_kind in columns:
+            _append_column(f, layout, name, column_kind, [getattr(record, name) for record in records])
+
+        record_tags = [vocabulary.ids(record.tag_mask) for record in records]
+        append_array(f, layout, 'record_tags.indptr', _indptr(map(len, record_tags), len(records)))
+        append_array(f, layout, 'record_tags.ids', np.array(list(chain.from_iterable(record_tags)), dtype=np.int64))
+        _append_strings(f, layout, 'vocabulary', vocabulary.tags())
+        for name, array in index.columns._asdict().items():
+            append_array(f, layout, f'tag_index.{name}', array)
+        for name, array in budgets.columns._asdict().items():
+            append_array(f, layout, f'budgets.{name}', array)
+
+        vectors = text.vectors
+        vector_indptr = _indptr((len(vector.ids) for vector in vectors), len(vectors))
+        total = int(vector_indptr[-1])
+        append_array(f, layout, 'vector_indptr', vector_indptr)
+        append_array(f, layout, 'vector_ids', np.fromiter(
+            chain.from_iterable(vector.ids for vector in vectors), dtype=np.int64, count=total
+        ))
+        append_array(f, layout, 'vector_weights', np.fromiter(
+            chain.from_iterable(vector.weights for vector in vectors), dtype=np.float64, count=total
+        ))
+
+        append_array(f, layout, 'postings_indptr', np.asarray(text.postings.indptr, dtype=np.int64))
+        append_array(f, layout, 'postings_positions', np.asarray(text.postings.positions, dtype=np.int64))
+        append_array(f, layout, 'postings_weights', np.asarray(text.postings.weights, dtype=np.float64))
+
+        terms, term_ids = _term_columns(text.model)
+        append_array(f, layout, 'terms', terms)
+        append_array(f, layout, 'term_ids', term_ids)
+        append_array(f, layout, 'idf', np.asarray(text.model.idf, dtype=np.float64))
+
+        size = finish_mapped_file(f, CATALOG_MAGIC, {
+            'format': CATALOG_FORMAT,
+            'kind': kind,
+            'version': version,
+            'published_at': time.time(),
+            'pid': os.getpid(),
+            'size': len(records),
+            'documents': text.model.documents,
+            'arrays': layout,
+        })
+    os.replace(temporary, path)
+    return size
+
+
+class MappedCatalog:
+    """
+    Read-only view of a catalog file, memory-mapped.
+
+    attach() gives the records, tag index, text index and budget index, all
+    over NumPy views straight onto the mapping, so every process attached
+    to the same file shares one copy of them in the page cache.
+    """
+
+    def __init__(self, path: str, mapping, header: Dict[str, Any], identity: Tuple[int, int]):
+        self.path = path
+        self.kind: str = header['kind']
+        self.version: int = header['version']
+        self.published_at: float = header['published_at']
+        self.publisher_pid: int = header['pid']
+        self.size: int = header['size']
+        self.documents: int = header['documents']
+        self.identity = identity
+        self._mapping = mapping
+        self._layout = header['arrays']
+        self._columns = map_columns(mapping, header)
+
+    @classmethod
+    def open(cls, path: str) -> 'MappedCatalog':
+        mapping, header, identity = map_file(path, CATALOG_MAGIC, CATALOG_FORMAT)
+        return cls(path, mapping, header, identity)
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.published_at
+
+    def text(self) -> TextMatrix:
+        columns = self._columns
+        model = TextModel(MappedTerms(columns['terms'], columns['term_ids']), columns['idf'], self.documents)
+        vectors = MappedVectors(columns['vector_indptr'], columns['vector_ids'], columns['vector_weights'])
+        postings = TextPostings(columns['postings_indptr'], columns['postings_positions'], columns['postings_weights'])
+        return TextMatrix(model, vectors, postings)
+
+    def attach(self, record_type: Type, columns: RecordColumns, vocabulary: TagVocabulary,
+               tag_weight: float) -> Tuple[MappedRecords, TagIndex, TextMatrix, BudgetIndex]:
+        """
+        Records, tag index, text index and budget index over the file. The
+        file's tags are interned in vocabulary, which with the small tables
+        of distinct category values is all that is built per process.
+        """
+        arrays = self._columns
+        tag = self._strings('vocabulary')
+        tag_ids = np.array([vocabulary.intern(tag(k)) for k in range(len(arrays['vocabulary.offsets']) - 1)],
+                           dtype=np.int64)
+        text = self.text()
+        index = TagIndex(vocabulary, TagColumns(*(arrays[f'tag_index.{name}'] for name in TagColumns._fields)),
+                         tag_weight, tag_ids)
+        budgets = BudgetIndex(BudgetColumns(*(arrays[f'budgets.{name}'] for name in BudgetColumns._fields)), self.size)
+        readers = [self._reader(name, kind) for name, kind in columns]
+        return MappedRecords(record_type, readers, self._masks(tag_ids.tolist()), text.vectors), index, text, budgets
+
+    def _strings(self, name: str) -> Callable[[int], str]:
+        """Reads the k-th string of a column written by _append_strings, sliced straight off the mapping"""
+        mapping = self._mapping
+        base = self._layout[f'{name}.bytes']['offset']
+        offsets = memoryview(self._columns[f'{name}.offsets'])
+        return lambda k: mapping[base + offsets[k]:base + offsets[k + 1]].decode()
+
+    def _reader(self, name: str, kind: str) -> Callable[[int], Any]:
+        """
+        Reads one record's value of an attribute written by _append_column.
+        Columns are read through memoryviews, several times cheaper per value
+        than NumPy scalar indexing; coded strings come from a list of the
+        distinct values, with None at index -1.
+        """
+        arrays = self._columns
+        if kind in ('strs', 'category'):
+            value = self._strings(f'{name}.values')
+            table = [value(k) for k in range(len(arrays[f'{name}.values.offsets']) - 1)] + [None]
+            codes = memoryview(arrays[f'{name}.codes'])
+            if kind == 'category':
+                return lambda position: table[codes[position]]
+            bounds = memoryview(arrays[f'{name}.indptr'])
+            return lambda position: [table[code] for code in codes[bounds[position]:bounds[position + 1]]]
+        nulls = memoryview(arrays[f'{name}.null'])
+        if kind == 'int':
+            values = memoryview(arrays[name])
+            return lambda position: None if nulls[position] else values[position]
+        read = self._strings(name)
+        if kind == 'datetime':
+            return lambda position: None if nulls[position] else datetime.fromisoformat(read(position))
+        return lambda position: None if nulls[position] else read(position)
+
+    def _masks(self, tag_ids: List[int]) -> Callable[[int], int]:
+        """Reads a record's tag mask, translating the file's tag ids to tag_ids"""
+        bounds = memoryview(self._columns['record_tags.indptr'])
+        record_tags = memoryview(self._columns['record_tags.ids'])
+
+        def mask(position: int) -> int:
+            bits = 0
+            for tag_id in record_tags[bounds[position]:bounds[position + 1]]:
+                bits |= 1 << tag_ids[tag_id]
+            return bits
+
+        return mask
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "published_at": datetime.fromtimestamp(self.published_at, timezone.utc).isoformat(),
+            "age_seconds": round(self.age_seconds, 3),
+            "publisher_pid": self.publisher_pid,
+            "size": self.size,
+            "bytes": len(self._mapping),
+        }
+
+
+class SharedCatalogStore:
+    """
+    Catalog files shared by every worker process on a machine, one per kind.
+
+    Whichever process first needs a fresh catalog takes the kind's lock
+    file, fetches from the backend and publishes; the others block on the
+    lock and then map what it wrote instead of fetching their own copy. Files
+    are replaced by rename, so a changed inode means a new version and
+    attached processes notice within CATALOG_CHECK_INTERVAL_SECONDS. Put the
+    directory on tmpfs (/dev/shm) to keep the files in memory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._current: Dict[str, MappedCatalog] = {}
+        self._checked_monotonic: Dict[str, float] = {}
+        self.published: Dict[str, int] = {}
+
+    def path(self, kind: str) -> str:
+        return os.path.join(self.directory, f'catalog-{kind}.bin')
+
+    def current(self, kind: str) -> Optional[MappedCatalog]:
+        """The kind's published file, mapped again if it was replaced; None if there is none yet"""
+        path = self.path(kind)
+        try:
+            stat = os.stat(path)
+            current = self._current.get(kind)
+            if current is None or current.identity != (stat.st_dev, stat.st_ino):
+                current = self._current[kind] = MappedCatalog.open(path)
+            return current
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not map shared catalog {path}: {str(e)}")
+            return None
+
+    def replaced(self, kind: str, identity: Tuple[int, int]) -> bool:
+        """Whether the kind's file is no longer the one with identity; stats it at most every check interval"""
+        now = time.monotonic()
+        if now - self._checked_monotonic.get(kind, 0.0) < CATALOG_CHECK_INTERVAL_SECONDS:
+            return False
+        self._checked_monotonic[kind] = now
+        try:
+            stat = os.stat(self.path(kind))
+        except OSError:
+            return False
+        return (stat.st_dev, stat.st_ino) != identity
+
+    def lock(self, kind: str) -> int:
+        """Block until this process holds the kind's publish lock; returns the descriptor to unlock"""
+        fd = os.open(f'{self.path(kind)}.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    async def acquire(self, kind: str) -> int:
+        """lock() off the event loop; if the wait is cancelled the lock is released once granted"""
+        future = asyncio.get_running_loop().run_in_executor(None, self.lock, kind)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            future.add_done_callback(
+                lambda done: None if done.cancelled() or done.exception() else self.unlock(done.result())
+            )
+            raise
+
+    def unlock(self, fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def publish(self, kind: str, columns: RecordColumns, records: List[Any], index: TagIndex,
+                budgets: BudgetIndex, text: TextMatrix, vocabulary: TagVocabulary) -> MappedCatalog:
+        """Write a new version of the kind's file and map it; call with the kind's lock held"""
+        current = self.current(kind)
+        version = current.version + 1 if current else 1
+        write_catalog(self.path(kind), kind, version, columns, records, index, budgets, text, vocabulary)
+        self.published[kind] = self.published.get(kind, 0) + 1
+        return self.current(kind)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "published": dict(self.published),
+            "files": {kind: current.stats() for kind, current in self._current.items()},
+        }
@@ -0,0 +1,291 @@
+import fcntl
+import json
+import logging
+import mmap
+import os
+import time
+from datetime import datetime, timezone
+from array import array
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b'PLUGSNAP'
+SNAPSHOT_FORMAT = 1
+
+# Matches kept per brand and per event (compute-matches' default limit);
+# requests for more are computed live
+DEFAULT_SNAPSHOT_TOP_K = 50
+
+# Pairs scored at a time while building, so the build's working memory stays
+# at a few tens of MB whatever the grid size
+SNAPSHOT_PAIRS_PER_BLOCK = 1 << 17
+
+# How often a process checks whether the snapshot file was replaced
+SNAPSHOT_CHECK_INTERVAL_SECONDS = 5.0
+
+# How often API processes check whether a recompute finished since the snapshot was written
+DEFAULT_SNAPSHOT_REFRESH_INTERVAL_SECONDS = 300.0
+
+# Arrays start on cache-line boundaries so the views are aligned
+ALIGNMENT = 64
+
+SIDES = ('brand', 'event')
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def append_array(f, layout: Dict[str, Dict[str, Any]], name: str, array: np.ndarray):
+    """Write array at the next aligned offset of f and record where it went in layout"""
+    offset = _aligned(f.tell())
+    f.seek(offset)
+    f.write(array.tobytes())
+    layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+
+
+def finish_mapped_file(f, magic: bytes, header: Dict[str, Any]) -> int:
+    """Append the JSON header, its length and the magic again, and sync; returns the file size"""
+    encoded = json.dumps(header).encode()
+    f.write(encoded)
+    f.write(len(encoded).to_bytes(8, 'little'))
+    f.write(magic)
+    size = f.tell()
+    f.flush()
+    os.fsync(f.fileno())
+    return size
+
+
+def map_file(path: str, magic: bytes, expected_format: int) -> Tuple[mmap.mmap, Dict[str, Any], Tuple[int, int]]:
+    """Map a file laid out by finish_mapped_file read-only: (mapping, header, (device, inode))"""
+    with open(path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapping[:len(magic)] != magic or mapping[-len(magic):] != magic:
+        raise ValueError(f"{path} is not a complete {magic.decode()} file")
+    header_end = len(mapping) - len(magic) - 8
+    header_length = int.from_bytes(mapping[header_end:header_end + 8], 'little')
+    header = json.loads(mapping[header_end - header_length:header_end])
+    if header.get('format') != expected_format:
+        raise ValueError(f"{path} has format {header.get('format')}, expected {expected_format}")
+    return mapping, header, (stat.st_dev, stat.st_ino)
+
+
+def map_columns(mapping: mmap.mmap, header: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """NumPy views over the mapping for every array in the header"""
+    return {
+        name: np.frombuffer(
+            mapping, dtype=np.dtype(spec['dtype']),
+            count=int(np.prod(spec['shape'])), offset=spec['offset']
+        )
+        for name, spec in header['arrays'].items()
+    }
+
+
+class SnapshotSide(NamedTuple):
+    """One side of a snapshot: entity ids in sorted order and each one's serialized matches, best first"""
+    ids: List[str]
+    matches: Iterable[List[bytes]]
+
+
+def write_snapshot(path: str, version: int, top_k: int, sides: Dict[str, SnapshotSide],
+                   source: Optional[str] = None) -> int:
+    """
+    Write a snapshot file and atomically move it into place; returns its size.
+
+    Matches are streamed to disk as they are produced, so writing holds one
+    entity's matches at a time. The file is written next to path and renamed
+    over it, so a reader maps either the old file or the new one, never a
+    partial write.
+
+    source records what the matches were built from (the recompute
+    watermark), so a later rebuild can tell whether there is anything new.
+
+    Layout: magic, then aligned arrays, then a JSON header describing them,
+    then the header's length and the magic again.
+    """
+    layout: Dict[str, Dict[str, Any]] = {}
+    temporary = f'{path}.tmp-{os.getpid()}'
+    with open(temporary, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+
+        def add(name: str, array: np.ndarray):
+            append_array(f, layout, name, array)
+
+        for side in SIDES:
+            ids, matches = sides[side]
+            width = max((len(entity_id) for entity_id in ids), default=1)
+            add(f'{side}_ids', np.array([entity_id.encode() for entity_id in ids], dtype=f'S{width}'))
+
+            # Each entry is stored with a trailing comma, so any prefix of an
+            # entity's list is one slice away from a JSON array
+            bodies_offset = _aligned(f.tell())
+            f.seek(bodies_offset)
+            entry_offsets = array('q', [0])
+            body_offsets = array('q', [0])
+            for entity_matches in matches:
+                for body in entity_matches:
+                    f.write(body)
+                    f.write(b',')
+                    body_offsets.append(body_offsets[-1] + len(body) + 1)
+                entry_offsets.append(len(body_offsets) - 1)
+            if len(entry_offsets) != len(ids) + 1:
+                raise ValueError(f"Got matches for {len(entry_offsets) - 1} of {len(ids)} {side} ids")
+            layout[f'{side}_bodies'] = {'dtype': '|u1', 'shape': [body_offsets[-1]], 'offset': bodies_offset}
+
+            add(f'{side}_entry_offsets', np.frombuffer(entry_offsets, dtype=np.int64))
+            add(f'{side}_body_offsets', np.frombuffer(body_offsets, dtype=np.int64))
+
+        size = finish_mapped_file(f, SNAPSHOT_MAGIC, {
+            'format': SNAPSHOT_FORMAT,
+            'version': version,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'top_k': top_k,
+            'source': source,
+            'arrays': layout,
+        })
+    os.replace(temporary, path)
+    return size
+
+
+class MatchSnapshot:
+    """
+    Read-only view of a snapshot file, memory-mapped.
+
+    Every column is a NumPy view straight over the mapping, so opening a
+    snapshot reads only its header and pages are faulted in as they are
+    used. Ids are stored sorted: a lookup is a binary search on the id
+    column, and an entity's top matches are one contiguous slice of
+    pre-serialized JSON.
+    """
+
+    def __init__(self, path: str, mapping: mmap.mmap, header: Dict[str, Any], identity: Tuple[int, int]):
+        self.path = path
+        self.version: int = header['version']
+        self.created_at = datetime.fromisoformat(header['created_at'])
+        self.top_k: int = header['top_k']
+        self.source: Optional[str] = header.get('source')
+        self.identity = identity
+        self._mapping = mapping
+        self._columns = map_columns(mapping, header)
+
+    @classmethod
+    def open(cls, path: str) -> 'MatchSnapshot':
+        mapping, header, identity = map_file(path, SNAPSHOT_MAGIC, SNAPSHOT_FORMAT)
+        return cls(path, mapping, header, identity)
+
+    @property
+    def age_seconds(self) -> float:
+        return (datetime.now(timezone.utc) - self.created_at).total_seconds()
+
+    def size(self, side: str) -> int:
+        return len(self._columns[f'{side}_ids'])
+
+    def matches(self, side: str, entity_id: str, limit: int) -> Optional[bytes]:
+        """
+        JSON array of an entity's best `limit` matches, or None if the
+        snapshot can't answer (unknown id, or more than top_k asked for).
+        """
+        if limit > self.top_k:
+            return None
+        ids = self._columns[f'{side}_ids']
+        key = entity_id.encode()
+        position = int(np.searchsorted(ids, key))
+        if position == len(ids) or ids[position] != key:
+            return None
+
+        entry_offsets = self._columns[f'{side}_entry_offsets']
+        body_offsets = self._columns[f'{side}_body_offsets']
+        first = int(entry_offsets[position])
+        last = min(int(entry_offsets[position + 1]), first + limit)
+        if first == last:
+            return b'[]'
+        # Drop the last entry's trailing comma
+        body = self._columns[f'{side}_bodies'][body_offsets[first]:body_offsets[last] - 1]
+        return b'[' + body.tobytes() + b']'
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "created_at": self.created_at.isoformat(),
+            "age_seconds": round(self.age_seconds, 3),
+            "top_k": self.top_k,
+            "source": self.source,
+            "brands": self.size('brand'),
+            "events": self.size('event'),
+            "bytes": len(self._mapping),
+        }
+
+
+class SnapshotStore:
+    """
+    The current snapshot at a path, swapped when the file is replaced.
+
+    write_snapshot renames new files into place, so a changed inode means a
+    new version; other processes pick it up within
+    SNAPSHOT_CHECK_INTERVAL_SECONDS. The old mapping is left to the garbage
+    collector, since responses may still be slicing it.
+    """
+
+    def __init__(self, path: Optional[str], top_k: int = DEFAULT_SNAPSHOT_TOP_K):
+        self.path = path
+        self.top_k = top_k
+        self.current: Optional[MatchSnapshot] = None
+        self.hits = 0
+        self.misses = 0
+        self._checked_monotonic = 0.0
+
+    def get(self) -> Optional[MatchSnapshot]:
+        """Current snapshot, reopening the file if it was replaced since the last check"""
+        if not self.path:
+            return None
+        now = time.monotonic()
+        if now - self._checked_monotonic >= SNAPSHOT_CHECK_INTERVAL_SECONDS:
+            self._checked_monotonic = now
+            self.reload()
+        return self.current
+
+    def reload(self) -> Optional[MatchSnapshot]:
+        """Map the file at path if it is new; a missing or unreadable file keeps the current one"""
+        if not self.path:
+            return None
+        try:
+            stat = os.stat(self.path)
+            if self.current is None or self.current.identity != (stat.st_dev, stat.st_ino):
+                self.current = MatchSnapshot.open(self.path)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not map match snapshot {self.path}: {str(e)}")
+        return self.current
+
+    def next_version(self) -> int:
+        current = self.reload()
+        return current.version + 1 if current else 1
+
+    def try_lock(self) -> Optional[int]:
+        """Take the path's build lock without waiting; the descriptor to unlock, or None if another process holds it"""
+        fd = os.open(f'{self.path}.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    def unlock(self, fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": bool(self.path),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "snapshot": self.current.stats() if self.current else None,
+        }
@@ -0,0 +1,61 @@
+import os
+import time
+from typing import Any, Dict, Optional
+
+# Delay before retrying a failed prewarm, doubling up to the max
+PREWARM_RETRY_SECONDS = 2.0
+PREWARM_MAX_RETRY_SECONDS = 60.0
+
+
+def process_age_seconds() -> Optional[float]:
+    """Seconds since this process was started, where /proc exposes it"""
+    try:
+        with open('/proc/self/stat') as f:
+            # The command name may contain spaces; fields after it are fixed
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        started = int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(0.0, uptime - started)
+
+
+class StartupTimer:
+    """
+    Wall-clock startup phases of this process, from exec to ready.
+
+    boot is the time before the app module started importing (interpreter and
+    server), when the platform exposes the process start time. Each later
+    phase runs from the end of the one before, so together they add up to the
+    time it took to become ready. Only the standard library is used, so the
+    timer can start before the heavy imports it measures.
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        boot = process_age_seconds()
+        if boot is not None:
+            self.phases['boot'] = boot
+        self._mark = time.monotonic()
+        self.ready = False
+        self.error: Optional[str] = None
+
+    def finish(self, name: str) -> float:
+        """Close the current phase under name and return its duration"""
+        now = time.monotonic()
+        self.phases[name] = now - self._mark
+        self._mark = now
+        return self.phases[name]
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.phases.values())
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "status": "ready" if self.ready else "warming",
+            "startup_seconds": {name: round(seconds, 4) for name, seconds in self.phases.items()},
+            "time_to_ready_seconds": round(self.total_seconds, 4) if self.ready else None,
+            "last_error": self.error,
+        }
@@ -0,0 +1,173 @@
+import numpy as np
+from itertools import chain
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from vocabulary import TagVocabulary
+
+# Candidates are converted from NumPy this many at a time, so a caller that
+# stops early doesn't pay for the whole catalog
+STREAM_SLICE = 256
+
+
+class TagColumns(NamedTuple):
+    """
+    A TagIndex's arrays. Positions carrying the tag of posting row r are
+    positions[indptr[r]:indptr[r + 1]], in increasing order; tag_counts and
+    rest_bounds are per position, by_rest_bound the positions by decreasing
+    rest bound.
+    """
+    indptr: np.ndarray
+    positions: np.ndarray
+    tag_counts: np.ndarray
+    rest_bounds: np.ndarray
+    by_rest_bound: np.ndarray
+
+
+class TagIndex:
+    """
+    Inverted index from interned tag id to catalog positions.
+
+    Each position also carries an upper bound on the non-tag part of any score
+    it can take part in, so a query can walk the catalog in decreasing order of
+    score bound and stop as soon as the bound falls below what it already has.
+    Overlap scores are the same Jaccard values
+    MatchingEngine.calculate_tag_overlap produces. Queries are tag bitsets from
+    the same vocabulary as the entries' own masks.
+
+    Everything is held in TagColumns, so an index can be views over a shared
+    catalog file. Posting rows are vocabulary ids, unless tag_ids gives the
+    vocabulary id of each row (a file written by another process, whose
+    vocabulary interned tags in another order).
+    """
+
+    def __init__(self, vocabulary: TagVocabulary, columns: TagColumns, tag_weight: float = 0.35,
+                 tag_ids: Optional[np.ndarray] = None):
+        self.vocabulary = vocabulary
+        self.tag_weight = tag_weight
+        self.columns = columns
+        self.tag_counts = columns.tag_counts
+        self.rest_bound_array = columns.rest_bounds
+        # Zero-overlap candidates are visited in this order
+        self.by_rest_bound = columns.by_rest_bound
+        rows = len(columns.indptr) - 1
+        self._rows: Optional[Dict[int, int]] = None
+        if tag_ids is not None:
+            self._rows = {tag_id: row for row, tag_id in enumerate(tag_ids[:rows].tolist())}
+
+    @classmethod
+    def build(cls, vocabulary: TagVocabulary, masks: List[int], rest_bounds: List[float],
+              tag_weight: float = 0.35) -> 'TagIndex':
+        """Index over tag masks from vocabulary and each position's rest bound"""
+        tag_ids = [vocabulary.ids(mask) for mask in masks]
+        tag_counts = np.fromiter((len(ids) for ids in tag_ids), dtype=np.int64, count=len(masks))
+        flat = np.fromiter(chain.from_iterable(tag_ids), dtype=np.int64, count=int(tag_counts.sum()))
+        rows = np.repeat(np.arange(len(masks), dtype=np.int64), tag_counts)
+        # A stable sort by tag keeps each posting in increasing position order
+        order = np.argsort(flat, kind='stable')
+        indptr = np.zeros(max(len(vocabulary), int(flat.max(initial=-1)) + 1) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(flat, minlength=len(indptr) - 1), out=indptr[1:])
+        rest_bound_array = np.array(rest_bounds, dtype=np.float64)
+        return cls(vocabulary, TagColumns(
+            indptr, rows[order], tag_counts, rest_bound_array, np.argsort(-rest_bound_array, kind='stable')
+        ), tag_weight)
+
+    def __len__(self) -> int:
+        return len(self.tag_counts)
+
+    def _posting(self, tag_id: int) -> np.ndarray:
+        """Positions carrying a tag, in increasing order"""
+        row = tag_id if self._rows is None else self._rows.get(tag_id, -1)
+        indptr = self.columns.indptr
+        if not 0 <= row < len(indptr) - 1:
+            return self.columns.positions[:0]
+        return self.columns.positions[indptr[row]:indptr[row + 1]]
+
+    def overlap_scores(self, query_mask: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions sharing at least one tag with the query, increasing, and their Jaccard overlap"""
+        postings = [self._posting(tag_id) for tag_id in self.vocabulary.ids(query_mask)]
+        if not postings:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        positions, intersections = np.unique(np.concatenate(postings), return_counts=True)
+        # Small integer counts convert exactly, so this divides exactly like the scalar helper
+        return positions, intersections / (query_mask.bit_count() + self.tag_counts[positions] - intersections)
+
+    def ranked_candidates(self, query_mask: int, rest_bound: float,
+                          extra: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                          capped: Optional[np.ndarray] = None, cap_slack: float = 0.0,
+                          allowed: Optional[np.ndarray] = None) -> Iterator[Tuple[float, int]]:
+        """
+        Yield (score_bound, position) for the catalog in decreasing bound order.
+
+        rest_bound is the query side's own cap on the non-tag components. extra
+        is a sparse (positions, values) pair of exact per-position
+        contributions (e.g. weighted text similarity). capped is a boolean mask
+        of positions whose bound is cap_slack lower, where a component is known
+        to be capped, and allowed is a boolean mask restricting the candidates
+        to a subset.
+
+        Positions on the query's posting lists or in extra are bounded
+        individually and sorted in NumPy. The rest are streamed lazily from the
+        presorted rest-bound order, capped and uncapped ones as two streams, so
+        callers that stop early never enumerate them and cost stays
+        proportional to the positions touched.
+        """
+        overlap_positions, overlap = self.overlap_scores(query_mask)
+
+        touched = np.zeros(len(self), dtype=bool)
+        touched[overlap_positions] = True
+        contribution = np.zeros(len(self), dtype=np.float64)
+        contribution[overlap_positions] = self.tag_weight * overlap
+        if extra is not None:
+            touched[extra[0]] = True
+            contribution[extra[0]] += extra[1]
+
+        positions = np.flatnonzero(touched if allowed is None else touched & allowed)
+        bounds = np.minimum(self.rest_bound_array[positions], rest_bound) + contribution[positions]
+        if capped is not None:
+            bounds[capped[positions]] -= cap_slack
+        # Order among equal bounds only changes which tied candidate is scored first
+        order = np.argsort(-bounds)
+        ranked = _slices(bounds[order], positions[order])
+
+        if allowed is not None:
+            touched |= ~allowed
+        if capped is None:
+            return _merge_descending(ranked, self._untouched(touched, rest_bound))
+        return _merge_descending(ranked, _merge_descending(
+            self._untouched(touched | capped, rest_bound),
+            self._untouched(touched | ~capped, rest_bound, cap_slack)
+        ))
+
+    def _untouched(self, skip: np.ndarray, rest_bound: float, slack: float = 0.0) -> Iterator[Tuple[float, int]]:
+        """Positions not in skip by decreasing rest bound, filtered a slice at a time"""
+        for start in range(0, len(self.by_rest_bound), STREAM_SLICE):
+            positions = self.by_rest_bound[start:start + STREAM_SLICE]
+            positions = positions[~skip[positions]]
+            bounds = np.minimum(self.rest_bound_array[positions], rest_bound) - slack
+            yield from zip(bounds.tolist(), positions.tolist())
+
+
+def _slices(bounds: np.ndarray, positions: np.ndarray) -> Iterator[Tuple[float, int]]:
+    """(bound, position) pairs, converted to Python a slice at a time"""
+    for start in range(0, len(bounds), STREAM_SLICE):
+        yield from zip(bounds[start:start + STREAM_SLICE].tolist(), positions[start:start + STREAM_SLICE].tolist())
+
+
+def _merge_descending(first: Iterator[Tuple[float, int]],
+                      second: Iterator[Tuple[float, int]]) -> Iterator[Tuple[float, int]]:
+    """Merge two streams sorted by decreasing bound; first wins ties"""
+    first, second = iter(first), iter(second)
+    a = next(first, None)
+    b = next(second, None)
+    while a is not None and b is not None:
+        if a[0] >= b[0]:
+            yield a
+            a = next(first, None)
+        else:
+            yield b
+            b = next(second, None)
+    if a is not None:
+        yield a
+        yield from first
+    if b is not None:
+        yield b
+        yield from second
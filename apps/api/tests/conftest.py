@@ -0,0 +1,36 @@
+import os
+import sys
+import pytest
+from fastapi.testclient import TestClient
+
+# Modules in apps/api import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from database import Database
+from matching import MatchingEngine
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """
+    Runs main.app against a fake backend: call it with a FakeSupabase (and
+    MatchingEngine options) for a started TestClient authorized like the
+    dashboard. The app's own lifespan runs, so background recomputes keep
+    going between requests; only the periodic recency refresh is off.
+    """
+    monkeypatch.setenv('RECENCY_REFRESH_INTERVAL_SECONDS', '0')
+    monkeypatch.delenv('RECOMPUTE_JOBS_DIR', raising=False)
+    clients = []
+
+    def connect(fake, **options) -> TestClient:
+        database = Database(fake)
+        monkeypatch.setattr(main, 'create_engine', lambda: (database, MatchingEngine(database, **options)))
+        client = TestClient(main.app, headers={'Authorization': 'Bearer test'})
+        client.__enter__()
+        clients.append(client)
+        return client
+
+    yield connect
+    for client in clients:
+        client.__exit__(None, None, None)
@@ -0,0 +1,123 @@
+"""
+The budget index and budget_overlap_only must keep exactly the counterparts
+a brute-force range check keeps: ranges overlapping the query's, plus every
+incomplete range, which can't be ruled out.
+"""
+import asyncio
+import random
+from typing import List, Optional, Tuple
+import pytest
+from benchmarks.fake_supabase import seed_catalog
+from budget_index import BudgetIndex
+from database import Database
+from matching import MatchingEngine
+
+Range = Tuple[Optional[int], Optional[int]]
+ENDS = [None, 0, 100, 250, 500, 1000, 2500, 5000]
+
+
+def complete(budget: Range) -> bool:
+    return bool(budget[0] and budget[1])
+
+
+def brute_candidates(ranges: List[Range], low: int, high: int) -> List[int]:
+    return [
+        position for position, budget in enumerate(ranges)
+        if not complete(budget) or (budget[0] <= high and budget[1] >= low)
+    ]
+
+
+def test_index_matches_brute_force():
+    rng = random.Random(7)
+    # Inverted and incomplete ranges included, and ends shared with the queries
+    ranges = [(rng.choice(ENDS), rng.choice(ENDS)) for _ in range(400)]
+    index = BudgetIndex.build(ranges)
+    assert len(index) == len(ranges)
+    assert sorted(index.incomplete.tolist()) == [p for p, budget in enumerate(ranges) if not complete(budget)]
+
+    for low in ENDS[2:]:
+        for high in ENDS[2:]:
+            expected = brute_candidates(ranges, low, high)
+            assert index.candidates(low, high).tolist() == expected
+            overlapping = [p for p in expected if complete(ranges[p])]
+            assert index.overlapping(low, high).tolist() == overlapping
+            disjoint = sorted(set(range(len(ranges))) - set(expected))
+            assert sorted(index.disjoint(low, high).tolist()) == disjoint
+            assert len(index.disjoint(low, high)) == len(disjoint)
+
+
+def test_empty_and_all_incomplete_index():
+    assert BudgetIndex.build([]).candidates(100, 500).tolist() == []
+    ranges = [(None, 500), (250, None), (0, 0), (None, None)]
+    assert BudgetIndex.build(ranges).candidates(100, 500).tolist() == [0, 1, 2, 3]
+
+
+@pytest.fixture(scope='module')
+def filtered():
+    async def run():
+        fake = seed_catalog(40, 300, seed=13)
+        engine = MatchingEngine(Database(fake))
+        try:
+            brands, events = await engine.catalog.get('brands'), await engine.catalog.get('events')
+            ranges = {
+                event.id: (event.sponsorship_min_amount, event.sponsorship_max_amount) for event in events.entities
+            }
+            ranges.update((brand.id, (brand.budget_range_min, brand.budget_range_max)) for brand in brands.entities)
+            results = []
+            for brand_row in random.Random(1).sample(fake.tables['brands'], 10):
+                brand, _, _ = await engine._load_brand(brand_row['id'])
+                budget = (brand.budget_range_min, brand.budget_range_max)
+                kept = [
+                    (event.id, engine.score_components(brand, event)[0]) for event in events.entities
+                    if not complete(budget) or brute_candidates([ranges[event.id]], *budget)
+                ]
+                matches = await engine.compute_matches(
+                    brand_id=brand.id, limit=len(events.entities), budget_overlap_only=True
+                )
+                weighted = await engine.compute_weighted_matches(
+                    engine.default_weights, brand_id=brand.id, limit=None, budget_overlap_only=True
+                )
+                results.append((budget, kept, matches, weighted, 'event_id'))
+            for event_row in random.Random(2).sample(fake.tables['events'], 10):
+                event, _, _ = await engine._load_event(event_row['id'])
+                budget = (event.sponsorship_min_amount, event.sponsorship_max_amount)
+                kept = [
+                    (brand.id, engine.score_components(brand, event)[0]) for brand in brands.entities
+                    if not complete(budget) or brute_candidates([ranges[brand.id]], *budget)
+                ]
+                matches = await engine.compute_matches(
+                    event_id=event.id, limit=len(brands.entities), budget_overlap_only=True
+                )
+                weighted = await engine.compute_weighted_matches(
+                    engine.default_weights, event_id=event.id, limit=None, budget_overlap_only=True
+                )
+                results.append((budget, kept, matches, weighted, 'brand_id'))
+            return results, ranges
+        finally:
+            engine.close()
+
+    return asyncio.run(run())
+
+
+def test_overlap_only_keeps_brute_force_set(filtered):
+    results, _ = filtered
+    for budget, kept, matches, weighted, side in results:
+        expected = sorted(
+            ((counterpart, score) for counterpart, score in kept if score >= 0.1),
+            key=lambda pair: -pair[1]
+        )
+        for ranked in (matches, weighted):
+            assert [(getattr(match, side), match.score) for match in ranked] == expected
+
+
+def test_filter_data_covers_both_cases(filtered):
+    results, ranges = filtered
+    # Queries with and without a complete range, and counterparts dropped by the filter
+    assert any(complete(budget) for budget, *_ in results)
+    assert any(not complete(budget) for budget, *_ in results)
+    assert any(len(kept) < (40 if side == 'brand_id' else 300) for _, kept, _, _, side in results)
+    # Incomplete counterparts kept under a complete query
+    assert any(
+        complete(budget) and any(not complete(ranges[counterpart]) for counterpart, _ in kept)
+        for budget, kept, _, _, side in results
+    )
@@ -0,0 +1,40 @@
+"""
+A listing cached by one process is dropped, and gets a new ETag, once
+another process recomputes or invalidates listings.
+"""
+import asyncio
+from benchmarks.fake_supabase import seed_catalog
+from database import Database
+from matching import MatchingEngine
+
+
+def test_other_process_writes_reach_the_cache():
+    async def run():
+        fake = seed_catalog(10, 40, seed=3)
+        writer = MatchingEngine(Database(fake))
+        reader = MatchingEngine(Database(fake), listing_check_interval_seconds=0.0)
+        try:
+            await writer.recompute_all_matches()
+            brand_id = fake.tables['brands'][0]['id']
+            first = await reader.get_match_listing('brand', brand_id)
+            cached = await reader.get_match_listing('brand', brand_id)
+
+            # Only another process's writes: nothing told the reader's cache
+            fake.tables['matches'] = [row for row in fake.tables['matches'] if row['brand_id'] != brand_id]
+            stale = await reader.get_match_listing('brand', brand_id)
+            await writer.invalidate_listings()
+            invalidated = await reader.get_match_listing('brand', brand_id)
+
+            await writer.recompute_all_matches()
+            recomputed = await reader.get_match_listing('brand', brand_id)
+            return first, cached, stale, invalidated, recomputed, reader.listings.stats()
+        finally:
+            writer.close()
+            reader.close()
+
+    first, cached, stale, invalidated, recomputed, stats = asyncio.run(run())
+    assert cached is first
+    assert stale is first
+    assert invalidated.body == b'[]' and invalidated.etag != first.etag
+    assert recomputed.body != b'[]' and recomputed.etag != first.etag
+    assert stats['invalidations'] == 2
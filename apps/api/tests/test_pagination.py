@@ -0,0 +1,115 @@
+"""
+Keyset cursors walk a stored listing exactly once in (score desc, id)
+order, bad cursors are a 400, and streamed compute-matches arrives in
+compute_matches order.
+"""
+import json
+import random
+import uuid
+from typing import Any, Dict, List
+import pytest
+from benchmarks.fake_supabase import FakeSupabase, seed_catalog
+from pagination import InvalidCursor, decode_cursor, encode_cursor
+
+NDJSON = {'Accept': 'application/x-ndjson'}
+
+
+def listing_fake() -> FakeSupabase:
+    """Stored matches for one brand, in runs of equal scores so pages end inside ties"""
+    fake = seed_catalog(3, 60, seed=9)
+    rng = random.Random(9)
+    brand_id = fake.tables['brands'][0]['id']
+    for event in fake.tables['events']:
+        fake.tables['matches'].append({
+            'id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'brand_id': brand_id,
+            'event_id': event['id'],
+            'score': rng.choice([0.05, 0.3, 0.45, 0.45, 0.6, 0.6, 0.6]),
+            'reasoning': {},
+        })
+    return fake
+
+
+def walk(client, path: str, limit: int) -> List[Dict[str, Any]]:
+    """Every row of a listing, following X-Next-Cursor a page at a time"""
+    rows, cursor = [], None
+    while True:
+        params = {'limit': limit, **({'cursor': cursor} if cursor else {})}
+        response = client.get(path, params=params)
+        assert response.status_code == 200
+        rows += response.json()
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            return rows
+
+
+@pytest.mark.parametrize('keyset', [(0.6, 'a'), (0.1 + 0.2, 'b_c'), (1.0, 'é-ü'), (0.0, '')])
+def test_cursor_round_trip(keyset):
+    assert decode_cursor(encode_cursor(keyset)) == keyset
+
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', encode_cursor((0.5, 'x'))[:-3], 'WzEsMl0', 'WyJ4IiwieSJd'])
+def test_foreign_cursor_is_rejected(cursor):
+    # Garbage, a truncated cursor, [1, 2] and ["x", "y"]
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize('limit', [1, 3, 7, 100])
+def test_pages_cover_listing_once_across_ties(api, limit):
+    fake = listing_fake()
+    brand_id = fake.tables['brands'][0]['id']
+    client = api(fake)
+
+    rows = walk(client, f'/api/v1/matches/{brand_id}', limit)
+    expected = sorted(
+        (row for row in fake.tables['matches'] if row['score'] >= 0.1), key=lambda row: (-row['score'], row['id'])
+    )
+    assert [row['id'] for row in rows] == [row['id'] for row in expected]
+
+    streamed = client.get(f'/api/v1/matches/{brand_id}', headers=NDJSON)
+    assert [json.loads(line)['id'] for line in streamed.text.splitlines()] == [row['id'] for row in expected]
+
+
+def test_stream_resumes_from_cursor(api):
+    fake = listing_fake()
+    brand_id = fake.tables['brands'][0]['id']
+    client = api(fake)
+
+    first = client.get(f'/api/v1/matches/{brand_id}', params={'limit': 5})
+    rest = client.get(
+        f'/api/v1/matches/{brand_id}', params={'cursor': first.headers['X-Next-Cursor']}, headers=NDJSON
+    )
+    ids = [row['id'] for row in first.json()] + [json.loads(line)['id'] for line in rest.text.splitlines()]
+    assert ids == [row['id'] for row in walk(client, f'/api/v1/matches/{brand_id}', 100)]
+
+
+@pytest.mark.parametrize('path', ['/api/v1/matches/{id}', '/api/v1/event-matches/{id}'])
+def test_bad_cursor_is_400(api, path):
+    fake = listing_fake()
+    client = api(fake)
+    url = path.format(id=fake.tables['brands'][0]['id'])
+
+    assert client.get(url, params={'cursor': 'garbage'}).status_code == 400
+    assert client.get(url, params={'cursor': 'garbage'}, headers=NDJSON).status_code == 400
+
+
+@pytest.mark.parametrize('side', ['brand_id', 'event_id'])
+def test_streamed_matches_follow_compute_order(api, side):
+    fake = seed_catalog(60, 300, seed=2)
+    client = api(fake)
+
+    for row in random.Random(3).sample(fake.tables['brands' if side == 'brand_id' else 'events'], 4):
+        request = {side: row['id'], 'limit': 100}
+        computed = client.post('/api/v1/compute-matches', json=request).json()
+        streamed = client.post('/api/v1/compute-matches', json=request, headers=NDJSON)
+        everything = client.post('/api/v1/compute-matches', json={side: row['id'], 'limit': None}, headers=NDJSON)
+
+        def pairs(matches):
+            return [(match['id'], match['score']) for match in matches]
+
+        assert pairs(map(json.loads, streamed.text.splitlines())) == pairs(computed)
+        full = [json.loads(line) for line in everything.text.splitlines()]
+        assert pairs(full[:len(computed)]) == pairs(computed)
+        assert all(a['score'] >= b['score'] for a, b in zip(full, full[1:]))
+        assert min((match['score'] for match in full), default=0.1) >= 0.1
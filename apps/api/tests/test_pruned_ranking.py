@@ -0,0 +1,86 @@
+"""
+Bound-pruned top-k must return exactly the exhaustive ranking: every pair
+scored, score descending, earlier catalog position first among ties.
+"""
+import asyncio
+import random
+from typing import List, Tuple
+import pytest
+from benchmarks.fake_supabase import seed_catalog
+from database import Database
+from matching import MatchingEngine
+from tag_index import TagIndex
+from vocabulary import TagVocabulary, jaccard
+
+N_BRANDS = 40
+N_EVENTS = 400
+LIMITS = [1, 5, 50, N_EVENTS]
+
+
+def exhaustive(scores: List[float], limit: int) -> List[Tuple[int, float]]:
+    """(position, score) of the best limit at or above threshold, ties to the earlier position"""
+    eligible = [(position, score) for position, score in enumerate(scores) if score >= 0.1]
+    return sorted(eligible, key=lambda pair: (-pair[1], pair[0]))[:limit]
+
+
+@pytest.fixture(scope='module', params=[0.0, 0.10])
+def ranked(request):
+    async def run():
+        fake = seed_catalog(N_BRANDS, N_EVENTS, seed=11)
+        engine = MatchingEngine(Database(fake), text_weight=request.param)
+        try:
+            brands, events = await engine.catalog.get('brands'), await engine.catalog.get('events')
+            results = []
+            for brand_row in random.Random(1).sample(fake.tables['brands'], 8):
+                brand, _, _ = await engine._load_brand(brand_row['id'])
+                scores = [engine.score_components(brand, event)[0] for event in events.entities]
+                for limit in LIMITS:
+                    matches = await engine.compute_matches(brand_id=brand.id, limit=limit)
+                    results.append((
+                        [(match.event_id, match.score) for match in matches],
+                        [(events.entities[j].id, score) for j, score in exhaustive(scores, limit)]
+                    ))
+            for event_row in random.Random(2).sample(fake.tables['events'], 8):
+                event, _, _ = await engine._load_event(event_row['id'])
+                scores = [engine.score_components(brand, event)[0] for brand in brands.entities]
+                for limit in LIMITS:
+                    matches = await engine.compute_matches(event_id=event.id, limit=limit)
+                    results.append((
+                        [(match.brand_id, match.score) for match in matches],
+                        [(brands.entities[i].id, score) for i, score in exhaustive(scores, limit)]
+                    ))
+            return results
+        finally:
+            engine.close()
+
+    return asyncio.run(run())
+
+
+def test_pruned_top_k_equals_exhaustive(ranked):
+    for pruned, expected in ranked:
+        assert pruned == expected
+
+
+def test_rankings_include_ties(ranked):
+    # Otherwise the tie-breaking above went untested
+    full = [expected for _, expected in ranked if len(expected) > 50]
+    assert any(len({score for _, score in expected}) < len(expected) for expected in full)
+
+
+def test_ranked_candidates_bound_every_score():
+    rng = random.Random(5)
+    vocabulary = TagVocabulary()
+    tags = [f'tag{k}' for k in range(12)]
+    masks = [vocabulary.mask(rng.sample(tags, rng.randint(0, 4))) for _ in range(300)]
+    rest_bounds = [rng.choice([0.2, 0.35, 0.5, 0.65]) for _ in masks]
+    index = TagIndex.build(vocabulary, masks, rest_bounds)
+
+    for _ in range(20):
+        query = vocabulary.mask(rng.sample(tags, rng.randint(0, 5)))
+        rest_bound = rng.choice([0.3, 0.65])
+        candidates = list(index.ranked_candidates(query, rest_bound))
+        assert sorted(position for _, position in candidates) == list(range(len(masks)))
+        assert all(a[0] >= b[0] for a, b in zip(candidates, candidates[1:]))
+        for bound, position in candidates:
+            exact = 0.35 * jaccard(query, masks[position]) + min(rest_bounds[position], rest_bound)
+            assert bound == pytest.approx(exact)
@@ -0,0 +1,74 @@
+"""
+refresh_recency after time has passed updates exactly the rows of events
+that crossed a recency step, to the scores a fresh rescore gives, and a
+second run changes nothing.
+"""
+import asyncio
+import copy
+from datetime import datetime, timedelta, timezone
+from benchmarks.fake_supabase import FakeSupabase, seed_catalog
+from database import Database
+from matching import MatchingEngine, RECENCY_STATE_ID
+
+ELAPSED = timedelta(days=40)
+
+
+def shift_event_dates(fake: FakeSupabase, delta: timedelta):
+    for event in fake.tables['events']:
+        if event['event_date']:
+            event['event_date'] = (datetime.fromisoformat(event['event_date']) + delta).isoformat()
+
+
+def test_refresh_updates_crossed_events_only():
+    async def run():
+        fake = seed_catalog(20, 150, seed=8)
+        engine = MatchingEngine(Database(fake))
+        try:
+            # Scores stored ELAPSED ago are today's scores with every event ELAPSED further out
+            shift_event_dates(fake, ELAPSED)
+            await engine.recompute_all_matches()
+            shift_event_dates(fake, -ELAPSED)
+            fake.tables['match_recompute_state'].append({
+                'id': RECENCY_STATE_ID, 'watermark': (datetime.now(timezone.utc) - ELAPSED).isoformat()
+            })
+            engine.catalog.invalidate()
+            before = copy.deepcopy(fake.tables['matches'])
+
+            first = await engine.refresh_recency()
+            refreshed = copy.deepcopy(fake.tables['matches'])
+            second = await engine.refresh_recency()
+
+            brands = {brand.id: brand for brand in (await engine.catalog.get('brands')).entities}
+            events = {event.id: event for event in (await engine.catalog.get('events')).entities}
+            rescored = {
+                (row['brand_id'], row['event_id']): engine.score_components(
+                    brands[row['brand_id']], events[row['event_id']]
+                )
+                for row in refreshed
+            }
+            then = datetime.now(timezone.utc) - ELAPSED
+            recency = engine.calculate_recency_score
+            crossed = {
+                event.id for event in events.values() if recency(event.event_date) != recency(event.event_date, then)
+            }
+            return first, second, before, refreshed, fake.tables['matches'], rescored, crossed
+        finally:
+            engine.close()
+
+    first, second, before, refreshed, after_second, rescored, crossed = asyncio.run(run())
+
+    assert first['crossed'] == len(crossed) and 0 < len(crossed) < first['events']
+    # Rows change exactly for the events that crossed a step
+    changed = [old != new for old, new in zip(before, refreshed)]
+    assert changed == [old['event_id'] in crossed for old in before]
+    assert sum(changed) == first['updated']
+
+    for old, row in zip(before, refreshed):
+        score, _, _, _, recency, _, _ = rescored[(row['brand_id'], row['event_id'])]
+        assert row['recency_score'] == row['reasoning']['recency_score'] == recency
+        assert abs(row['score'] - score) < 1e-12
+        assert {key: value for key, value in row.items() if key not in ('score', 'recency_score', 'reasoning')} == \
+            {key: value for key, value in old.items() if key not in ('score', 'recency_score', 'reasoning')}
+
+    assert second['crossed'] == second['updated'] == 0
+    assert after_second == refreshed
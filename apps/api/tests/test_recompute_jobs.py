@@ -0,0 +1,109 @@
+"""
+Recompute endpoints: a start is a 202 with a job to poll, a second start
+while it runs is a 409 naming that job, progress adds up, and a cancelled
+run leaves the watermark where it was.
+"""
+import asyncio
+import time
+from typing import Any, Dict, Optional
+from benchmarks.fake_supabase import FakeSupabase, seed_catalog
+from database import Database
+from jobs import RecomputeJobs
+from matching import MatchingEngine, RECOMPUTE_STATE_ID
+
+N_BRANDS = 20
+N_EVENTS = 100
+
+
+def watermark(fake: FakeSupabase) -> Optional[str]:
+    row = fake.get('match_recompute_state', RECOMPUTE_STATE_ID)
+    return row['watermark'] if row else None
+
+
+def wait_until_done(client, job_id: str, timeout: float = 60.0) -> Dict[str, Any]:
+    """Poll a job until it finishes, checking every status along the way"""
+    deadline = time.monotonic() + timeout
+    scored = 0
+    while time.monotonic() < deadline:
+        status = client.get(f'/api/v1/recompute-jobs/{job_id}').json()
+        assert status['id'] == job_id
+        assert scored <= status['pairs_scored'] <= max(status['pairs_total'], scored)
+        scored = status['pairs_scored']
+        if status['state'] in ('succeeded', 'failed', 'cancelled'):
+            return status
+        assert status['stage'] is not None
+        time.sleep(0.02)
+    raise AssertionError(f"Recompute job {job_id} still running after {timeout}s")
+
+
+def test_start_then_poll_to_completion(api):
+    fake = seed_catalog(N_BRANDS, N_EVENTS, seed=6)
+    client = api(fake)
+
+    response = client.post('/api/v1/recompute-all-matches')
+    assert response.status_code == 202
+    job = response.json()['job']
+    assert job['state'] in ('queued', 'running')
+
+    status = wait_until_done(client, job['id'])
+    assert status['state'] == 'succeeded' and status['error'] is None
+    assert status['stage'] is None and status['finished_at'] is not None
+    assert status['pairs_total'] == status['pairs_scored'] == N_BRANDS * N_EVENTS
+    assert status['rows_written'] == status['result']['count'] == len(fake.tables['matches'])
+    assert status['result']['rescored'] == N_BRANDS * N_EVENTS
+    assert watermark(fake) is not None
+    assert client.get('/api/v1/recompute-jobs').json()['jobs'][0]['id'] == job['id']
+
+
+def test_second_start_while_running_is_409(api):
+    fake = seed_catalog(N_BRANDS, N_EVENTS, seed=6, latency_ms=20)
+    client = api(fake)
+
+    first = client.post('/api/v1/recompute-all-matches').json()['job']
+    second = client.post('/api/v1/recompute-all-matches', params={'incremental': True})
+    assert second.status_code == 409
+    assert second.json()['detail']['job']['id'] == first['id']
+
+    assert wait_until_done(client, first['id'])['state'] == 'succeeded'
+    # Once the first is done a new one may start
+    third = client.post('/api/v1/recompute-all-matches', params={'incremental': True})
+    assert third.status_code == 202
+    assert third.json()['job']['id'] != first['id']
+    assert wait_until_done(client, third.json()['job']['id'])['state'] == 'succeeded'
+
+
+def test_cancel_leaves_watermark(api):
+    fake = seed_catalog(N_BRANDS, N_EVENTS, seed=6)
+    client = api(fake)
+    wait_until_done(client, client.post('/api/v1/recompute-all-matches').json()['job']['id'])
+    before = watermark(fake)
+
+    fake.latency_seconds = 0.02
+    job = client.post('/api/v1/recompute-all-matches').json()['job']
+    cancelled = client.post(f"/api/v1/recompute-jobs/{job['id']}/cancel")
+    assert cancelled.status_code == 200
+
+    status = wait_until_done(client, job['id'])
+    assert status['state'] == 'cancelled' and status['result'] is None
+    assert watermark(fake) == before
+    assert client.post('/api/v1/recompute-jobs/no-such-job/cancel').status_code == 404
+    assert client.get('/api/v1/recompute-jobs/no-such-job').status_code == 404
+
+
+def test_cancel_before_the_job_runs(tmp_path):
+    async def run():
+        engine = MatchingEngine(Database(seed_catalog(2, 5, seed=6)))
+        jobs = RecomputeJobs(engine, shared_dir=str(tmp_path))
+        try:
+            job = jobs.start()
+            jobs.cancel(job.id)
+            await asyncio.gather(job.task, return_exceptions=True)
+            # The lock is free again, so the next start goes through
+            return job.status(), jobs.start()
+        finally:
+            await jobs.shutdown()
+            engine.close()
+
+    status, next_job = asyncio.run(run())
+    assert status['state'] == 'cancelled' and status['finished_at'] is not None
+    assert next_job.id != status['id']
@@ -0,0 +1,164 @@
+"""
+VectorizedScorer must score every pair bit-for-bit like compute_match_score,
+and the rows recompute stores must carry the same reasoning.
+"""
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+import pytest
+from match_rows import MatchRowBuilder
+from matching import MatchingEngine
+from parallel import score_shard
+from models import BrandProfile, EventData
+from records import BrandRecord, EventRecord, brand_document
+from scoring import VectorizedScorer
+from weights import COMPONENT_COLUMNS
+
+N_BRANDS = 60
+N_EVENTS = 250
+
+TAGS = ['tech', 'ai', 'career', 'networking', 'hackathon', 'music', 'sports', 'food', 'art', 'greek life']
+DEMOGRAPHICS = ['college students', 'students', 'gen z', '18-24', 'young adults', 'engineers', 'athletes']
+CATEGORIES = ['Academic', 'Cultural', 'Greek Life', 'Sports', 'Professional', None]
+UNIVERSITIES = ['Columbia University', 'Barnard College', 'MIT', 'Student Union', 'Fordham']
+COMPANY_SIZES = ['startup', 'small', 'medium', 'large', 'enterprise', None]
+BUDGETS = [None, 0, 250, 1000, 2500, 5000, 25000]
+WORDS = ['students', 'campus', 'workshop', 'panel', 'coding', 'concert', 'climate', 'pitch', 'alumni']
+
+
+def brand_row(rng: random.Random, index: int) -> Dict[str, Any]:
+    budget_min = rng.choice(BUDGETS)
+    return {
+        'id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'company_name': f"Brand {index}",
+        'description': rng.choice([None, '', ' '.join(rng.sample(WORDS, rng.randint(1, 6)))]),
+        'company_size': rng.choice(COMPANY_SIZES),
+        'target_demographics': rng.sample(DEMOGRAPHICS, rng.randint(0, 3)),
+        'budget_range_min': budget_min,
+        'budget_range_max': rng.choice([None, budget_min, (budget_min or 0) * 4, 1000]),
+        'preferred_event_types': rng.choice([
+            [], rng.sample(TAGS, rng.randint(1, 5)), [tag.upper() for tag in rng.sample(TAGS, 2)]
+        ]),
+    }
+
+
+def event_row(rng: random.Random, index: int) -> Dict[str, Any]:
+    now = datetime.now(timezone.utc)
+    sponsorship_min = rng.choice(BUDGETS)
+    return {
+        'id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'title': f"Event {index}",
+        'description': ' '.join(rng.sample(WORDS, rng.randint(0, 6))),
+        # Naive dates are read against local time
+        'event_date': rng.choice([
+            None,
+            (now + timedelta(days=rng.randint(-30, 365))).isoformat(),
+            (datetime.now() + timedelta(days=rng.randint(-10, 400))).isoformat(),
+        ]),
+        # Attendance at the tier boundaries the scalar helper branches on
+        'expected_attendance': rng.choice([None, 0, 49, 50, 199, 200, 201, 499, 500, 2000]),
+        'event_type': rng.choice(['conference', 'social', None]),
+        'sponsorship_min_amount': sponsorship_min,
+        'sponsorship_max_amount': rng.choice([None, sponsorship_min, (sponsorship_min or 0) * 5, 2500]),
+        'sponsorship_benefits': [],
+        'tags': rng.choice([None, [], ['TECH', 'Music'], rng.sample(TAGS, rng.randint(1, 6))]),
+        'orgs': {
+            'name': f"Org {index % 40}",
+            'university': rng.choice(UNIVERSITIES),
+            'category': rng.choice(CATEGORIES + ['', 'greek life']),
+        },
+    }
+
+
+def event_data(row: Dict[str, Any]) -> EventData:
+    return EventData(
+        id=row['id'],
+        title=row['title'],
+        description=row['description'],
+        event_date=datetime.fromisoformat(row['event_date']) if row['event_date'] else None,
+        expected_attendance=row['expected_attendance'],
+        event_type=row['event_type'],
+        sponsorship_min_amount=row['sponsorship_min_amount'],
+        sponsorship_max_amount=row['sponsorship_max_amount'],
+        sponsorship_benefits=row['sponsorship_benefits'] or [],
+        tags=row['tags'] or [],
+        org_name=row['orgs']['name'],
+        university=row['orgs']['university'],
+        org_category=row['orgs']['category']
+    )
+
+
+@pytest.fixture(scope='module', params=[(0, 0.0), (7, 0.10)])
+def catalog(request):
+    seed, text_weight = request.param
+    rng = random.Random(seed)
+    brand_rows = [brand_row(rng, i) for i in range(N_BRANDS)]
+    event_rows = [event_row(rng, i) for i in range(N_EVENTS)]
+    
+    engine = MatchingEngine(None, text_weight=text_weight)
+    brands = [BrandRecord.from_row(row, engine.tag_vocabulary) for row in brand_rows]
+    events = [EventRecord.from_row(row, engine.tag_vocabulary) for row in event_rows]
+    model = engine._index_event_text(events, event_rows)
+    for brand, row in zip(brands, brand_rows):
+        brand.text_vector = model.vectorize(brand_document(row))
+    
+    scorer = VectorizedScorer(
+        brands, events, engine.calculate_recency_score, engine.tag_vocabulary,
+        engine.tag_weight, engine.text_weight
+    )
+    yield engine, scorer, [BrandProfile(**row) for row in brand_rows], [event_data(row) for row in event_rows]
+    engine.close()
+
+
+def test_blocks_match_compute_match_score(catalog):
+    engine, scorer, brand_profiles, event_profiles = catalog
+    # Uneven blocks so rows are scored at different offsets
+    for start, stop in scorer.block_ranges(pairs_per_block=7 * N_EVENTS):
+        block = scorer.score_block(start, stop)
+        for i in range(stop - start):
+            brand = brand_profiles[start + i]
+            for j, event in enumerate(event_profiles):
+                score, reasoning = engine.compute_match_score(brand, event)
+                assert (
+                    float(block.final[i, j]), float(block.tag[i, j]), float(block.budget[i, j]),
+                    float(block.attendance[i, j]), float(block.recency[i, j]),
+                    float(block.demographic[i, j]), float(block.text[i, j])
+                ) == (
+                    score, reasoning.tag_overlap_score, reasoning.budget_alignment_score,
+                    reasoning.attendance_score, reasoning.recency_score,
+                    reasoning.demographic_match_score, reasoning.text_similarity_score
+                ), (brand.id, event.id)
+
+
+def test_stored_rows_match_compute_match_score(catalog):
+    engine, scorer, brand_profiles, event_profiles = catalog
+    builder = MatchRowBuilder(scorer.brands, scorer.events, engine.tag_vocabulary)
+    shard = score_shard(scorer, builder, 0, N_BRANDS, 0.1, 1000)
+    rows = [row for batch in shard.batches for row in json.loads(batch.body)]
+    assert [batch.rows for batch in shard.batches] == [len(json.loads(batch.body)) for batch in shard.batches]
+    assert len(rows) + len(shard.below) == N_BRANDS * N_EVENTS
+    
+    brand_positions = {profile.id: i for i, profile in enumerate(brand_profiles)}
+    event_positions = {profile.id: j for j, profile in enumerate(event_profiles)}
+    for row in rows:
+        score, reasoning = engine.compute_match_score(
+            brand_profiles[brand_positions[row['brand_id']]], event_profiles[event_positions[row['event_id']]]
+        )
+        expected = reasoning.model_dump()
+        # The scalar path lists matched tags in set order, stored rows in vocabulary order
+        assert sorted(row['reasoning'].pop('matched_tags')) == sorted(expected.pop('matched_tags'))
+        assert row['score'] == score
+        assert row['reasoning'] == expected
+        assert [row[column] for column in COMPONENT_COLUMNS] == [
+            expected['tag_overlap_score'], expected['budget_alignment_score'], expected['attendance_score'],
+            expected['recency_score'], expected['demographic_match_score'], expected['text_similarity_score']
+        ]
+        assert score >= 0.1
+    
+    for brand_id, event_id in shard.below:
+        score, _ = engine.compute_match_score(
+            brand_profiles[brand_positions[brand_id]], event_profiles[event_positions[event_id]]
+        )
+        assert score < 0.1
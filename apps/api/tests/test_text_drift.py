@@ -0,0 +1,69 @@
+"""
+An incremental recompute after an event description edit rescores only the
+pairs it has to, and leaves stored scores within TEXT_DRIFT_TOLERANCE of a
+full run.
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, Tuple
+from benchmarks.fake_supabase import FakeSupabase, seed_catalog
+from database import Database
+from matching import MatchingEngine, TEXT_DRIFT_TOLERANCE
+
+N_BRANDS = 30
+N_EVENTS = 200
+
+
+def stored(fake: FakeSupabase) -> Dict[Tuple[str, str], Tuple[float, float]]:
+    return {(row['brand_id'], row['event_id']): (row['score'], row['text_score']) for row in fake.tables['matches']}
+
+
+def edit_description(fake: FakeSupabase, position: int, words: str):
+    event = fake.tables['events'][position]
+    event['description'] = f"{event['description'] or ''} {words}"
+    event['updated_at'] = datetime.now(timezone.utc).isoformat()
+
+
+def test_description_edits_stay_within_tolerance():
+    async def run():
+        fake = seed_catalog(N_BRANDS, N_EVENTS, seed=4)
+        engine = MatchingEngine(Database(fake), text_weight=0.10)
+        try:
+            await engine.recompute_all_matches(incremental=True)
+            results = []
+            for position, words in enumerate(['robots zeppelin', 'robots yoga', 'zeppelin climate', 'kayak robots']):
+                edit_description(fake, position, words)
+                results.append(await engine.recompute_all_matches(incremental=True))
+            incremental = stored(fake)
+            await engine.recompute_all_matches()
+            return results, incremental, stored(fake)
+        finally:
+            engine.close()
+
+    results, incremental, full = asyncio.run(run())
+    # Each edit rescores its event against every brand, and at most some brands whose text drifted
+    assert results[0]['rescored'] == N_BRANDS
+    assert all(result['rescored'] < N_BRANDS * N_EVENTS for result in results[:2])
+
+    assert incremental.keys() == full.keys()
+    for key, (score, text_score) in incremental.items():
+        assert abs(text_score - full[key][1]) <= TEXT_DRIFT_TOLERANCE + 1e-12
+        assert abs(score - full[key][0]) <= 0.10 * TEXT_DRIFT_TOLERANCE + 1e-12
+
+
+def test_text_weight_change_rescores_every_pair():
+    async def run():
+        fake = seed_catalog(N_BRANDS, N_EVENTS, seed=4)
+        engine = MatchingEngine(Database(fake))
+        reweighted = MatchingEngine(Database(fake), text_weight=0.10)
+        try:
+            await engine.recompute_all_matches(incremental=True)
+            unchanged = await engine.recompute_all_matches(incremental=True)
+            return unchanged, await reweighted.recompute_all_matches(incremental=True)
+        finally:
+            engine.close()
+            reweighted.close()
+
+    unchanged, reweighted = asyncio.run(run())
+    assert unchanged['rescored'] == 0
+    assert reweighted['rescored'] == N_BRANDS * N_EVENTS
@@ -0,0 +1,302 @@
+import hashlib
+import math
+import re
+import struct
+import threading
+import numpy as np
+from array import array
+from itertools import chain
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from vocabulary import TagVocabulary
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Common English words that carry no matching signal
+STOP_WORDS = frozenset("""
+a about all also an and any are as at be been but by can for from has have how if in into
+is it its more most not of on or our out so such than that the their them then there these
+they this to up us was we were what when which while who will with you your
+""".split())
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercased word tokens, without stop words, single characters or bare numbers"""
+    if not text:
+        return []
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and not token.isdigit() and token not in STOP_WORDS
+    ]
+
+
+class TextVector(NamedTuple):
+    """L2-normalized TF-IDF vector: term ids in increasing order and their weights"""
+    ids: Sequence[int]
+    weights: Sequence[float]
+
+
+EMPTY_TEXT_VECTOR = TextVector((), ())
+
+
+class TermCounts(NamedTuple):
+    """Term ids in increasing order and how often each occurs in a document"""
+    ids: Sequence[int]
+    counts: Sequence[int]
+
+
+def term_counts(term_ids: Iterable[int]) -> TermCounts:
+    """Compact counts of a token id stream; typed arrays keep per-document memory low"""
+    counts: Dict[int, int] = {}
+    for term_id in term_ids:
+        counts[term_id] = counts.get(term_id, 0) + 1
+    ids = sorted(counts)
+    return TermCounts(array('q', ids), array('l', [counts[term_id] for term_id in ids]))
+
+
+def text_similarity(a: TextVector, b: TextVector) -> float:
+    """
+    Cosine similarity of two TF-IDF vectors.
+
+    Products are accumulated in increasing term id order, the same order
+    TextMatrix uses, so scalar and batched similarities are identical.
+    """
+    if not len(a.ids) or not len(b.ids):
+        return 0.0
+    other = dict(zip(b.ids, b.weights))
+    total = 0.0
+    for term_id, weight in zip(a.ids, a.weights):
+        other_weight = other.get(term_id)
+        if other_weight is not None:
+            total += weight * other_weight
+    return min(1.0, total)
+
+
+class TextModel:
+    """
+    IDF weights frozen from a TextCorpus at one point in time.
+
+    Vectors built by the same model are comparable. Terms the corpus has never
+    seen carry no weight, so query text can't grow the vocabulary.
+    """
+
+    def __init__(self, terms: TagVocabulary, idf: np.ndarray, documents: int):
+        self.terms = terms
+        self.idf = idf
+        self.documents = documents
+
+    def vectorize_counts(self, counts: TermCounts) -> TextVector:
+        """Vector for a document's term counts, with sublinear term frequency"""
+        ids, weights = array('q'), array('d')
+        for term_id, count in zip(counts.ids, counts.counts):
+            if term_id < len(self.idf) and self.idf[term_id] > 0:
+                ids.append(term_id)
+                weights.append((1.0 + math.log(count)) * float(self.idf[term_id]))
+        norm = math.sqrt(sum(weight * weight for weight in weights))
+        if not norm:
+            return EMPTY_TEXT_VECTOR
+        for i in range(len(weights)):
+            weights[i] /= norm
+        return TextVector(ids, weights)
+
+    def vectorize(self, text: Optional[str]) -> TextVector:
+        term_ids = (self.terms.get(token) for token in tokenize(text))
+        return self.vectorize_counts(term_counts(term_id for term_id in term_ids if term_id is not None))
+
+    def weights(self) -> Dict[str, float]:
+        """IDF of each weighted term, by term; from_weights rebuilds an equivalent model"""
+        terms = self.terms.tags()
+        weighted = np.flatnonzero(self.idf > 0).tolist()
+        return dict(zip((terms[term_id] for term_id in weighted), self.idf[weighted].tolist()))
+
+    @classmethod
+    def from_weights(cls, weights: Dict[str, float], documents: int = 0) -> 'TextModel':
+        """Model with these per-term IDF weights, over a vocabulary of its own"""
+        terms = TagVocabulary()
+        idf = np.zeros(len(weights), dtype=np.float64)
+        for term, weight in weights.items():
+            idf[terms.intern(term)] = weight
+        return cls(terms, idf, documents)
+
+    def fingerprint(self) -> str:
+        """
+        Digest of the weighted terms and their IDF. Models with the same
+        fingerprint vectorize every text the same, whatever order their
+        vocabularies interned the terms in.
+        """
+        terms = self.terms.tags()
+        weighted = np.flatnonzero(self.idf > 0).tolist()
+        digest = hashlib.sha256()
+        for term, idf in sorted(zip((terms[term_id] for term_id in weighted), self.idf[weighted].tolist())):
+            digest.update(term.encode())
+            digest.update(struct.pack('<d', idf))
+        return digest.hexdigest()
+
+
+class TextPostings(NamedTuple):
+    """
+    Term-major CSR postings: the rows containing term t are
+    positions[indptr[t]:indptr[t + 1]], in increasing order, with their weights.
+    """
+    indptr: np.ndarray
+    positions: np.ndarray
+    weights: np.ndarray
+
+
+def build_postings(vectors: List[TextVector]) -> TextPostings:
+    """Postings over vectors, gathered with one stable sort by term id"""
+    lengths = np.fromiter((len(vector.ids) for vector in vectors), dtype=np.int64, count=len(vectors))
+    total = int(lengths.sum())
+    ids = np.fromiter(chain.from_iterable(vector.ids for vector in vectors), dtype=np.int64, count=total)
+    weights = np.fromiter(chain.from_iterable(vector.weights for vector in vectors), dtype=np.float64, count=total)
+    rows = np.repeat(np.arange(len(vectors), dtype=np.int64), lengths)
+    order = np.argsort(ids, kind='stable')
+    indptr = np.zeros(int(ids.max()) + 2 if total else 1, dtype=np.int64)
+    np.cumsum(np.bincount(ids, minlength=len(indptr) - 1), out=indptr[1:])
+    return TextPostings(indptr, rows[order], weights[order])
+
+
+class TextMatrix:
+    """
+    Term-major postings over a list of TextVectors.
+
+    Similarity against every row is a sparse matrix-vector product (one
+    NumPy scatter-add per query term), and a block of queries is a sparse
+    matrix product accumulated term by term. model is the TextModel the rows
+    were built with, so queries can be vectorized consistently. postings
+    may be passed in already built, e.g. as views over a shared catalog file.
+    """
+
+    def __init__(self, model: Optional[TextModel], vectors: List[TextVector],
+                 postings: Optional[TextPostings] = None):
+        self.model = model
+        self.vectors = vectors
+        self.postings = postings if postings is not None else build_postings(vectors)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _posting(self, term_id: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        indptr = self.postings.indptr
+        if term_id >= len(indptr) - 1:
+            return None
+        start, end = indptr[term_id], indptr[term_id + 1]
+        if start == end:
+            return None
+        return self.postings.positions[start:end], self.postings.weights[start:end]
+
+    def dot(self, vector: TextVector) -> np.ndarray:
+        """Similarity of vector with every row"""
+        scores = np.zeros(len(self.vectors), dtype=np.float64)
+        for term_id, weight in zip(vector.ids, vector.weights):
+            posting = self._posting(term_id)
+            if posting is not None:
+                positions, weights = posting
+                scores[positions] += weight * weights
+        return np.minimum(scores, 1.0)
+
+    def dot_many(self, vectors: List[TextVector]) -> np.ndarray:
+        """Similarity of every vector (rows) with every row of the matrix (columns)"""
+        scores = np.zeros((len(vectors), len(self.vectors)), dtype=np.float64)
+        query_rows: Dict[int, List[int]] = {}
+        query_weights: Dict[int, List[float]] = {}
+        for row, vector in enumerate(vectors):
+            for term_id, weight in zip(vector.ids, vector.weights):
+                query_rows.setdefault(term_id, []).append(row)
+                query_weights.setdefault(term_id, []).append(weight)
+
+        for term_id in sorted(query_rows):
+            posting = self._posting(term_id)
+            if posting is None:
+                continue
+            positions, weights = posting
+            rows = np.array(query_rows[term_id], dtype=np.int64)
+            scores[np.ix_(rows, positions)] += np.outer(query_weights[term_id], weights)
+        return np.minimum(scores, 1.0)
+
+    def nearest(self, vector: TextVector, limit: int) -> List[Tuple[int, float]]:
+        """(position, similarity) of the most similar rows, best first, ties to the earlier position"""
+        scores = self.dot(vector)
+        candidates = np.flatnonzero(scores > 0)
+        order = np.argsort(-scores[candidates], kind='stable')[:limit]
+        return [(int(position), float(scores[position])) for position in candidates[order]]
+
+
+def similarity_drift(before: List[TextVector], after: List[TextVector],
+                     rows_before: TextMatrix, rows_after: TextMatrix) -> np.ndarray:
+    """
+    For each query, the largest change of its similarity with any row when
+    both sides are vectorized by another model: before/after hold the same
+    queries under the two models, rows_before/rows_after the same rows.
+    """
+    drift = np.zeros(len(after), dtype=np.float64)
+    for i, (query_before, query_after) in enumerate(zip(before, after)):
+        change = np.abs(rows_after.dot(query_after) - rows_before.dot(query_before))
+        drift[i] = change.max(initial=0.0)
+    return drift
+
+
+class TextCorpus:
+    """
+    Document frequencies over the event corpus, maintained incrementally.
+
+    sync() makes the corpus exactly the documents it is given; only documents
+    that are new or whose text changed are tokenized, and document
+    frequencies are adjusted by the difference, so refreshing after a few
+    events are published costs a few tokenizations plus an O(vocabulary) IDF
+    pass. Works on plain rows, so an index can be built offline as well.
+    """
+
+    def __init__(self):
+        self.terms = TagVocabulary()
+        self._documents: Dict[str, Tuple[int, TermCounts]] = {}
+        self._document_frequency: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.tokenized = 0
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def sync(self, documents: Iterable[Tuple[str, str]]) -> Tuple[TextModel, List[TermCounts]]:
+        """
+        Replace the corpus with these (id, text) documents.
+
+        Returns the resulting model and each document's term counts, in order.
+        """
+        with self._lock:
+            seen = set()
+            counts_in_order = []
+            for document_id, text in documents:
+                seen.add(document_id)
+                fingerprint = hash(text)
+                entry = self._documents.get(document_id)
+                if entry is None or entry[0] != fingerprint:
+                    if entry is not None:
+                        self._count(entry[1], -1)
+                    entry = (fingerprint, term_counts(self.terms.intern(token) for token in tokenize(text)))
+                    self._count(entry[1], 1)
+                    self._documents[document_id] = entry
+                    self.tokenized += 1
+                counts_in_order.append(entry[1])
+
+            for document_id in [d for d in self._documents if d not in seen]:
+                self._count(self._documents.pop(document_id)[1], -1)
+
+            return self._model(), counts_in_order
+
+    def _count(self, counts: TermCounts, delta: int):
+        for term_id in counts.ids:
+            frequency = self._document_frequency.get(term_id, 0) + delta
+            if frequency:
+                self._document_frequency[term_id] = frequency
+            else:
+                self._document_frequency.pop(term_id, None)
+
+    def _model(self) -> TextModel:
+        # Smoothed IDF; terms no current document uses get 0 and are dropped from vectors
+        documents = len(self._documents)
+        idf = np.zeros(len(self.terms), dtype=np.float64)
+        if self._document_frequency:
+            ids = np.fromiter(self._document_frequency.keys(), dtype=np.int64)
+            frequency = np.fromiter(self._document_frequency.values(), dtype=np.float64)
+            idf[ids] = np.log((1.0 + documents) / (1.0 + frequency)) + 1.0
+        return TextModel(self.terms, idf, documents)
@@ -0,0 +1,79 @@
+import threading
+from typing import Dict, Iterable, List, Optional
+
+
+class TagVocabulary:
+    """
+    Interns normalized (lowercased) tags to small integer ids.
+
+    A tag list becomes a bitset, a Python int with bit i set for tag id i, so
+    overlap between two lists is popcount arithmetic instead of building and
+    intersecting string sets. Ids are never reused or reassigned, so masks
+    from different catalog loads stay comparable for the life of the process.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._tags: List[str] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    def __getstate__(self):
+        # Pickles for worker processes, which get a lock of their own
+        state = dict(self.__dict__)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def intern(self, tag: str) -> int:
+        """Id for an already-normalized tag, assigning the next one if it is new"""
+        tag_id = self._ids.get(tag)
+        if tag_id is None:
+            with self._lock:
+                tag_id = self._ids.get(tag)
+                if tag_id is None:
+                    tag_id = len(self._tags)
+                    self._tags.append(tag)
+                    self._ids[tag] = tag_id
+        return tag_id
+
+    def get(self, tag: str) -> Optional[int]:
+        """Id of an already-normalized tag, or None if it was never interned"""
+        return self._ids.get(tag)
+
+    def tags(self) -> List[str]:
+        """Every interned tag, in id order"""
+        return list(self._tags)
+
+    def mask(self, tags: Iterable[str]) -> int:
+        """Bitset of a tag list, normalized the way calculate_tag_overlap does"""
+        mask = 0
+        for tag in tags:
+            mask |= 1 << self.intern(tag.lower())
+        return mask
+
+    def decode(self, mask: int) -> List[str]:
+        """Tags whose bits are set in mask, in id order"""
+        return [self._tags[tag_id] for tag_id in self.ids(mask)]
+
+    def ids(self, mask: int) -> List[int]:
+        """Ids whose bits are set in mask, in increasing order"""
+        ids = []
+        while mask:
+            low = mask & -mask
+            ids.append(low.bit_length() - 1)
+            mask ^= low
+        return ids
+
+
+def jaccard(mask_a: int, mask_b: int) -> float:
+    """Jaccard overlap of two tag bitsets; 0.0 if either is empty"""
+    if not mask_a or not mask_b:
+        return 0.0
+    intersection = (mask_a & mask_b).bit_count()
+    return intersection / (mask_a.bit_count() + mask_b.bit_count() - intersection)
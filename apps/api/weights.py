@@ -0,0 +1,182 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+# Re-weighted scores below this aren't matches, same as the stored threshold
+MATCH_THRESHOLD = 0.1
+
+# Per-entity component matrices kept for re-weighting
+DEFAULT_COMPONENT_CACHE_ENTRIES = 256
+
+
+class InvalidWeights(ValueError):
+    """Unknown weight profile, or weights that can't rank anything"""
+
+
+class ScoreWeights(NamedTuple):
+    """Weight of each score component, in score_components order"""
+    tag: float
+    budget: float
+    attendance: float
+    recency: float
+    demographic: float
+    text: float
+
+    def apply(self, components: np.ndarray) -> np.ndarray:
+        """
+        Weighted sum of each row of a component matrix, accumulated in the
+        order of the scoring formula, so the default weights reproduce
+        score_components exactly and ties are broken the same way.
+        """
+        return (
+            self.tag * components[:, 0] +
+            self.budget * components[:, 1] +
+            self.demographic * components[:, 4] +
+            self.attendance * components[:, 2] +
+            self.recency * components[:, 3] +
+            self.text * components[:, 5]
+        )
+
+    def normalized(self) -> 'ScoreWeights':
+        """Same weights scaled to sum to 1, so scores stay between 0 and 1"""
+        if any(weight < 0 for weight in self):
+            raise InvalidWeights("Weights must not be negative")
+        total = sum(self)
+        if total <= 0:
+            raise InvalidWeights("At least one weight must be positive")
+        return ScoreWeights(*(weight / total for weight in self))
+
+
+COMPONENTS = ScoreWeights._fields
+
+# Stored component columns of a match row, and the reasoning keys holding the
+# same values for rows written before the columns existed; both in ScoreWeights order
+COMPONENT_COLUMNS = ('tag_score', 'budget_score', 'attendance_score', 'recency_score', 'demographic_score', 'text_score')
+REASONING_COMPONENTS = (
+    'tag_overlap_score', 'budget_alignment_score', 'attendance_score', 'recency_score',
+    'demographic_match_score', 'text_similarity_score'
+)
+
+# Named alternatives to the default weighting (MatchingEngine.default_weights)
+WEIGHT_PROFILES: Dict[str, ScoreWeights] = {
+    'budget_first': ScoreWeights(tag=0.20, budget=0.40, attendance=0.10, recency=0.05, demographic=0.15, text=0.10),
+    'audience_first': ScoreWeights(tag=0.15, budget=0.15, attendance=0.20, recency=0.05, demographic=0.35, text=0.10),
+    'interest_first': ScoreWeights(tag=0.40, budget=0.15, attendance=0.10, recency=0.05, demographic=0.10, text=0.20),
+}
+
+
+def resolve_weights(default: ScoreWeights, profile: Optional[str] = None,
+                    overrides: Optional[Dict[str, float]] = None) -> Optional[ScoreWeights]:
+    """
+    Weights for a request: a named profile (or the default) with individual
+    components overridden, normalized to sum to 1. None when the request
+    asks for nothing but the default, so callers keep their default path.
+    """
+    overrides = {name: weight for name, weight in (overrides or {}).items() if weight is not None}
+    if profile in (None, 'default') and not overrides:
+        return None
+
+    if profile in (None, 'default'):
+        weights = default
+    elif profile in WEIGHT_PROFILES:
+        weights = WEIGHT_PROFILES[profile]
+    else:
+        raise InvalidWeights(f"Unknown weight profile {profile!r}; expected one of: default, {', '.join(WEIGHT_PROFILES)}")
+
+    unknown = set(overrides) - set(COMPONENTS)
+    if unknown:
+        raise InvalidWeights(f"Unknown score components: {', '.join(sorted(unknown))}")
+    return weights._replace(**overrides).normalized()
+
+
+def parse_weight_overrides(value: Optional[str]) -> Optional[Dict[str, float]]:
+    """Overrides from a query string value like 'budget:0.5,tag:0.2'"""
+    if not value:
+        return None
+    overrides = {}
+    for item in value.split(','):
+        name, separator, weight = item.partition(':')
+        try:
+            if not separator:
+                raise ValueError
+            overrides[name.strip()] = float(weight)
+        except ValueError:
+            raise InvalidWeights(f"Invalid weight {item!r}; expected component:weight")
+    return overrides
+
+
+def stored_components(row: Dict[str, Any]) -> List[float]:
+    """Component scores of a stored match row, from its columns or else its reasoning"""
+    reasoning = row.get('reasoning') or {}
+    return [
+        row[column] if row.get(column) is not None else reasoning.get(key, 0.0)
+        for column, key in zip(COMPONENT_COLUMNS, REASONING_COMPONENTS)
+    ]
+
+
+def top_weighted(components: np.ndarray, weights: ScoreWeights, limit: Optional[int],
+                 min_score: float = MATCH_THRESHOLD,
+                 positions: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Best rows of a component matrix under weights: (positions, scores).
+
+    One vectorized pass scores every row, then the top limit are selected
+    with a partition rather than a full sort. Order is score
+    descending, earlier position first; positions restricts the rows
+    considered. limit None returns every row at or above min_score.
+    """
+    scores = weights.apply(components)
+    if positions is None:
+        positions = np.flatnonzero(scores >= min_score)
+    else:
+        positions = positions[scores[positions] >= min_score]
+
+    negated = -scores[positions]
+    if limit is not None and len(positions) > limit:
+        # Keep everything at least as good as the limit-th score, so ties at
+        # the cut are decided by position below rather than by the partition
+        cut = np.partition(negated, limit - 1)[limit - 1]
+        keep = negated <= cut
+        positions, negated = positions[keep], negated[keep]
+
+    order = np.lexsort((positions, negated))[:limit]
+    return positions[order], scores[positions[order]]
+
+
+class ComponentCache:
+    """
+    LRU of per-entity component matrices: one row per counterpart in the
+    catalog, one column per score component. Keys carry the catalog version,
+    so a reloaded catalog misses instead of serving stale components.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_COMPONENT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, np.ndarray]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        components = self._entries.get(key)
+        if components is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return components
+
+    def put(self, key: Hashable, components: np.ndarray):
+        self._entries[key] = components
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "max_entries": self.max_entries,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from typing import List
+from database import Database
+from match_rows import SerializedBatch
+from metrics import phase
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WRITE_BATCH_SIZE = 1000
+DEFAULT_MAX_PENDING_BATCHES = 4
+DEFAULT_WRITE_CONCURRENCY = 2
+DEFAULT_WRITE_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+
+
+class MatchWriter:
+    """
+    Streams match rows into the matches table as bounded upsert batches.
+
+    write() queues batches of rows already encoded as JSON (MatchRowBuilder
+    makes them batch_size rows long) for background writer tasks. The queue
+    holds at most max_pending_batches, so a producer that outpaces the
+    database is held back rather than buffering the whole run. Each batch is
+    retried on its own with backoff; batches that still fail are counted and
+    reported when the writer is closed.
+
+    Use as an async context manager; leaving the block waits for every queued
+    batch to finish.
+    """
+
+    def __init__(self, db: Database, batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+                 max_pending_batches: int = DEFAULT_MAX_PENDING_BATCHES,
+                 concurrency: int = DEFAULT_WRITE_CONCURRENCY,
+                 max_retries: int = DEFAULT_WRITE_RETRIES):
+        self.db = db
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending_batches)
+        self._workers: List[asyncio.Task] = []
+
+        self.rows_written = 0
+        self.batches_written = 0
+        self.failed_batches = 0
+        self.failed_rows = 0
+
+    async def __aenter__(self) -> 'MatchWriter':
+        self._workers = [asyncio.create_task(self._drain()) for _ in range(self.concurrency)]
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            return False
+        await self._finish()
+
+    async def write(self, batches: List[SerializedBatch]):
+        """Queue batches for upsert, waiting while the pending-batch limit is reached"""
+        for batch in batches:
+            await self._queue.put(batch)
+
+    async def _finish(self):
+        for _ in self._workers:
+            await self._queue.put(None)
+        await asyncio.gather(*self._workers)
+
+        if self.failed_batches:
+            raise RuntimeError(
+                f"{self.failed_batches} match batches ({self.failed_rows} rows) failed after "
+                f"{self.max_retries} attempts; {self.rows_written} rows were written"
+            )
+
+    async def _drain(self):
+        while True:
+            batch = await self._queue.get()
+            if batch is None:
+                return
+            await self._upsert(batch)
+
+    async def _upsert(self, batch: SerializedBatch):
+        query = self.db.upsert_serialized('matches', batch.body, on_conflict='brand_id,event_id')
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                with phase('recompute', 'write'):
+                    await self.db.execute(query)
+                self.rows_written += batch.rows
+                self.batches_written += 1
+                return
+            except Exception as e:
+                logger.warning(
+                    f"Match batch of {batch.rows} rows failed (attempt {attempt}/{self.max_retries}): {str(e)}"
+                )
+                if attempt < self.max_retries:
+                    await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+        self.failed_batches += 1
+        self.failed_rows += batch.rows
@@ -0,0 +1,79 @@
+-- Tables used by the matching API
+-- Run this after the main schema.sql
+
+-- Incremental recompute bookkeeping (one row per recompute target)
+create table public.match_recompute_state (
+  id text primary key, -- 'matches', 'recency' or 'listings'
+  watermark timestamp with time zone, -- start time of the last successful run
+  match_count integer,
+  rescored integer,
+  skipped integer,
+  updated_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
+-- Only the service role (matching API) touches this table
+alter table public.match_recompute_state enable row level security;
+
+create trigger update_match_recompute_state_updated_at before update on public.match_recompute_state
+  for each row execute function update_updated_at_column();
+
+-- Change tracking lookups for incremental recompute
+create index idx_brands_updated_at on public.brands(updated_at);
+create index idx_events_updated_at on public.events(updated_at);
+create index idx_orgs_updated_at on public.orgs(updated_at);
+
+-- Keyset pagination of stored match listings: (score desc, id) within one brand or event
+create index idx_matches_brand_score_id on public.matches(brand_id, score desc, id);
+create index idx_matches_event_score_id on public.matches(event_id, score desc, id);
+
+-- Component scores of each stored match, alongside the copy in reasoning, so
+-- time-dependent components can be refreshed without rescoring. Rows written
+-- before this migration stay null until the next full recompute.
+alter table public.matches
+  add column tag_score double precision,
+  add column budget_score double precision,
+  add column attendance_score double precision,
+  add column recency_score double precision,
+  add column demographic_score double precision,
+  add column text_score double precision;
+
+-- Set the recency component of the given events' matches, shifting each
+-- score by the weighted difference. Rows already at the new value (or without
+-- components) are untouched. Returns the number of rows updated.
+create or replace function public.refresh_match_recency(
+  p_event_ids uuid[],
+  p_recency_scores double precision[],
+  p_recency_weight double precision
+) returns integer
+language sql
+as $$
+  with refreshed as (
+    update public.matches m
+    set score = least(1, greatest(0, m.score + p_recency_weight * (r.recency_score - m.recency_score))),
+        recency_score = r.recency_score,
+        reasoning = jsonb_set(m.reasoning, '{recency_score}', to_jsonb(r.recency_score))
+    from unnest(p_event_ids, p_recency_scores) as r(event_id, recency_score)
+    where m.event_id = r.event_id
+      and m.recency_score <> r.recency_score
+    returning 1
+  )
+  select count(*)::integer from refreshed;
+$$;
+
+-- Only the service role (matching API) calls it
+revoke execute on function public.refresh_match_recency(uuid[], double precision[], double precision)
+  from public, anon, authenticated;
+
+-- Fingerprint of the TF-IDF model the last recompute scored descriptions with.
+-- An incremental run under the same model skips checking text drift.
+alter table public.match_recompute_state
+  add column text_model text;
+
+-- What an incremental recompute needs to bound text similarity drift: the IDF
+-- of each weighted term under the last run's model, the text weight it scored
+-- with, and how far stored text similarities may have drifted since every
+-- pair was last rescored. Null IDF or weight rescores every pair once.
+alter table public.match_recompute_state
+  add column text_idf jsonb,
+  add column text_weight double precision,
+  add column text_drift double precision;